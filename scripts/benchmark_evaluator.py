@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""
+モックLLMサーバーを使った評価処理の負荷試験
+
+scripts/mock_llm_server.py のモックサーバーを起動し、合成した小説データを入れた
+一時的なSQLiteのDBに対して NovelEvaluator で評価を実行します。並列数ごとに
+リクエスト数/秒・小説数/秒、応答時間のp50/p95/p99、解析に失敗した小説の割合を表示します。
+実際のAPIとPostgreSQLには接続しません。
+
+使用例:
+    python -m scripts.benchmark_evaluator --novels 100 --workers 1 4 8
+    python -m scripts.benchmark_evaluator --latency-mean 2.0 --rate-429 0.05 --malformed-rate 0.1 --garbage-rate 0.02
+    python -m scripts.benchmark_evaluator --mode pack --episode-chars 300
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.config import settings
+from src.db.database import Base
+from src.db.models import Novel, Episode
+from src.evaluator.evaluator import NovelEvaluator, evaluate_novels_concurrently
+from src.evaluator.usage import get_shared_usage_stats
+from src.evaluator.call_log import get_shared_call_log
+from scripts.mock_llm_server import add_server_arguments, server_from_args
+
+_SENTENCES = [
+    "朝の光が窓から差し込み、少女は静かに目を覚ました。",
+    "「今日こそは、あの扉の向こうへ行ってみせる」",
+    "彼は剣を握り直し、崩れかけた城壁を見上げた。",
+    "街の喧騒から離れた丘の上に、古い図書館が建っている。",
+    "誰も知らない約束が、二人の間にだけ残されていた。",
+    "風が止み、森の奥から低いうなり声が聞こえてくる。",
+]
+
+
+def create_database(path: str, novels: int, episodes: int, episode_chars: int, seed: int) -> Callable[[], Session]:
+    """合成した小説とエピソードを入れたSQLiteのDBを作成し、セッションを作る関数を返す"""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    rng = random.Random(seed)
+    session = factory()
+    for i in range(novels):
+        novel_id = f"{1177354054000000000 + i}"
+        session.add(Novel(
+            id=novel_id,
+            title=f"合成小説{i + 1}",
+            author=f"作者{i % 17}",
+            ranking_position=i + 1,
+            novel_url=f"https://kakuyomu.jp/works/{novel_id}"
+        ))
+        for number in range(1, episodes + 1):
+            parts = []
+            while sum(len(part) for part in parts) < episode_chars:
+                parts.append(rng.choice(_SENTENCES))
+            session.add(Episode(
+                id=f"{novel_id}{number:04d}",
+                novel_id=novel_id,
+                title=f"第{number}話",
+                content="\n".join(parts),
+                posted_at=datetime(2024, 1, 1),
+                episode_number=number
+            ))
+    session.commit()
+    session.close()
+    return factory
+
+
+def run_evaluation(mode: str, workers: int, factory: Callable[[], Session], novel_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    if mode == "single" and workers > 1:
+        return evaluate_novels_concurrently(novel_ids, max_workers=workers, session_factory=factory)
+    session = factory()
+    try:
+        evaluator = NovelEvaluator(session)
+        if mode == "pack":
+            return evaluator.evaluate_novels_packed(novel_ids, max_workers=workers, session_factory=factory)
+        if mode == "adaptive":
+            return evaluator.evaluate_novels_adaptive(novel_ids, max_workers=workers)
+        return evaluator.evaluate_novels_batch(novel_ids)
+    finally:
+        session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="モックLLMサーバーを使った評価処理の負荷試験")
+    parser.add_argument("--novels", type=int, default=50, help="合成する小説数")
+    parser.add_argument("--episodes", type=int, default=3, help="小説あたりのエピソード数")
+    parser.add_argument("--episode-chars", type=int, default=3000, help="エピソードあたりの文字数")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4], help="比較する並列数")
+    parser.add_argument("--mode", choices=["single", "pack", "adaptive"], default="single", help="評価方法")
+    parser.add_argument("--stream", action="store_true", help="ストリーミングで受信")
+    parser.add_argument("--verbose", action="store_true", help="評価処理のログを表示")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+
+    server = server_from_args(args).start()
+    settings.llm_endpoint = server.url
+    settings.llm_api_key = "mock"
+    settings.llm_stream = args.stream
+    # 応答キャッシュを使うと2回目以降の計測でAPIを呼ばなくなるため無効にする
+    settings.llm_cache_enabled = False
+    # モックサーバーへの呼び出しを本番の呼び出しログ（logs/llm_calls.jsonl）に追記しない
+    settings.llm_call_log_path = ""
+    # 同時送信数の上限はプロセス内で共有されるため、最大の並列数に合わせる
+    settings.llm_max_in_flight = max(args.workers)
+    settings.llm_requests_per_minute = 0
+    settings.llm_tokens_per_minute = 0
+
+    print(f"== {args.novels} novels x {args.episodes} episodes, mode={args.mode}, mock server {server.url}")
+    try:
+        for workers in args.workers:
+            with tempfile.TemporaryDirectory() as directory:
+                factory = create_database(
+                    os.path.join(directory, "benchmark.sqlite3"),
+                    args.novels, args.episodes, args.episode_chars, args.seed or 0
+                )
+                novel_ids = [f"{1177354054000000000 + i}" for i in range(args.novels)]
+                server.reset()
+                start = time.perf_counter()
+                results = run_evaluation(args.mode, workers, factory, novel_ids)
+                elapsed = time.perf_counter() - start
+
+            stats = server.summary()
+            failed = args.novels - len(results)
+            counts = ", ".join(f"{key}={value}" for key, value in sorted(stats["counts"].items()))
+            print(
+                f"  workers={workers:<3}{stats['requests'] / elapsed:>7.2f} req/s {len(results) / elapsed:>7.2f} novels/s  "
+                f"p50 {stats['p50']:.2f}s p95 {stats['p95']:.2f}s p99 {stats['p99']:.2f}s  "
+                f"failed {failed}/{args.novels} ({failed / args.novels:.1%})  [{counts}]"
+            )
+    finally:
+        server.stop()
+    print(get_shared_usage_stats().summary())
+    print(get_shared_call_log().summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+ランキングページ解析のベンチマーク
+
+保存済みのランキングページに対して、作品カードだけを追跡する
+ストリーミングパーサー（parse_ranking_page）と、ページ全体のDOMを構築する
+BeautifulSoup（html5lib / html.parser）の処理時間とピークメモリを比較します。
+引数を省略した場合は100作品分の合成ページで計測します。
+
+使用例:
+    python -m scripts.benchmark_ranking_parser rankings/daily.html
+"""
+
+import sys
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from bs4 import BeautifulSoup
+
+from src.scraper.ranking_parser import parse_ranking_page
+
+BASE_URL = "https://kakuyomu.jp"
+
+
+def soup_parse(html_text: str, features: str) -> List[Dict]:
+    """ページ全体のDOMを構築してCSSセレクタで抽出（比較用）"""
+    soup = BeautifulSoup(html_text, features)
+    novels = []
+    for i, title_element in enumerate(soup.select(".widget-workCard-titleLabel.bookWalker-work-title"), 1):
+        href = title_element.get('href')
+        work_card = title_element.find_parent(class_='widget-workCard')
+        author_element = work_card.select_one('.widget-workCard-authorLabel') if work_card else None
+        genre_element = work_card.select_one('.widget-workCard-genre') if work_card else None
+        novels.append({
+            'id': href.split('/')[-1],
+            'title': title_element.text.strip(),
+            'author': author_element.text.strip() if author_element else "不明",
+            'genre': genre_element.text.strip() if genre_element else None,
+            'ranking_position': i,
+            'novel_url': f"{BASE_URL}{href}"
+        })
+    return novels
+
+
+def synthetic_ranking_page(count: int = 100) -> str:
+    """作品カードを並べた合成ランキングページ"""
+    cards = []
+    for i in range(1, count + 1):
+        work_id = 16818093000000000000 + i
+        cards.append(
+            f'<div class="widget-workCard">'
+            f'<div class="widget-workCard-header"><p class="widget-workCard-rank">{i}</p>'
+            f'<h3 class="widget-workCard-title"><a href="/works/{work_id}" '
+            f'class="widget-workCard-titleLabel bookWalker-work-title">作品タイトル{i}</a></h3>'
+            f'<span class="widget-workCard-author"><a href="/users/user{i}" '
+            f'class="widget-workCard-authorLabel">著者{i}</a></span></div>'
+            '<p class="widget-workCard-summary">'
+            + 'あらすじ。' * 60 +
+            '</p><a href="/genres/fantasy" class="widget-workCard-genre">異世界ファンタジー</a>'
+            '<ul class="widget-workCard-tags">' + '<li><a href="/tags/x">タグ</a></li>' * 8 + '</ul>'
+            '</div>'
+        )
+    filler = '<div class="sidebar">' + '<p><a href="/other">関連リンク</a></p>' * 500 + '</div>'
+    return f'<html><head><title>ランキング</title></head><body>{"".join(cards)}{filler}</body></html>'
+
+
+def measure(func: Callable[[str], List[Dict]], html_text: str, repeat: int) -> Tuple[float, int, List[Dict]]:
+    """平均処理時間（ms）とピークメモリ（バイト）を計測"""
+    tracemalloc.start()
+    result = func(html_text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(html_text)
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ランキングページ解析のベンチマーク")
+    parser.add_argument("paths", nargs="*", help="保存済みランキングページ（省略時は合成データ）")
+    parser.add_argument("--repeat", type=int, default=5, help="計測の繰り返し回数")
+    args = parser.parse_args()
+
+    if args.paths:
+        pages = {path: Path(path).read_text(encoding='utf-8') for path in args.paths}
+    else:
+        pages = {'synthetic (100 works)': synthetic_ranking_page()}
+
+    parsers = {
+        'stream': lambda text: parse_ranking_page(text, BASE_URL),
+        'soup(html.parser)': lambda text: soup_parse(text, 'html.parser'),
+        'soup(html5lib)': lambda text: soup_parse(text, 'html5lib'),
+    }
+
+    exit_code = 0
+    for name, html_text in pages.items():
+        print(f"== {name} ({len(html_text.encode('utf-8')) / 1024:.0f} KB)")
+        baseline = None
+        for parser_name, func in parsers.items():
+            elapsed, peak, result = measure(func, html_text, args.repeat)
+            if baseline is None:
+                baseline = result
+                status = ""
+            else:
+                status = "same" if result == baseline else "DIFFERENT"
+                if result != baseline:
+                    exit_code = 1
+            print(f"  {parser_name:<20}{elapsed:>9.1f} ms{peak / 1024 / 1024:>9.1f} MB  {len(result):>4} works  {status}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+記録済みHTTPアーカイブを使ったスクレイパーのオフラインベンチマーク
+
+`python -m src.main --scrape --record-http archives/daily.jsonl.gz` で記録した
+アーカイブを再生し、同じ入力に対して取得方法（逐次・並列）ごとの所要時間と、
+ランキング解析・本文抽出・整形の処理速度を計測します。DBには接続しません。
+
+使用例:
+    python -m scripts.benchmark_scraper archives/daily.jsonl.gz
+    python -m scripts.benchmark_scraper archives/daily.jsonl.gz --latency 0.2 --workers 1 4 8
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.scraper.archive import HttpArchive, ReplayAdapter
+from src.scraper.kakuyomu import KakuyomuScraper, extract_episode_paragraphs
+from src.scraper.ranking_parser import parse_ranking_page
+from src.scraper.text_normalizer import normalize_text
+
+
+def create_scraper(archive: HttpArchive, latency: float, rps: float) -> KakuyomuScraper:
+    scraper = KakuyomuScraper(adapter=ReplayAdapter(archive, latency=latency))
+    # ベンチマークでは秒間リクエスト数の上限を明示的に指定する（0なら無制限）
+    scraper.rate_limiter.interval = 1.0 / rps if rps > 0 else 0.0
+    return scraper
+
+
+def benchmark_parsers(archive: HttpArchive) -> None:
+    """アーカイブ内のページに対する解析処理のスループット"""
+    ranking_pages = [r['body'] for url, r in archive.records.items() if '/rankings/' in url and r['status'] == 200]
+    episode_pages = [r['body'] for url, r in archive.records.items() if '/episodes/' in url and r['status'] == 200]
+
+    for name, pages, func in [
+        ('ranking parse', ranking_pages, lambda body: parse_ranking_page(body, "https://kakuyomu.jp")),
+        ('episode extract+normalize', episode_pages, lambda body: normalize_text(extract_episode_paragraphs(body))),
+    ]:
+        if not pages:
+            continue
+        size = sum(len(page.encode('utf-8')) for page in pages)
+        start = time.perf_counter()
+        for page in pages:
+            func(page)
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<28}{len(pages):>5} pages  {elapsed * 1000:>8.1f} ms  {size / elapsed / 1_000_000:>7.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="スクレイパーのオフラインベンチマーク")
+    parser.add_argument("archive", help="記録済みHTTPアーカイブ（.jsonl.gz）")
+    parser.add_argument("--limit", type=int, default=100, help="処理する小説数")
+    parser.add_argument("--latency", type=float, default=0.0, help="1リクエストあたりの模擬遅延（秒、負の値なら記録時の値）")
+    parser.add_argument("--rps", type=float, default=0.0, help="秒間リクエスト数の上限（0なら無制限）")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4], help="比較する並列数")
+    args = parser.parse_args()
+
+    archive = HttpArchive(args.archive)
+    latency = args.latency if args.latency >= 0 else None
+
+    print("== parsers")
+    benchmark_parsers(archive)
+
+    print("== fetch strategies")
+    for workers in args.workers:
+        scraper = create_scraper(archive, latency, args.rps)
+        start = time.perf_counter()
+        novels = scraper.get_daily_ranking(limit=args.limit)
+        if workers > 1:
+            episodes = sum(len(eps) for _, eps in scraper.fetch_episodes([n['id'] for n in novels], max_workers=workers))
+        else:
+            episodes = sum(len(scraper.get_episodes(n['id'])) for n in novels)
+        elapsed = time.perf_counter() - start
+        misses = scraper.session.get_adapter(scraper.base_url).misses
+        scraper.close()
+        print(
+            f"  workers={workers:<3}{len(novels):>5} novels {episodes:>5} episodes  "
+            f"{elapsed:>8.2f} s  {len(novels) / elapsed:>7.1f} novels/s  ({misses} archive misses)"
+        )
+
+
+if __name__ == "__main__":
+    main()
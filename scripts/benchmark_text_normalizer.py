@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+本文正規化処理のマイクロベンチマーク
+
+normalize_text と旧実装（文字参照1つごとに本文全体を置換し直す _format_text）の
+スループット（MB/s）を比較し、出力が一致するかも確認します。
+引数を省略した場合は合成した本文（通常・ルビ多め・文字参照多め）で計測します。
+
+使用例:
+    python -m scripts.benchmark_text_normalizer
+    python -m scripts.benchmark_text_normalizer pages/*.html --repeat 20
+"""
+
+import sys
+import re
+import html
+import time
+import argparse
+from pathlib import Path
+from typing import Callable, Dict
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.scraper.text_normalizer import (
+    normalize_text, AO_RBI, AO_RBL, AO_RBR, AO_EMB, AO_EME, AO_PIB, AO_PIE
+)
+
+
+def legacy_format_text(text: str) -> str:
+    """旧実装（KakuyomuScraper._format_text）"""
+    text = re.sub('<br />', '\r\n', text)
+    text = text.replace('<rp>(</rp>', '')
+    text = text.replace('<rp>)</rp>', '')
+    text = text.replace('<rp>（</rp>', '')
+    text = text.replace('<rp>）</rp>', '')
+    text = text.replace('<rb>', '')
+    text = text.replace('</rb>', '')
+    text = text.replace('<ruby>', AO_RBI)
+    text = text.replace('<rt>', AO_RBL)
+    text = text.replace('</rt></ruby>', AO_RBR)
+    text = text.replace('<em class="emphasisDots"><span>', AO_EMB)
+    text = text.replace('<span>', AO_EMB)
+    text = text.replace('</span></em>', AO_EME)
+    text = text.replace('</span>', AO_EME)
+    text = text.replace('<a href="', AO_PIB)
+    text = text.replace(' alt="挿絵" name="img">【挿絵表示】</a>', AO_PIE)
+    text = re.sub('<.*?>', '', text)
+    text = re.sub(' ', '', text)
+    text = text.replace('&lt', '<')
+    text = text.replace('&gt', '>')
+    text = text.replace('&quot', '')
+    text = text.replace('&nbsp', ' ')
+    text = text.replace('&yen', '\\')
+    text = text.replace('&brvbar', '|')
+    text = text.replace('&copy', '©')
+    text = text.replace('&amp', '&')
+    en = re.search(r'&#.*?;', text)
+    while en:
+        ch = en.group(0)
+        de = html.unescape(ch)
+        text = text.replace(ch, de)
+        en = re.search(r'&#.*?;', text)
+    return text
+
+
+def synthetic_corpus() -> Dict[str, str]:
+    """合成した本文HTML（段落数3000程度）"""
+    ruby = '<ruby><rb>薄暗</rb><rp>（</rp><rt>うすぐら</rt><rp>）</rp></ruby>'
+    dots = '<em class="emphasisDots"><span>じめじめ</span></em>'
+    typical = ''.join(
+        f'<p id="p{i}">　吾輩は猫である。名前はまだ無い。{ruby if i % 5 == 0 else ""}'
+        f'どこで生れたかとんと見当がつかぬ。&quot;何でも&quot;した所で泣いていた。</p>\r\n'
+        for i in range(3000)
+    )
+    markup_heavy = ''.join(
+        f'<p id="p{i}">{ruby}{dots}<br />{ruby}した所で<br /></p>\r\n'
+        for i in range(3000)
+    )
+    entity_heavy = ''.join(
+        f'<p id="p{i}">' + ''.join(f'&#{0x4e00 + i * 20 + j};' for j in range(20)) + '</p>\r\n'
+        for i in range(1000)
+    )
+    return {'typical': typical, 'markup-heavy': markup_heavy, 'entity-heavy': entity_heavy}
+
+
+def measure(func: Callable[[str], str], text: str, repeat: int) -> float:
+    """スループット（MB/s）を計測"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(text)
+    elapsed = (time.perf_counter() - start) / repeat
+    return len(text.encode('utf-8')) / elapsed / 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本文正規化処理のベンチマーク")
+    parser.add_argument("paths", nargs="*", help="本文HTMLファイル（省略時は合成データ）")
+    parser.add_argument("--repeat", type=int, default=5, help="計測の繰り返し回数")
+    args = parser.parse_args()
+
+    if args.paths:
+        corpus = {path: Path(path).read_text(encoding='utf-8') for path in args.paths}
+    else:
+        corpus = synthetic_corpus()
+
+    mismatches = 0
+    print(f"{'input':<24}{'size(KB)':>10}{'legacy MB/s':>14}{'normalize MB/s':>18}{'speedup':>10}")
+    for name, text in corpus.items():
+        if legacy_format_text(text) != normalize_text(text):
+            mismatches += 1
+            print(f"MISMATCH: {name}")
+        legacy = measure(legacy_format_text, text, args.repeat)
+        normalized = measure(normalize_text, text, args.repeat)
+        size_kb = len(text.encode('utf-8')) / 1024
+        print(f"{name:<24}{size_kb:>10.0f}{legacy:>14.1f}{normalized:>18.1f}{normalized / legacy:>9.1f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+エピソード本文抽出の回帰チェックスクリプト
+
+保存済みのエピソードページ（HTMLファイル）に対して、
+extract_episode_paragraphs の出力が旧実装（re.search + スライスの繰り返し）と
+バイト単位で一致することを確認し、両者の処理時間を表示します。
+
+使用例:
+    python -m scripts.check_episode_extraction pages/*.html
+    python -m scripts.check_episode_extraction pages/
+"""
+
+import sys
+import re
+import time
+import argparse
+from pathlib import Path
+from typing import List
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.scraper.kakuyomu import extract_episode_paragraphs
+
+
+def legacy_extract_episode_paragraphs(body: str) -> str:
+    """旧実装（段落ごとにページ残り全体をコピーするため段落数に対して二乗時間）"""
+    text = ""
+    tbody = re.search(r'<p id="p.*?</p>', body)
+    while tbody:
+        text = text + tbody.group(0) + '\r\n'
+        body = body[tbody.end(0):]
+        tbody = re.search(r'<p id="p.*?</p>', body)
+    return text
+
+
+def collect_pages(paths: List[str]) -> List[Path]:
+    """引数のファイルとディレクトリ配下の*.htmlを列挙"""
+    pages = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            pages.extend(sorted(path.glob("**/*.html")))
+        else:
+            pages.append(path)
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="エピソード本文抽出の回帰チェック")
+    parser.add_argument("paths", nargs="+", help="保存済みエピソードページ（ファイルまたはディレクトリ）")
+    parser.add_argument("--repeat", type=int, default=5, help="計測の繰り返し回数")
+    args = parser.parse_args()
+
+    pages = collect_pages(args.paths)
+    if not pages:
+        print("No pages found")
+        return 1
+
+    mismatches = 0
+    legacy_time = 0.0
+    new_time = 0.0
+
+    for page in pages:
+        body = page.read_text(encoding="utf-8")
+
+        expected = legacy_extract_episode_paragraphs(body)
+        actual = extract_episode_paragraphs(body)
+        if expected.encode("utf-8") != actual.encode("utf-8"):
+            mismatches += 1
+            print(f"MISMATCH: {page}")
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            legacy_extract_episode_paragraphs(body)
+        legacy_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            extract_episode_paragraphs(body)
+        new_time += time.perf_counter() - start
+
+    print(f"{len(pages)} pages checked, {mismatches} mismatches")
+    print(f"legacy: {legacy_time / args.repeat * 1000:.1f} ms/run")
+    print(f"new:    {new_time / args.repeat * 1000:.1f} ms/run")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
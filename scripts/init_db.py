@@ -1,8 +1,24 @@
+from sqlalchemy import text
+
 from src.db.database import engine, Base
-from src.db.models import Novel, Episode, Evaluation
+from src.db.models import Novel, Episode, EpisodeLSHBand, Evaluation, EvaluationJob
+
+# create_allは既存テーブルに列を追加しないため、後から追加した列はここで追加する
+COLUMN_MIGRATIONS = [
+    "ALTER TABLE episodes ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_episodes_content_hash ON episodes (content_hash)",
+    "ALTER TABLE episodes ADD COLUMN IF NOT EXISTS episode_number INTEGER",
+    "ALTER TABLE evaluations ADD COLUMN IF NOT EXISTS sample_count INTEGER DEFAULT 1",
+    "ALTER TABLE evaluations ADD COLUMN IF NOT EXISTS score_variance DOUBLE PRECISION",
+    "ALTER TABLE episodes ADD COLUMN IF NOT EXISTS minhash TEXT",
+    "ALTER TABLE evaluations ADD COLUMN IF NOT EXISTS copied_from VARCHAR(20)",
+]
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for statement in COLUMN_MIGRATIONS:
+            conn.execute(text(statement))
 
 if __name__ == "__main__":
     init_db()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python
+"""
+OpenAI互換のチャット補完APIのローカルモックサーバー
+
+LLMClient._call_llm_api が送るリクエストに対して評価結果のJSONを返します。
+応答時間の分布、429の注入（Retry-After付き）、修復できる崩れたJSON・解析できない応答の注入、
+ストリーミング（server-sent events）、プレフィックスキャッシュの一致を含む usage に対応し、
+実際のAPIを使わずに評価処理のスループットや並列時の挙動を計測できます。
+
+使用例:
+    python -m scripts.mock_llm_server --port 8089 --latency lognormal --latency-mean 1.5 --rate-429 0.05
+    LLM_ENDPOINT=http://127.0.0.1:8089/chat/completions LLM_API_KEY=mock python -m src.main --evaluate
+"""
+
+import sys
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.evaluator.prompt_builder import estimate_tokens
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+# まとめて評価するリクエストの作品IDの行
+_NOVEL_ID_RE = re.compile(r'^作品ID: (\S+)', re.MULTILINE)
+# プレフィックスキャッシュの単位（DeepSeekは64トークン単位で一致を判定する）
+_CACHE_BLOCK = 64
+
+
+class MockLLMServer:
+    """
+    チャット補完APIのモック（スレッドごとにリクエストを処理）
+
+    応答時間は指定した分布から作品ごとに引き、ストリーミングの場合は最初の断片を
+    ttft秒後に送り、残りを応答時間までに分けて送る。スコアはユーザーメッセージの
+    ハッシュから決まる値に正規分布のばらつきを加えたもので、同じ作品は近いスコアになる
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: str = "lognormal",
+        latency_mean: float = 1.0,
+        latency_sigma: float = 0.5,
+        ttft: float = 0.2,
+        rate_429: float = 0.0,
+        retry_after: float = 1.0,
+        malformed_rate: float = 0.0,
+        garbage_rate: float = 0.0,
+        score_noise: float = 0.5,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            latency: 応答時間の分布（fixed / uniform / exponential / lognormal）
+            latency_mean: 応答時間の平均（秒）
+            latency_sigma: lognormalの対数の標準偏差
+            ttft: ストリーミング時に最初の断片を送るまでの時間（秒）
+            rate_429: 429を返す割合
+            retry_after: 429のRetry-Afterヘッダーの秒数
+            malformed_rate: 修復できる崩れたJSON（前後の文章・末尾のカンマ・全角数字）を返す割合
+            garbage_rate: 途中で切れた解析できない応答を返す割合
+            score_noise: 同じ作品のスコアのばらつき（標準偏差）
+        """
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency}")
+        self.latency = latency
+        self.latency_mean = latency_mean
+        self.latency_sigma = latency_sigma
+        self.ttft = ttft
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.malformed_rate = malformed_rate
+        self.garbage_rate = garbage_rate
+        self.score_noise = score_noise
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._prefixes = set()
+        self.records: List[Dict[str, Any]] = []
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/chat/completions"
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset(self) -> None:
+        """集計とプレフィックスキャッシュを初期化"""
+        with self._lock:
+            self.records = []
+            self._prefixes.clear()
+
+    def _roll(self) -> float:
+        with self._lock:
+            return self._random.random()
+
+    def _draw_latency(self) -> float:
+        """指定した分布から応答時間（秒）を引く"""
+        mean = self.latency_mean
+        if mean <= 0:
+            return 0.0
+        with self._lock:
+            if self.latency == "fixed":
+                return mean
+            if self.latency == "uniform":
+                return self._random.uniform(0.5 * mean, 1.5 * mean)
+            if self.latency == "exponential":
+                return self._random.expovariate(1.0 / mean)
+            # 平均がlatency_meanになるよう対数の平均を調整
+            mu = math.log(mean) - self.latency_sigma ** 2 / 2
+            return self._random.lognormvariate(mu, self.latency_sigma)
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        start = time.perf_counter()
+        body = handler.rfile.read(int(handler.headers.get("Content-Length") or 0))
+        try:
+            payload = json.loads(body)
+            messages = payload["messages"]
+        except (ValueError, KeyError, TypeError):
+            self._send_json(handler, 400, {"error": {"message": "invalid request body"}})
+            self._record(start, 400, "invalid")
+            return
+
+        if self._roll() < self.rate_429:
+            self._send_json(
+                handler, 429, {"error": {"message": "rate limit exceeded"}},
+                headers={"Retry-After": f"{self.retry_after:g}"}
+            )
+            self._record(start, 429, "rate_limited")
+            return
+
+        roll = self._roll()
+        kind = "garbage" if roll < self.garbage_rate else (
+            "malformed" if roll < self.garbage_rate + self.malformed_rate else "ok"
+        )
+        content = self._render(messages, kind)
+        usage = self._usage(payload, messages, content)
+        latency = self._draw_latency()
+
+        if payload.get("stream"):
+            self._send_stream(handler, payload, content, usage, latency)
+        else:
+            time.sleep(latency)
+            self._send_json(handler, 200, {
+                "id": "mock-" + hashlib.sha1(body).hexdigest()[:12],
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            })
+        self._record(start, 200, kind)
+
+    def _record(self, start: float, status: int, kind: str) -> None:
+        with self._lock:
+            self.records.append({"latency": time.perf_counter() - start, "status": status, "kind": kind})
+
+    def _scores(self, key: str) -> Dict[str, Any]:
+        """作品ごとに決まる基準値にばらつきを加えたスコア"""
+        base = 3.0 + int(hashlib.sha256(key.encode("utf-8")).hexdigest()[:8], 16) % 500 / 100
+        scores = {}
+        with self._lock:
+            for field in ("story_score", "writing_score", "character_score", "overall_score"):
+                scores[field] = round(min(10.0, max(0.0, self._random.gauss(base, self.score_noise))), 1)
+        scores["feedback"] = "展開に勢いがあり、登場人物の動機も明確。文章は読みやすいが描写がやや単調。"
+        return scores
+
+    def _render(self, messages: List[Dict[str, str]], kind: str) -> str:
+        user = next((m["content"] for m in messages if m.get("role") == "user"), "")
+        novel_ids = _NOVEL_ID_RE.findall(user)
+        if novel_ids:
+            value: Any = {"results": [dict(novel_id=novel_id, **self._scores(novel_id)) for novel_id in novel_ids]}
+        else:
+            value = self._scores(user)
+        content = json.dumps(value, ensure_ascii=False)
+
+        if kind == "garbage":
+            return content[:len(content) // 2]
+        if kind == "malformed":
+            variant = int(self._roll() * 3)
+            if variant == 0:
+                return f"評価結果は以下の通りです。\n```json\n{content}\n```\n以上です。"
+            if variant == 1:
+                return content[:-1] + ",}" if content.endswith("}") else content
+            return content.translate(str.maketrans("0123456789", "０１２３４５６７８９"))
+        return content
+
+    def _usage(self, payload: Dict[str, Any], messages: List[Dict[str, str]], content: str) -> Dict[str, Any]:
+        """usage（システムメッセージが以前のリクエストと一致すればプレフィックスキャッシュに一致したとみなす）"""
+        model = payload.get("model")
+        prompt_tokens = sum(estimate_tokens(m.get("content") or "", model) for m in messages)
+        system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+        prefix = hashlib.sha256(system.encode("utf-8")).hexdigest()
+        with self._lock:
+            seen = prefix in self._prefixes
+            self._prefixes.add(prefix)
+        hit = estimate_tokens(system, model) // _CACHE_BLOCK * _CACHE_BLOCK if seen else 0
+        completion_tokens = estimate_tokens(content, model)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_cache_hit_tokens": hit,
+            "prompt_cache_miss_tokens": prompt_tokens - hit,
+            "prompt_tokens_details": {"cached_tokens": hit}
+        }
+
+    def _send_json(
+        self,
+        handler: BaseHTTPRequestHandler,
+        status: int,
+        body: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json; charset=utf-8")
+        handler.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _send_stream(
+        self,
+        handler: BaseHTTPRequestHandler,
+        payload: Dict[str, Any],
+        content: str,
+        usage: Dict[str, Any],
+        latency: float
+    ) -> None:
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+
+        chunks = [content[i:i + 8] for i in range(0, len(content), 8)] or [""]
+        ttft = min(self.ttft, latency)
+        interval = (latency - ttft) / len(chunks)
+
+        def event(data: Dict[str, Any]) -> None:
+            handler.wfile.write(f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8"))
+            handler.wfile.flush()
+
+        try:
+            time.sleep(ttft)
+            for i, chunk in enumerate(chunks):
+                if i:
+                    time.sleep(interval)
+                event({"model": payload.get("model"), "choices": [{"index": 0, "delta": {"content": chunk}}]})
+            event({"model": payload.get("model"), "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            if (payload.get("stream_options") or {}).get("include_usage"):
+                # usage は choices が空の最後の断片で返す（OpenAI互換の仕様）
+                event({"model": payload.get("model"), "choices": [], "usage": usage})
+            handler.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # クライアントがJSONを受け取った時点で接続を閉じた場合
+            pass
+
+    def summary(self) -> Dict[str, Any]:
+        """ステータス・応答の種類ごとの件数と、成功した応答の応答時間のパーセンタイル"""
+        with self._lock:
+            records = list(self.records)
+        latencies = sorted(r["latency"] for r in records if r["status"] == 200)
+        counts: Dict[str, int] = {}
+        for record in records:
+            key = str(record["status"]) if record["status"] != 200 else record["kind"]
+            counts[key] = counts.get(key, 0) + 1
+        return {
+            "requests": len(records),
+            "counts": counts,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+        }
+
+
+def percentile(values: List[float], p: float) -> float:
+    """昇順に並べた値のパーセンタイル（最近傍順位法、空なら0）"""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(values)))
+    return values[rank - 1]
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    """モックサーバーの設定をコマンドライン引数に追加（ベンチマークと共通）"""
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="lognormal", help="応答時間の分布")
+    parser.add_argument("--latency-mean", type=float, default=1.0, help="応答時間の平均（秒）")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="lognormalの対数の標準偏差")
+    parser.add_argument("--ttft", type=float, default=0.2, help="ストリーミング時の最初の断片までの時間（秒）")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="429を返す割合")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="429のRetry-Afterの秒数")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="修復できる崩れたJSONを返す割合")
+    parser.add_argument("--garbage-rate", type=float, default=0.0, help="解析できない応答を返す割合")
+    parser.add_argument("--seed", type=int, default=None, help="乱数のシード（再現用）")
+
+
+def server_from_args(args: argparse.Namespace, host: str = "127.0.0.1", port: int = 0) -> MockLLMServer:
+    return MockLLMServer(
+        host=host,
+        port=port,
+        latency=args.latency,
+        latency_mean=args.latency_mean,
+        latency_sigma=args.latency_sigma,
+        ttft=args.ttft,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        malformed_rate=args.malformed_rate,
+        garbage_rate=args.garbage_rate,
+        seed=args.seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI互換のチャット補完APIのモックサーバー")
+    parser.add_argument("--host", default="127.0.0.1", help="待ち受けるアドレス")
+    parser.add_argument("--port", type=int, default=8089, help="待ち受けるポート")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = server_from_args(args, host=args.host, port=args.port)
+    print(f"Mock LLM server listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.summary(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -41,6 +41,8 @@ def main():
     parser.add_argument("--evaluate", action="store_true", help="小説を評価")
     parser.add_argument("--results", action="store_true", help="評価結果を表示")
     parser.add_argument("--limit", type=int, default=100, help="処理する小説数")
+    parser.add_argument("--workers", type=int, default=1, help="スクレイピングの並列ワーカー数（2以上で並列取得）")
+    parser.add_argument("--eval-workers", type=int, default=1, help="評価の並列ワーカー数（2以上で並列評価）")
     
     args = parser.parse_args()
     
@@ -56,11 +58,11 @@ def main():
     try:
         if args.scrape:
             logger.info("スクレイピング処理を開始します")
-            scrape_novels(session, limit=args.limit)
+            scrape_novels(session, limit=args.limit, workers=args.workers)
         
         if args.evaluate:
             logger.info("評価処理を開始します")
-            evaluate_novels(session, limit=args.limit)
+            evaluate_novels(session, limit=args.limit, workers=args.eval_workers)
         
         if args.results:
             logger.info("評価結果を表示します")
@@ -14,11 +14,81 @@ class Settings(BaseSettings):
     llm_api_key: str = ""
     llm_endpoint: str = "https://api.deepseek.com"
     llm_model: str = "deepseek-chat"
+    evaluate_workers: int = 2               # パイプライン実行時の評価ワーカー数
+    eval_max_samples: int = 5               # 適応的な複数回評価で1作品あたりに評価する回数の上限
+    eval_top_n: int = 10                    # 境界付近の作品を再評価する上位件数（0なら境界を考慮しない）
+    eval_ci_target: float = 0.3             # 総合評価スコアの95%信頼区間の半幅がこれ以下なら打ち切る
+    eval_prior_std: float = 0.7             # スコアのばらつき（標準偏差）の事前の想定（評価回数が少ない作品の信頼区間に使う）
+    eval_disagreement: float = 1.0          # サブスコアの回ごとの標準偏差がこれを超えたら再評価する
+    dedup_enabled: bool = True              # 近似重複のエピソードを持つ作品の評価を再利用する
+    dedup_jaccard_threshold: float = 0.9    # 近似重複とみなす本文のJaccard係数（MinHashによる推定値）
+    eval_job_batch_size: int = 5            # 評価ジョブのワーカーが1回に取得するジョブ数
+    eval_job_lease_seconds: float = 900.0   # 取得したジョブのリース期間（秒、過ぎると他のワーカーが取り直す）
+    eval_job_max_attempts: int = 3          # 評価ジョブの最大試行回数
+    llm_max_in_flight: int = 4              # 同時に送信するLLMリクエスト数の上限
+    llm_requests_per_minute: int = 0        # 1分あたりのリクエスト数の上限（0なら無制限）
+    llm_tokens_per_minute: int = 0          # 1分あたりのトークン数の上限（0なら無制限）
+    llm_max_retries: int = 5                # 429・5xx・タイムアウト時の最大試行回数
+    llm_connect_timeout: float = 10.0       # 接続タイムアウト（秒）
+    llm_read_timeout: float = 60.0          # 読み込みタイムアウト（秒）
+    llm_prompt_token_budget: int = 6000     # プロンプトに埋め込む本文のトークン数の上限
+    llm_pack_max_episode_tokens: int = 800  # これ以下の短い作品はまとめて評価する
+    llm_pack_token_budget: int = 4000       # まとめて評価する1リクエストの本文のトークン数の上限
+    llm_pack_max_novels: int = 8            # まとめて評価する1リクエストの作品数の上限
+    llm_json_mode: bool = True              # JSONモード（response_format: json_object）で回答させる
+    llm_max_tokens: int = 512               # 1作品の評価結果に必要な出力トークン数の上限
+    llm_parse_retries: int = 1              # 応答を解析できなかった場合の再リクエスト回数
+    llm_stream: bool = False                # ストリーミングで受信し、JSONが揃った時点で打ち切る
+    llm_call_log_path: str = "logs/llm_calls.jsonl"  # API呼び出しごとの計測記録（空なら書き出さない）
+    llm_cache_enabled: bool = True          # 同じプロンプトへの応答を再利用する
+    llm_cache_bypass: bool = False          # キャッシュを読まずに毎回APIを呼ぶ（応答は保存する）
+    llm_cache_path: str = ".cache/llm_cache.sqlite3"
+    llm_cache_max_bytes: int = 100 * 1024 * 1024
+    llm_cache_max_age: float = 30 * 86400.0 # 応答を再利用する期間（秒、0なら無期限）
     
     # Scraper Configuration
     kakuyomu_base_url: str = "https://kakuyomu.jp"
     scrape_interval: float = 1.0
     max_retries: int = 3
+    scrape_max_workers: int = 4             # 並列取得時のワーカー数
+    scrape_max_requests_per_second: float = 0.0  # 全体の秒間リクエスト上限（適応的な調整でも超えない。0ならscrape_intervalから算出）
+    scrape_per_host_concurrency: int = 2    # ホストごとの同時接続数（初期値）
+    scrape_max_per_host_concurrency: int = 8  # AIMDで増やすホストごとの同時接続数の上限
+    scrape_adaptive_concurrency: bool = True  # 429・5xx・応答時間に応じて同時接続数と秒間リクエスト数を調整する
+    scrape_adaptive_max_requests_per_second: float = 5.0  # scrape_intervalから算出した速度を成功に応じて増やす上限（0なら算出値を超えない）
+    scrape_latency_target: float = 5.0      # これを超える応答時間は混雑とみなす（秒、0なら無効）
+    scrape_decrease_factor: float = 0.5     # 混雑を検知した際に同時接続数に掛ける係数
+    scrape_connect_timeout: float = 5.0     # 接続タイムアウト（秒）
+    scrape_read_timeout: float = 30.0       # 読み込みタイムアウト（秒）
+    scrape_max_retry_after: float = 300.0   # Retry-Afterで待機する最大秒数
+    circuit_breaker_threshold: int = 5      # 連続失敗がこの回数に達したらホストへの送信を停止
+    circuit_breaker_cooldown: float = 30.0  # 停止する秒数（再び失敗するたびに倍、最大10分）
+    scrape_episodes_per_novel: int = 1      # 1作品あたりに取得する話数（先頭から）
+    scrape_episode_char_budget: int = 20000 # 1作品あたりに取得する本文の文字数上限
+    scrape_episode_workers: int = 3         # 1作品内でエピソードを並列取得する数
+    ranking_parser: str = "stream"          # ランキングページの解析方法（stream / soup）
+    pipeline_queue_size: int = 10           # パイプラインのステージ間キューの上限
+    crawl_genres: str = "*"                 # 巡回するランキングのジャンル（カンマ区切り、*は全ジャンル）
+    crawl_periods: str = "daily,weekly,monthly"  # 巡回するランキングの集計期間
+
+    # HTTP Cache Configuration
+    http_cache_enabled: bool = True
+    http_cache_path: str = ".cache/http_cache.sqlite3"
+    http_cache_max_bytes: int = 200 * 1024 * 1024
+    http_cache_ttl_ranking: float = 600.0   # ランキングページ（秒）
+    http_cache_ttl_work: float = 0.0        # 作品ページ（毎回再検証）
+    http_cache_ttl_episode: float = 86400.0 # エピソードページ（秒）
+
+    # HTTP Archive Configuration（オフラインでのベンチマーク・回帰確認用）
+    http_archive_mode: str = ""             # record / replay（空なら無効）
+    http_archive_path: str = "archives/kakuyomu.jsonl.gz"
+    http_replay_latency: float = 0.0        # 再生時の遅延（秒、負の値なら記録時の所要時間を再現）
+
+    # Raw Page Store Configuration（取得したページの生データ、再解析用）
+    raw_store_enabled: bool = False
+    raw_store_path: str = "raw_store"
+    raw_store_codec: str = "gzip"           # gzip / lzma
+    reparse_workers: int = 0                # 再解析のプロセス数（0ならCPU数）
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,98 @@
+"""
+エピソード本文のMinHash署名とLSHのバケット
+
+本文の空白を除いた文字n-gramの集合からMinHash署名を作り、署名を帯（band）に分けた
+ハッシュ値をインデックスに保存する。いずれかの帯が一致したエピソードだけを候補とし、
+署名の一致率（Jaccard係数の推定値）で近似重複かどうかを判定する
+
+署名はn-gramごとにハッシュ値を1回だけ計算するone permutation hashingで作る。
+ハッシュ値の下位ビットで署名の位置（bin）を決め、binごとに残りのビットの最小値を取り、
+n-gramが入らなかったbinは次のbinの値で埋める（rotation densification）。
+n-gramごとに署名の長さ分のハッシュ関数を計算する通常のMinHashと同じように比較できる
+
+署名の計算方法（n-gramの長さ・ハッシュ関数・binの数・帯の分け方）を変えた場合は
+SIGNATURE_VERSION を上げること（異なるバージョンの署名は比較せず、作り直しの対象になる）
+"""
+
+import hashlib
+import re
+from typing import List, Optional, Set
+
+SIGNATURE_VERSION = "oph1"
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+# 署名を作らない短い本文の文字数（空白を除く）
+MIN_CHARS = 200
+
+# binの番号に使う下位ビット数（NUM_PERMUTATIONSは2の累乗）
+_BIN_BITS = NUM_PERMUTATIONS.bit_length() - 1
+_BIN_MASK = NUM_PERMUTATIONS - 1
+# 埋めたbinの値に加える間隔（binの値は64 - _BIN_BITSビットに収まる）
+_OFFSET = 1 << (64 - _BIN_BITS)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _hash(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def shingle_hashes(text: str) -> Set[int]:
+    """空白を除いた本文の文字n-gramのハッシュ値の集合"""
+    text = _WHITESPACE_RE.sub('', text)
+    return {_hash(shingle) for shingle in {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}}
+
+
+def minhash_signature(text: str) -> Optional[List[int]]:
+    """本文のMinHash署名（短すぎる本文はNone）"""
+    text = _WHITESPACE_RE.sub('', text)
+    if len(text) < MIN_CHARS:
+        return None
+    bins: List[Optional[int]] = [None] * NUM_PERMUTATIONS
+    for shingle in {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}:
+        value = _hash(shingle)
+        index = value & _BIN_MASK
+        value >>= _BIN_BITS
+        current = bins[index]
+        if current is None or value < current:
+            bins[index] = value
+
+    signature = []
+    for index in range(NUM_PERMUTATIONS):
+        step = 0
+        while bins[(index + step) % NUM_PERMUTATIONS] is None:
+            step += 1
+        signature.append(bins[(index + step) % NUM_PERMUTATIONS] + step * _OFFSET)
+    return signature
+
+
+def encode_signature(signature: List[int]) -> str:
+    """DBに保存する形式（"バージョン:" に続けて16進数を連結）"""
+    return f"{SIGNATURE_VERSION}:" + ''.join(f'{value:016x}' for value in signature)
+
+
+def decode_signature(encoded: str) -> Optional[List[int]]:
+    """保存した署名を復元（異なるバージョンの署名はNone）"""
+    prefix = f"{SIGNATURE_VERSION}:"
+    if not encoded or not encoded.startswith(prefix):
+        return None
+    return [int(encoded[i:i + 16], 16) for i in range(len(prefix), len(encoded), 16)]
+
+
+def lsh_buckets(signature: List[int]) -> List[str]:
+    """署名を帯に分け、帯ごとのハッシュ値を返す（帯の番号順）"""
+    return [
+        hashlib.blake2b(
+            ','.join(str(value) for value in signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]).encode('ascii'),
+            digest_size=8
+        ).hexdigest()
+        for band in range(BANDS)
+    ]
+
+
+def estimate_jaccard(a: List[int], b: List[int]) -> float:
+    """2つの署名からJaccard係数を推定（一致する要素の割合）"""
+    if not a or len(a) != len(b):
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / len(a)
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, Date, Float, ForeignKey, Index, Text
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from datetime import datetime, date
 from .database import Base
 
 class Novel(Base):
@@ -17,6 +17,7 @@ class Novel(Base):
     
     episodes = relationship("Episode", back_populates="novel")
     evaluations = relationship("Evaluation", back_populates="novel")
+    ranking_entries = relationship("RankingEntry", back_populates="novel")
 
 class Episode(Base):
     __tablename__ = "episodes"
@@ -26,8 +27,24 @@ class Episode(Base):
     title = Column(String(255), nullable=False)
     content = Column(Text, nullable=False)
     posted_at = Column(DateTime, nullable=False)
+    content_hash = Column(String(64), index=True)  # 本文のSHA-256（差分取得用）
+    episode_number = Column(Integer)  # 目次上の順番（1始まり）
+    minhash = Column(Text)  # 本文のMinHash署名（近似重複の検出用、短い本文はNULL）
     
     novel = relationship("Novel", back_populates="episodes")
+    # エピソードの行を書き込んだ後に帯の行を書き込み、署名を作り直した際は古い行を削除する
+    lsh_bands = relationship("EpisodeLSHBand", cascade="all, delete-orphan")
+
+class EpisodeLSHBand(Base):
+    __tablename__ = "episode_lsh_bands"
+    __table_args__ = (
+        # 帯ごとのハッシュ値が一致するエピソードを検索するためのインデックス
+        Index("ix_episode_lsh_bands_bucket", "band", "bucket"),
+    )
+    
+    episode_id = Column(String(50), ForeignKey("episodes.id"), primary_key=True)
+    band = Column(Integer, primary_key=True)
+    bucket = Column(String(16), nullable=False)
 
 class Evaluation(Base):
     __tablename__ = "evaluations"
@@ -41,6 +58,40 @@ class Evaluation(Base):
     writing_score = Column(Float)
     character_score = Column(Float)
     llm_feedback = Column(Text)
+    sample_count = Column(Integer, default=1)  # 集計した評価の回数
+    score_variance = Column(Float)  # 総合評価スコアの標本分散（2回以上評価した場合）
+    copied_from = Column(String(20))  # 近似重複の作品の評価を再利用した場合のコピー元の小説ID
     
     novel = relationship("Novel", back_populates="evaluations")
     episode = relationship("Episode")
+
+class RankingEntry(Base):
+    __tablename__ = "ranking_entries"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    novel_id = Column(String(20), ForeignKey("novels.id"), nullable=False, index=True)
+    ranking = Column(String(50), nullable=False)  # "ジャンル/期間"（例: fantasy/weekly）
+    position = Column(Integer, nullable=False)
+    recorded_on = Column(Date, nullable=False, default=date.today)
+    
+    novel = relationship("Novel", back_populates="ranking_entries")
+
+class EvaluationJob(Base):
+    __tablename__ = "evaluation_jobs"
+    __table_args__ = (
+        # 未処理のジョブを優先度順に取り出すためのインデックス
+        Index("ix_evaluation_jobs_status_priority", "status", "priority"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    novel_id = Column(String(20), ForeignKey("novels.id"), nullable=False, unique=True)
+    status = Column(String(10), nullable=False, default="pending")  # pending / leased / done / failed
+    priority = Column(Integer, nullable=False)  # ランキング順位（小さいほど先に評価）
+    attempts = Column(Integer, nullable=False, default=0)
+    leased_until = Column(DateTime)  # この時刻を過ぎたリースは他のワーカーが取り直せる
+    worker = Column(String(100))  # リース中または最後に処理したワーカー
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    novel = relationship("Novel")
@@ -1,10 +1,15 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import and_, desc, func
-from src.db.models import Novel, Episode, Evaluation
+from sqlalchemy import and_, desc, func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from src.db.models import Novel, Episode, EpisodeLSHBand, Evaluation, RankingEntry, EvaluationJob
+from src.db.minhash import (
+    SIGNATURE_VERSION, decode_signature, encode_signature, estimate_jaccard, lsh_buckets, minhash_signature
+)
+import hashlib
 import logging
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+from datetime import datetime, date, timedelta
+from typing import Optional, List, Dict, Any, Iterable, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -18,8 +23,28 @@ def save_novel_data(
     genre: Optional[str] = None,
     episodes: Optional[List[Dict[str, Any]]] = None
 ) -> bool:
-    """小説データとエピソードデータを保存"""
+    """
+    小説データとエピソードデータを保存
+
+    エピソードの近似重複検出用の署名は、新規または本文が変わったエピソードについてだけ
+    行を書き込む前に計算する（エピソードデータに 'signature' があれば計算済みの署名として使う）
+    """
     try:
+        # 保存済みのエピソードと本文・タイトルを比べ、変わっていないものは書き込まない
+        episodes = episodes or []
+        content_hashes = {ep['id']: compute_content_hash(ep['content'] or '') for ep in episodes}
+        stored = {
+            episode_id: (content_hash, episode_title)
+            for episode_id, content_hash, episode_title in session.query(
+                Episode.id, Episode.content_hash, Episode.title
+            ).filter(Episode.id.in_(list(content_hashes)))
+        } if episodes else {}
+        changed = [ep for ep in episodes if stored.get(ep['id']) != (content_hashes[ep['id']], ep['title'])]
+        signatures = {
+            ep['id']: ep['signature'] if 'signature' in ep else minhash_signature(ep['content'] or '')
+            for ep in changed
+        }
+
         # 小説データの更新または作成
         novel = session.query(Novel).get(novel_id)
         if novel:
@@ -42,22 +67,29 @@ def save_novel_data(
             session.add(novel)
 
         # エピソードデータの更新または作成
-        if episodes:
-            for ep in episodes:
-                episode = session.query(Episode).get(ep['id'])
-                if episode:
-                    episode.title = ep['title']
-                    episode.content = ep['content']
-                    episode.posted_at = ep['posted_at']
-                else:
-                    episode = Episode(
-                        id=ep['id'],
-                        novel_id=novel_id,
-                        title=ep['title'],
-                        content=ep['content'],
-                        posted_at=ep['posted_at']
-                    )
-                    session.add(episode)
+        for ep in changed:
+            content_hash = content_hashes[ep['id']]
+            episode = session.query(Episode).get(ep['id'])
+            if episode:
+                episode.title = ep['title']
+                episode.content = ep['content']
+                episode.posted_at = ep['posted_at']
+                episode.content_hash = content_hash
+                if ep.get('episode_number'):
+                    episode.episode_number = ep['episode_number']
+                index_episode_signature(episode, signatures[ep['id']])
+            else:
+                episode = Episode(
+                    id=ep['id'],
+                    novel_id=novel_id,
+                    title=ep['title'],
+                    content=ep['content'],
+                    posted_at=ep['posted_at'],
+                    content_hash=content_hash,
+                    episode_number=ep.get('episode_number')
+                )
+                session.add(episode)
+                index_episode_signature(episode, signatures[ep['id']])
 
         session.commit()
         return True
@@ -70,14 +102,243 @@ def save_novel_data(
         session.rollback()
         return False
 
+def compute_content_hash(content: str) -> str:
+    """エピソード本文のフィンガープリント（SHA-256）"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def index_episode_signature(episode: Episode, signature: Optional[List[int]]) -> None:
+    """
+    エピソードにminhash_signatureで計算した署名とLSHのバケットを設定（コミットは呼び出し側で行う）
+
+    短すぎて署名を作らない本文（signatureがNone）は空文字にして、署名の作成済みと区別する
+    """
+    episode.minhash = encode_signature(signature) if signature else ''
+    # 関連として設定し、新しいエピソードの行より先に帯の行が書き込まれないようにする
+    episode.lsh_bands = [
+        EpisodeLSHBand(band=band, bucket=bucket) for band, bucket in enumerate(lsh_buckets(signature))
+    ] if signature else []
+
+def index_missing_episode_signatures(session: Session, batch_size: int = 200) -> int:
+    """
+    署名が未作成のエピソード（署名の導入前に保存したもの）と、
+    計算方法が異なるバージョンの署名を持つエピソードの署名を作成
+
+    Returns:
+        署名を作成したエピソード数
+    """
+    indexed = 0
+    try:
+        while True:
+            episodes = session.query(Episode).filter(or_(
+                Episode.minhash.is_(None),
+                and_(Episode.minhash != '', ~Episode.minhash.startswith(f"{SIGNATURE_VERSION}:"))
+            )).order_by(Episode.id).limit(batch_size).all()
+            if not episodes:
+                return indexed
+            for episode in episodes:
+                index_episode_signature(episode, minhash_signature(episode.content or ''))
+            session.commit()
+            indexed += len(episodes)
+            logger.info(f"Indexed {indexed} episode signatures")
+    except SQLAlchemyError as e:
+        logger.error(f"Error indexing episode signatures: {e}")
+        session.rollback()
+        return indexed
+
+def find_near_duplicate_evaluation(
+    session: Session,
+    novel_id: str,
+    episodes: List[Episode],
+    threshold: float
+) -> Optional[Evaluation]:
+    """
+    評価対象のエピソードの近似重複を持つ他の小説の評価を検索
+
+    先頭のエピソードとLSHのバケットが1つ以上一致するエピソードを持つ評価済みの小説を候補とし、
+    評価対象の全エピソードについて、候補の小説のいずれかのエピソードとの
+    Jaccard係数の推定値がthreshold以上であれば、その小説の最新の評価を返す
+
+    Returns:
+        再利用できる評価（見つからない場合、署名のないエピソードを含む場合はNone）
+    """
+    signatures = [decode_signature(ep.minhash) for ep in episodes]
+    if not signatures or any(signature is None for signature in signatures):
+        return None
+    try:
+        buckets = lsh_buckets(signatures[0])
+        candidates = session.query(Episode.novel_id).\
+            join(EpisodeLSHBand, EpisodeLSHBand.episode_id == Episode.id).\
+            filter(or_(*[
+                and_(EpisodeLSHBand.band == band, EpisodeLSHBand.bucket == bucket)
+                for band, bucket in enumerate(buckets)
+            ])).\
+            filter(Episode.novel_id != novel_id).distinct().all()
+        
+        for (candidate_id,) in candidates:
+            evaluation = session.query(Evaluation).filter(Evaluation.novel_id == candidate_id).\
+                order_by(desc(Evaluation.evaluation_date)).first()
+            if evaluation is None:
+                continue
+            others = [
+                decode_signature(row[0]) for row in session.query(Episode.minhash).filter(
+                    Episode.novel_id == candidate_id,
+                    Episode.minhash.startswith(f"{SIGNATURE_VERSION}:")
+                ).all()
+            ]
+            if all(any(estimate_jaccard(signature, other) >= threshold for other in others) for signature in signatures):
+                return evaluation
+        return None
+    except SQLAlchemyError as e:
+        logger.error(f"Error finding near-duplicate evaluation: {e}")
+        return None
+
+def get_known_episode_ids(session: Session, novel_ids: Iterable[str]) -> Set[str]:
+    """指定された小説の保存済みエピソードIDを取得"""
+    try:
+        rows = session.query(Episode.id).filter(Episode.novel_id.in_(list(novel_ids))).all()
+        return {row[0] for row in rows}
+    except SQLAlchemyError as e:
+        logger.error(f"Error retrieving known episodes: {e}")
+        return set()
+
+def get_all_episode_ids(session: Session) -> List[str]:
+    """保存済みの全エピソードIDを取得"""
+    try:
+        return [row[0] for row in session.query(Episode.id).order_by(Episode.id).all()]
+    except SQLAlchemyError as e:
+        logger.error(f"Error retrieving episode ids: {e}")
+        return []
+
+def update_episode_contents(
+    session: Session,
+    contents: Dict[str, str],
+    signatures: Optional[Dict[str, Optional[List[int]]]] = None
+) -> int:
+    """
+    エピソード本文をまとめて更新（再解析用）
+
+    本文が変わっていないエピソードは書き込まない。signaturesに計算済みの署名がない
+    エピソードは、本文が変わっていた場合にここで署名を計算する
+
+    Returns:
+        更新したエピソード数（エラー時は0）
+    """
+    try:
+        updated = 0
+        episodes = session.query(Episode).filter(Episode.id.in_(list(contents))).all()
+        for episode in episodes:
+            content_hash = compute_content_hash(contents[episode.id])
+            if episode.content_hash == content_hash:
+                continue
+            episode.content = contents[episode.id]
+            episode.content_hash = content_hash
+            if signatures is not None and episode.id in signatures:
+                signature = signatures[episode.id]
+            else:
+                signature = minhash_signature(episode.content)
+            index_episode_signature(episode, signature)
+            updated += 1
+        session.commit()
+        return updated
+    except SQLAlchemyError as e:
+        logger.error(f"Error updating episode contents: {e}")
+        session.rollback()
+        return 0
+
+def update_novel_ranking(session: Session, novel_id: str, ranking_position: int) -> bool:
+    """小説のランキング順位と更新日時だけを更新"""
+    try:
+        novel = session.query(Novel).get(novel_id)
+        if not novel:
+            return False
+        novel.ranking_position = ranking_position
+        novel.updated_at = datetime.utcnow()
+        session.commit()
+        return True
+    except SQLAlchemyError as e:
+        logger.error(f"Database error occurred: {e}")
+        session.rollback()
+        return False
+
+def save_scraped_novel(
+    session: Session,
+    novel: Dict[str, Any],
+    episodes: Optional[List[Dict[str, Any]]]
+) -> bool:
+    """
+    スクレイピングした小説とエピソードを保存
+
+    未更新（'unchanged'）のエピソードは書き込まず、全て未更新の場合は
+    ランキング順位と更新日時だけを更新する
+    """
+    changed = [ep for ep in episodes or [] if not ep.get('unchanged')]
+    if episodes and not changed:
+        if update_novel_ranking(session, novel['id'], novel['ranking_position']):
+            return True
+    return save_novel_data(
+        session=session,
+        novel_id=novel['id'],
+        title=novel['title'],
+        author=novel['author'],
+        ranking_position=novel['ranking_position'],
+        novel_url=novel['novel_url'],
+        genre=novel.get('genre'),
+        episodes=changed or None
+    )
+
+def save_ranking_entries(
+    session: Session,
+    novel_id: str,
+    entries: List[Dict[str, Any]],
+    recorded_on: Optional[date] = None
+) -> bool:
+    """
+    小説のランキング掲載情報を保存 - 同じ日の既存の掲載情報は置き換える
+
+    Args:
+        session: DBセッション
+        novel_id: 小説ID
+        entries: {'ranking': "ジャンル/期間", 'position': 順位} のリスト
+        recorded_on: 記録日（省略時は今日）
+    """
+    if recorded_on is None:
+        recorded_on = date.today()
+    try:
+        session.query(RankingEntry).filter(
+            RankingEntry.novel_id == novel_id,
+            RankingEntry.recorded_on == recorded_on
+        ).delete(synchronize_session=False)
+        for entry in entries:
+            session.add(RankingEntry(
+                novel_id=novel_id,
+                ranking=entry['ranking'],
+                position=entry['position'],
+                recorded_on=recorded_on
+            ))
+        session.commit()
+        return True
+    except SQLAlchemyError as e:
+        logger.error(f"Database error occurred: {e}")
+        session.rollback()
+        return False
+
 def save_evaluation(
     session: Session,
     novel_id: str,
     episode_id: Optional[str],
     scores: Dict[str, float],
-    feedback: str
+    feedback: str,
+    sample_count: int = 1,
+    score_variance: Optional[float] = None,
+    copied_from: Optional[str] = None
 ) -> bool:
-    """評価データを保存 - 同じ小説の既存の評価は削除"""
+    """
+    評価データを保存 - 同じ小説の既存の評価は削除
+
+    複数回の評価を集計した場合は、scoresに平均、sample_countに回数、
+    score_varianceに総合評価スコアの標本分散を渡す。
+    近似重複の作品の評価を再利用した場合は、copied_fromにコピー元の小説IDを渡す
+    """
     try:
         # 同じ小説の既存の評価を削除
         existing_evaluations = session.query(Evaluation).filter(
@@ -95,7 +356,10 @@ def save_evaluation(
             story_score=scores.get('story'),
             writing_score=scores.get('writing'),
             character_score=scores.get('character'),
-            llm_feedback=feedback
+            llm_feedback=feedback,
+            sample_count=sample_count,
+            score_variance=score_variance,
+            copied_from=copied_from
         )
         session.add(evaluation)
         session.commit()
@@ -105,6 +369,44 @@ def save_evaluation(
         session.rollback()
         return False
 
+def save_evaluations(session: Session, evaluations: List[Dict[str, Any]]) -> int:
+    """
+    複数の評価データをまとめて保存 - 対象の小説の既存の評価は削除
+
+    Args:
+        evaluations: {'novel_id', 'episode_id', 'scores', 'feedback'} の辞書のリスト
+            （scoresは save_evaluation と同じ形式。'sample_count', 'score_variance', 'copied_from' は省略可）
+
+    Returns:
+        保存した評価数（エラー時は0）
+    """
+    if not evaluations:
+        return 0
+    try:
+        novel_ids = {item['novel_id'] for item in evaluations}
+        session.query(Evaluation).filter(Evaluation.novel_id.in_(novel_ids)).delete(synchronize_session=False)
+        session.add_all([
+            Evaluation(
+                novel_id=item['novel_id'],
+                episode_id=item.get('episode_id'),
+                overall_score=item['scores']['overall'],
+                story_score=item['scores'].get('story'),
+                writing_score=item['scores'].get('writing'),
+                character_score=item['scores'].get('character'),
+                llm_feedback=item['feedback'],
+                sample_count=item.get('sample_count', 1),
+                score_variance=item.get('score_variance'),
+                copied_from=item.get('copied_from')
+            )
+            for item in evaluations
+        ])
+        session.commit()
+        return len(evaluations)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error occurred: {e}")
+        session.rollback()
+        return 0
+
 def get_novels_for_evaluation(session: Session, limit: int = 100) -> List[Novel]:
     """評価対象の小説を取得"""
     try:
@@ -116,7 +418,8 @@ def get_novels_for_evaluation(session: Session, limit: int = 100) -> List[Novel]
 def get_novel_episodes(session: Session, novel_id: str, limit: int = 3) -> List[Episode]:
     """小説のエピソードを取得"""
     try:
-        return session.query(Episode).filter(Episode.novel_id == novel_id).limit(limit).all()
+        return session.query(Episode).filter(Episode.novel_id == novel_id).\
+            order_by(Episode.episode_number.asc().nullsfirst()).limit(limit).all()
     except SQLAlchemyError as e:
         logger.error(f"Error retrieving episodes: {e}")
         return []
@@ -145,6 +448,8 @@ def get_evaluation_results(session: Session, limit: int = 100) -> List[Dict[str,
                 "writing_score": eval.writing_score,
                 "character_score": eval.character_score,
                 "feedback": eval.llm_feedback,
+                "sample_count": eval.sample_count,
+                "score_variance": eval.score_variance,
                 "evaluation_date": eval.evaluation_date
             })
         
@@ -204,7 +509,7 @@ def export_evaluation_results_to_csv(session: Session, filepath: str) -> bool:
             fieldnames = [
                 "novel_id", "title", "author", "ranking", 
                 "overall_score", "story_score", "writing_score", "character_score", 
-                "feedback", "evaluation_date"
+                "feedback", "sample_count", "score_variance", "evaluation_date"
             ]
             writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
             
@@ -216,4 +521,172 @@ def export_evaluation_results_to_csv(session: Session, filepath: str) -> bool:
         return True
     except Exception as e:
         logger.error(f"Error exporting evaluation results to CSV: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def enqueue_evaluation_jobs(session: Session, limit: int = 100) -> int:
+    """
+    未評価の小説をランキング順位の高い順にlimit件まで評価ジョブとして登録（優先度はランキング順位）
+
+    既にジョブがある小説は登録しない（INSERT ... ON CONFLICT DO NOTHING）。
+    失敗（failed）になったジョブは試行回数を戻して再び待機中にする
+
+    Returns:
+        新たに登録または再登録したジョブ数（エラー時は0）
+    """
+    try:
+        evaluated = session.query(Evaluation.novel_id).distinct()
+        novels = session.query(Novel.id, Novel.ranking_position).\
+            filter(~Novel.id.in_(evaluated)).\
+            order_by(Novel.ranking_position).limit(limit).all()
+        if not novels:
+            return 0
+        inserted = session.execute(
+            pg_insert(EvaluationJob.__table__).values([
+                {'novel_id': novel_id, 'status': 'pending', 'priority': position, 'attempts': 0}
+                for novel_id, position in novels
+            ]).on_conflict_do_nothing(index_elements=['novel_id'])
+        ).rowcount
+        retried = session.query(EvaluationJob).filter(
+            EvaluationJob.novel_id.in_([novel_id for novel_id, _ in novels]),
+            EvaluationJob.status == 'failed'
+        ).update(
+            {'status': 'pending', 'attempts': 0, 'leased_until': None, 'worker': None},
+            synchronize_session=False
+        )
+        session.commit()
+        return inserted + retried
+    except SQLAlchemyError as e:
+        logger.error(f"Database error occurred: {e}")
+        session.rollback()
+        return 0
+
+def claim_evaluation_jobs(
+    session: Session,
+    worker: str,
+    batch_size: int,
+    lease_seconds: float,
+    max_attempts: int
+) -> List[Tuple[int, str]]:
+    """
+    待機中またはリース期限切れの評価ジョブを優先度順にまとめて取得し、リースする
+
+    SELECT ... FOR UPDATE SKIP LOCKED で他のワーカーが取得中の行を読み飛ばすため、
+    複数のプロセス・マシンから同時に呼んでも同じジョブを二重に取得しない。
+    リース期限が切れたジョブのうち試行回数がmax_attemptsに達したものは失敗にする
+
+    Returns:
+        (ジョブID, 小説ID) のリスト（エラー時は空リスト）
+    """
+    try:
+        now = datetime.utcnow()
+        jobs = session.query(EvaluationJob).filter(
+            or_(
+                EvaluationJob.status == 'pending',
+                and_(EvaluationJob.status == 'leased', EvaluationJob.leased_until < now)
+            )
+        ).order_by(EvaluationJob.priority, EvaluationJob.id).\
+            limit(batch_size).with_for_update(skip_locked=True).all()
+        
+        claimed = []
+        for job in jobs:
+            if job.attempts >= max_attempts:
+                job.status = 'failed'
+                job.leased_until = None
+                job.last_error = f"Lease expired after {job.attempts} attempts"
+                continue
+            job.status = 'leased'
+            job.leased_until = now + timedelta(seconds=lease_seconds)
+            job.attempts += 1
+            job.worker = worker
+            claimed.append((job.id, job.novel_id))
+        session.commit()
+        return claimed
+    except SQLAlchemyError as e:
+        logger.error(f"Database error occurred: {e}")
+        session.rollback()
+        return []
+
+def extend_evaluation_job_lease(session: Session, job_id: int, worker: str, lease_seconds: float) -> bool:
+    """
+    評価ジョブのリース期限を現在時刻からlease_seconds後に延ばす
+
+    まとめて取得したジョブを順に評価する間に、後のジョブのリースが切れないよう評価の直前に呼ぶ。
+    リース期限が切れて他のワーカーが取り直したジョブは更新しない
+
+    Returns:
+        更新できた場合はTrue（Falseの場合はこのワーカーで評価しない）
+    """
+    try:
+        updated = session.query(EvaluationJob).filter(
+            EvaluationJob.id == job_id,
+            EvaluationJob.status == 'leased',
+            EvaluationJob.worker == worker
+        ).update(
+            {'leased_until': datetime.utcnow() + timedelta(seconds=lease_seconds)},
+            synchronize_session=False
+        )
+        session.commit()
+        return updated > 0
+    except SQLAlchemyError as e:
+        logger.error(f"Database error occurred: {e}")
+        session.rollback()
+        return False
+
+def complete_evaluation_job(session: Session, job_id: int, worker: str) -> bool:
+    """
+    評価ジョブを完了にする
+
+    リース期限が切れて他のワーカーが取り直したジョブは更新しない
+
+    Returns:
+        更新できた場合はTrue
+    """
+    try:
+        updated = session.query(EvaluationJob).filter(
+            EvaluationJob.id == job_id,
+            EvaluationJob.status == 'leased',
+            EvaluationJob.worker == worker
+        ).update({'status': 'done', 'leased_until': None, 'last_error': None}, synchronize_session=False)
+        session.commit()
+        return updated > 0
+    except SQLAlchemyError as e:
+        logger.error(f"Database error occurred: {e}")
+        session.rollback()
+        return False
+
+def fail_evaluation_job(session: Session, job_id: int, worker: str, error: str, max_attempts: int) -> bool:
+    """
+    評価ジョブの失敗を記録
+
+    試行回数がmax_attemptsに達していれば失敗（failed）、そうでなければ待機中に戻して再試行させる
+
+    Returns:
+        更新できた場合はTrue
+    """
+    try:
+        job = session.query(EvaluationJob).filter(
+            EvaluationJob.id == job_id,
+            EvaluationJob.status == 'leased',
+            EvaluationJob.worker == worker
+        ).first()
+        if job is None:
+            return False
+        job.status = 'failed' if job.attempts >= max_attempts else 'pending'
+        job.leased_until = None
+        job.last_error = error
+        session.commit()
+        return True
+    except SQLAlchemyError as e:
+        logger.error(f"Database error occurred: {e}")
+        session.rollback()
+        return False
+
+def get_evaluation_job_counts(session: Session) -> Dict[str, int]:
+    """状態ごとの評価ジョブ数"""
+    try:
+        rows = session.query(EvaluationJob.status, func.count(EvaluationJob.id)).\
+            group_by(EvaluationJob.status).all()
+        return {status: count for status, count in rows}
+    except SQLAlchemyError as e:
+        logger.error(f"Error retrieving evaluation job counts: {e}")
+        return {}
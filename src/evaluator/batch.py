@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.db.repository import (
+    get_novels_for_evaluation, get_novel_episodes, has_existing_evaluation, save_evaluations
+)
+from .llm_client import LLMClient
+
+logger = logging.getLogger(__name__)
+
+# 結果をDBに書き込む単位
+INGEST_CHUNK_SIZE = 200
+
+
+def make_custom_id(novel_id: str, episode_id: str) -> str:
+    """バッチリクエストのcustom_id（"小説ID:先頭エピソードID"）"""
+    return f"{novel_id}:{episode_id}"
+
+
+def parse_custom_id(custom_id: str) -> Tuple[str, Optional[str]]:
+    """custom_idから (小説ID, エピソードID) を取り出す"""
+    novel_id, _, episode_id = custom_id.partition(':')
+    return novel_id, episode_id or None
+
+
+def write_batch_requests(
+    session: Session,
+    path: str,
+    limit: int = 100,
+    client: Optional[LLMClient] = None
+) -> int:
+    """
+    未評価の小説ごとに1件のチャット補完リクエストをJSONLに書き出す
+
+    出力はOpenAI互換のバッチAPIにそのまま投入できる形式で、custom_idは
+    小説IDと評価対象の先頭エピソードIDから作るため、同じ入力からは同じIDになる
+
+    Returns:
+        書き出したリクエスト数
+    """
+    client = client or LLMClient()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for novel in get_novels_for_evaluation(session, limit=limit):
+            if has_existing_evaluation(session, novel.id):
+                continue
+            episodes = get_novel_episodes(session, novel.id, limit=3)
+            if not episodes:
+                logger.warning(f"No episodes found for novel {novel.id}, skipping")
+                continue
+            request = client.build_batch_request(
+                make_custom_id(novel.id, episodes[0].id),
+                novel.title,
+                novel.author,
+                [{'id': ep.id, 'title': ep.title, 'content': ep.content} for ep in episodes]
+            )
+            f.write(json.dumps(request, ensure_ascii=False) + '\n')
+            count += 1
+
+    logger.info(f"Wrote {count} batch requests to {path}")
+    return count
+
+
+def ingest_batch_results(session: Session, path: str, client: Optional[LLMClient] = None) -> Dict[str, int]:
+    """
+    バッチAPIの結果JSONLを読み込み、評価結果をまとめてDBに保存
+
+    同じcustom_idが複数ある場合は後の行を使用し、失敗したリクエストは保存しない
+
+    Returns:
+        {'results', 'saved', 'failed'} の件数
+    """
+    client = client or LLMClient()
+    counts = {'results': 0, 'saved': 0, 'failed': 0}
+    pending: Dict[str, Dict] = {}
+
+    def flush():
+        counts['saved'] += save_evaluations(session, list(pending.values()))
+        pending.clear()
+
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            counts['results'] += 1
+            try:
+                record = json.loads(line)
+                novel_id, episode_id = parse_custom_id(record['custom_id'])
+            except (ValueError, KeyError) as e:
+                logger.error(f"Invalid batch result at line {line_number}: {e}")
+                counts['failed'] += 1
+                continue
+
+            evaluation = client.parse_batch_result(record)
+            if evaluation is None:
+                counts['failed'] += 1
+                continue
+
+            pending[novel_id] = {
+                'novel_id': novel_id,
+                'episode_id': episode_id,
+                'scores': {
+                    'overall': evaluation['overall_score'],
+                    'story': evaluation['story_score'],
+                    'writing': evaluation['writing_score'],
+                    'character': evaluation['character_score']
+                },
+                'feedback': evaluation['feedback']
+            }
+            if len(pending) >= INGEST_CHUNK_SIZE:
+                flush()
+    flush()
+
+    logger.info(
+        f"Ingested batch results from {path}: {counts['results']} results, "
+        f"{counts['saved']} saved, {counts['failed']} failed"
+    )
+    return counts
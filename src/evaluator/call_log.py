@@ -0,0 +1,201 @@
+"""
+LLM API呼び出しごとの計測記録と実行後の集計
+
+呼び出しごとに所要時間・最初のバイトまでの時間・トークン数・HTTPステータス・リトライ回数を
+記録し、settings.llm_call_log_path が設定されていればJSONLに追記する。
+実行の最後に summary() で応答時間と入力トークン数のヒストグラム、モデルごとの推定料金を出力する
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# モデル名の接頭辞ごとの100万トークンあたりの料金（USD: 入力, キャッシュ一致の入力, 出力）
+# 推定料金の計算用で、実際の請求額は各社の料金表を確認すること（長い接頭辞から順に照合）
+MODEL_PRICES: List[Tuple[str, float, float, float]] = [
+    ('deepseek-reasoner', 0.55, 0.14, 2.19),
+    ('deepseek-chat', 0.27, 0.07, 1.10),
+    ('gpt-4o-mini', 0.15, 0.075, 0.60),
+    ('gpt-4o', 2.50, 1.25, 10.00),
+]
+
+# ヒストグラムの区切り（秒・トークン）
+LATENCY_BUCKETS = [0.5, 1, 2, 5, 10, 20, 30, 60]
+PROMPT_TOKEN_BUCKETS = [500, 1000, 2000, 4000, 6000, 8000, 12000, 16000]
+_BAR_WIDTH = 40
+
+
+def estimate_cost(model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> Optional[float]:
+    """トークン数からの推定料金（USD、料金表にないモデルはNone）"""
+    for prefix, input_price, cached_price, output_price in MODEL_PRICES:
+        if model.startswith(prefix):
+            return (
+                (prompt_tokens - cached_tokens) * input_price
+                + cached_tokens * cached_price
+                + completion_tokens * output_price
+            ) / 1_000_000
+    return None
+
+
+def _percentile(values: Sequence[float], p: float) -> float:
+    """昇順に並べた値のパーセンタイル（最近傍順位法、空なら0）"""
+    if not values:
+        return 0.0
+    return values[max(1, math.ceil(p / 100 * len(values))) - 1]
+
+
+def format_histogram(values: Sequence[float], buckets: Sequence[float], unit: str = '') -> List[str]:
+    """区切りごとの件数を横棒で表した行のリスト"""
+    counts = [0] * (len(buckets) + 1)
+    for value in values:
+        index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+        counts[index] += 1
+    peak = max(counts) or 1
+    lines = []
+    for i, count in enumerate(counts):
+        label = f"<= {buckets[i]:g}{unit}" if i < len(buckets) else f"> {buckets[-1]:g}{unit}"
+        lines.append(f"  {label:>10} {count:>6} {'#' * math.ceil(count / peak * _BAR_WIDTH) if count else ''}")
+    return lines
+
+
+class LLMCallLog:
+    """LLM API呼び出しの計測記録（スレッドセーフ）"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: 記録を追記するJSONLのパス（省略時はsettings.llm_call_log_path、空ならファイルに書かない）
+        """
+        self.path = path if path is not None else settings.llm_call_log_path
+        self.calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._file = None
+        if self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+    def record(
+        self,
+        model: str,
+        status: str,
+        wall_time: float,
+        ttfb: Optional[float],
+        retries: int,
+        estimated_tokens: int,
+        usage: Optional[Dict[str, Any]] = None,
+        cached_tokens: int = 0,
+        stream: bool = False
+    ) -> Dict[str, Any]:
+        """
+        1回の呼び出し（リトライを含む）を記録
+
+        Args:
+            status: 最後の試行のHTTPステータス（通信エラーの場合は例外のクラス名）
+            wall_time: 最初の送信から応答を受け取り終えるまでの秒数（レート制限の待ち時間を含む）
+            ttfb: 最後の試行で応答ヘッダーを受け取るまでの秒数
+            estimated_tokens: 送信前に見積もった入力トークン数
+            usage: 応答の usage（ストリーミングで受信した場合などはNone）
+        """
+        usage = usage or {}
+        prompt_tokens = usage.get('prompt_tokens')
+        completion_tokens = usage.get('completion_tokens')
+        cost = None
+        if prompt_tokens is not None:
+            cost = estimate_cost(model, prompt_tokens, cached_tokens, completion_tokens or 0)
+        call = {
+            'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+            'model': model,
+            'status': status,
+            'wall_time': round(wall_time, 3),
+            'ttfb': round(ttfb, 3) if ttfb is not None else None,
+            'retries': retries,
+            'estimated_tokens': estimated_tokens,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'cached_tokens': cached_tokens,
+            'stream': stream,
+            'cost': cost,
+        }
+        with self._lock:
+            self.calls.append(call)
+            if self._file:
+                try:
+                    self._file.write(json.dumps(call, ensure_ascii=False) + '\n')
+                    self._file.flush()
+                except OSError as e:
+                    logger.warning(f"Failed to write LLM call log: {e}")
+        return call
+
+    def summary(self) -> str:
+        """ログ出力用の集計（応答時間・入力トークン数のヒストグラムとモデルごとの推定料金）"""
+        with self._lock:
+            calls = list(self.calls)
+        if not calls:
+            return "LLM calls: none"
+
+        wall_times = sorted(call['wall_time'] for call in calls)
+        ttfbs = sorted(call['ttfb'] for call in calls if call['ttfb'] is not None)
+        prompt_tokens = [
+            call['prompt_tokens'] if call['prompt_tokens'] is not None else call['estimated_tokens'] for call in calls
+        ]
+        statuses: Dict[str, int] = {}
+        for call in calls:
+            statuses[call['status']] = statuses.get(call['status'], 0) + 1
+
+        lines = [
+            f"LLM calls: {len(calls)} calls, {sum(call['retries'] for call in calls)} retries, "
+            f"status {', '.join(f'{status}={count}' for status, count in sorted(statuses.items()))}",
+            f"  wall time p50 {_percentile(wall_times, 50):.2f}s p95 {_percentile(wall_times, 95):.2f}s "
+            f"p99 {_percentile(wall_times, 99):.2f}s max {wall_times[-1]:.2f}s, "
+            f"ttfb p50 {_percentile(ttfbs, 50):.2f}s p95 {_percentile(ttfbs, 95):.2f}s",
+            "  wall time histogram:",
+            *format_histogram(wall_times, LATENCY_BUCKETS, 's'),
+            "  input tokens histogram:",
+            *format_histogram(prompt_tokens, PROMPT_TOKEN_BUCKETS),
+        ]
+
+        models: Dict[str, Dict[str, Any]] = {}
+        for call in calls:
+            totals = models.setdefault(call['model'], {'calls': 0, 'prompt': 0, 'cached': 0, 'completion': 0, 'cost': 0.0})
+            totals['calls'] += 1
+            totals['prompt'] += call['prompt_tokens'] or 0
+            totals['cached'] += call['cached_tokens'] or 0
+            totals['completion'] += call['completion_tokens'] or 0
+            totals['cost'] += call['cost'] or 0.0
+        for model, totals in sorted(models.items()):
+            priced = estimate_cost(model, 0, 0, 0) is not None
+            cost = f"~${totals['cost']:.4f} estimated" if priced else "no price for this model"
+            lines.append(
+                f"  {model}: {totals['calls']} calls, {totals['prompt']} input tokens "
+                f"({totals['cached']} cached), {totals['completion']} output tokens, {cost}"
+            )
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+_shared_call_log: Optional[LLMCallLog] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_call_log() -> LLMCallLog:
+    """プロセス内の全LLMClientで共有する呼び出しの記録"""
+    global _shared_call_log
+    with _shared_lock:
+        if _shared_call_log is None:
+            _shared_call_log = LLMCallLog()
+        return _shared_call_log
@@ -1,11 +1,20 @@
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue, Empty
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from datetime import datetime
 
+from src.config import settings
+from src.db.database import SessionLocal
 from src.db.models import Novel, Episode
-from src.db.repository import save_evaluation, get_novel_episodes, has_existing_evaluation
+from src.db.repository import (
+    save_evaluation, get_novel_episodes, has_existing_evaluation, find_near_duplicate_evaluation
+)
 from .llm_client import LLMClient
+from .prompt_builder import EpisodeSection, build_episode_section
+from .sampling import aggregate_samples, select_uncertain
 
 logger = logging.getLogger(__name__)
 
@@ -46,35 +55,24 @@ class NovelEvaluator:
                 logger.error(f"No episodes found for novel {novel_id}")
                 return None
             
-            # エピソードデータの整形
-            episode_data = []
-            for ep in episodes:
-                episode_data.append({
-                    'id': ep.id,
-                    'title': ep.title,
-                    'content': ep.content
-                })
+            # 近似重複の作品が評価済みならその評価を再利用
+            reused = self._reuse_near_duplicate(novel, episodes)
+            if reused is not None:
+                return reused
             
             # LLMによる評価
             evaluation = self.llm_client.evaluate_novel(
                 title=novel.title,
                 author=novel.author,
-                episodes=episode_data
+                episodes=self._episode_data(episodes)
             )
+            if evaluation is None:
+                # スコア0で保存すると has_existing_evaluation で再評価されなくなるため保存しない
+                logger.warning(f"Evaluation failed for novel {novel.title}, leaving it for the next run")
+                return None
             
             # 評価結果の保存 - 最初のエピソードに対してのみ保存
-            save_evaluation(
-                session=self.session,
-                novel_id=novel_id,
-                episode_id=episodes[0].id if episodes else None,
-                scores={
-                    'overall': evaluation['overall_score'],
-                    'story': evaluation['story_score'],
-                    'writing': evaluation['writing_score'],
-                    'character': evaluation['character_score']
-                },
-                feedback=evaluation['feedback']
-            )
+            self._save_result(novel_id, episodes, evaluation)
             
             logger.info(f"Novel {novel.title} evaluated with score {evaluation['overall_score']}")
             return evaluation
@@ -83,16 +81,249 @@ class NovelEvaluator:
             logger.error(f"Error evaluating novel {novel_id}: {e}")
             return None
     
-    def evaluate_novels_batch(self, novel_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    def _reuse_near_duplicate(self, novel: Novel, episodes: List[Episode]) -> Optional[Dict[str, Any]]:
+        """
+        評価対象のエピソードの近似重複を持つ評価済みの作品があれば、その評価をコピーして保存
+
+        settings.dedup_jaccard_threshold 以上の類似度で全エピソードが一致する場合だけ再利用し、
+        LLMを呼ばずに済んだ回数は使用量の集計（UsageStats）に加算する
+
+        Returns:
+            コピーした評価結果（再利用しなかった場合はNone）
+        """
+        if not settings.dedup_enabled:
+            return None
+        source = find_near_duplicate_evaluation(
+            self.session, novel.id, episodes, settings.dedup_jaccard_threshold
+        )
+        if source is None:
+            return None
+        evaluation = {
+            'overall_score': source.overall_score,
+            'story_score': source.story_score,
+            'writing_score': source.writing_score,
+            'character_score': source.character_score,
+            'feedback': source.llm_feedback,
+            'sample_count': source.sample_count or 1,
+            'score_variance': source.score_variance,
+            # コピーのコピーの場合も元の小説を記録する
+            'copied_from': source.copied_from or source.novel_id,
+        }
+        if not self._save_result(novel.id, episodes, evaluation):
+            return None
+        self.llm_client.usage_stats.add_reused()
+        logger.info(
+            f"Novel {novel.title} reused the evaluation of near-duplicate novel {evaluation['copied_from']} "
+            f"with score {evaluation['overall_score']}"
+        )
+        return evaluation
+    
+    def _episode_data(self, episodes: List[Episode]) -> List[Dict[str, Any]]:
+        """エピソードデータの整形"""
+        return [{'id': ep.id, 'title': ep.title, 'content': ep.content} for ep in episodes]
+    
+    def _save_result(self, novel_id: str, episodes: List[Episode], evaluation: Dict[str, Any]) -> bool:
+        """評価結果を最初のエピソードに対して保存（複数回の評価を集計した場合は回数と分散も保存）"""
+        return save_evaluation(
+            session=self.session,
+            novel_id=novel_id,
+            episode_id=episodes[0].id if episodes else None,
+            scores={
+                'overall': evaluation['overall_score'],
+                'story': evaluation['story_score'],
+                'writing': evaluation['writing_score'],
+                'character': evaluation['character_score']
+            },
+            feedback=evaluation['feedback'],
+            sample_count=evaluation.get('sample_count', 1),
+            score_variance=evaluation.get('score_variance'),
+            copied_from=evaluation.get('copied_from')
+        )
+    
+    def evaluate_novels_packed(
+        self,
+        novel_ids: List[str],
+        max_workers: int = 1,
+        session_factory: Callable[[], Session] = SessionLocal
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        短い作品をまとめたリクエストで評価し、それ以外は1作品ずつ評価する
+
+        エピソード部分が settings.llm_pack_max_episode_tokens 以下の作品を、
+        1リクエストあたり settings.llm_pack_token_budget トークン・
+        settings.llm_pack_max_novels 作品まで詰めて評価する（First Fit Decreasing）。
+        応答に含まれなかった作品は1作品ずつのリクエストで評価し直す。
+        まとめたリクエストはmax_workers本まで並行して送信し（結果の保存はこのスレッドで行う）、
+        1作品ずつの評価は max_workers が2以上なら evaluate_novels_concurrently で並列に行う
+        
+        Args:
+            novel_ids: 評価対象の小説IDリスト
+            max_workers: 並行して送信するリクエスト数
+            session_factory: 並列評価のワーカーごとのDBセッションを作る関数
+            
+        Returns:
+            小説IDをキー、評価結果を値とする辞書
+        """
+        results = {}
+        singles = []
+        short = []
+        for novel_id in novel_ids:
+            novel = self.session.query(Novel).get(novel_id)
+            if not novel or has_existing_evaluation(self.session, novel_id):
+                continue
+            episodes = get_novel_episodes(self.session, novel_id, limit=3)
+            if not episodes:
+                logger.error(f"No episodes found for novel {novel_id}")
+                continue
+            reused = self._reuse_near_duplicate(novel, episodes)
+            if reused is not None:
+                results[novel_id] = reused
+                continue
+            section = build_episode_section(self._episode_data(episodes), model=self.llm_client.model)
+            if not section.truncated and section.tokens <= settings.llm_pack_max_episode_tokens:
+                short.append((novel, episodes, section))
+            else:
+                singles.append(novel_id)
+        
+        groups = []
+        for group in _pack_by_tokens(short, settings.llm_pack_token_budget, settings.llm_pack_max_novels):
+            if len(group) == 1:
+                singles.append(group[0][0].id)
+            else:
+                groups.append(group)
+        
+        packed_requests = len(groups)
+        # ORMのオブジェクトはワーカースレッドから参照しないよう、リクエストの内容を先に作る
+        requests = [[(novel.id, novel.title, section.text) for novel, _, section in group] for group in groups]
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(groups) or 1))) as executor:
+            responses = list(executor.map(self.llm_client.evaluate_packed, requests))
+        for group, evaluations in zip(groups, responses):
+            for novel, episodes, _ in group:
+                evaluation = evaluations.get(novel.id)
+                if evaluation is None:
+                    singles.append(novel.id)
+                    continue
+                self._save_result(novel.id, episodes, evaluation)
+                logger.info(f"Novel {novel.title} evaluated with score {evaluation['overall_score']} (packed)")
+                results[novel.id] = evaluation
+        
+        packed_novels = sum(1 for result in results.values() if not result.get('copied_from'))
+        if max_workers > 1:
+            results.update(evaluate_novels_concurrently(singles, max_workers=max_workers, session_factory=session_factory))
+        else:
+            for novel_id in singles:
+                result = self.evaluate_novel(novel_id)
+                if result:
+                    results[novel_id] = result
+        
+        logger.info(
+            f"Packed evaluation: {packed_novels} novels in {packed_requests} packed requests, "
+            f"{len(singles)} single requests"
+        )
+        return results
+    
+    def evaluate_novels_adaptive(
+        self,
+        novel_ids: List[str],
+        top_n: Optional[int] = None,
+        max_workers: int = 1
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        全作品を1回ずつ評価した後、評価が不確かな作品だけを追加で評価する
+
+        上位top_n件の境界に信頼区間がかかっている作品と、回ごとにサブスコアが食い違う作品を
+        1回ずつ再評価し、総合評価スコアの95%信頼区間の半幅が settings.eval_ci_target 以下に
+        なるか、settings.eval_max_samples 回に達するまで繰り返す（判定は sampling.select_uncertain）。
+        各スコアの平均を評価結果とし、評価回数と総合評価スコアの分散も保存する。
+        各回のリクエストはmax_workers本まで並行して送信する（DBへの保存はこのスレッドで行う）
+        
+        Args:
+            novel_ids: 評価対象の小説IDリスト
+            top_n: 境界とする上位件数（省略時はsettings.eval_top_n）
+            max_workers: 並行して送信するリクエスト数
+            
+        Returns:
+            小説IDをキー、集計した評価結果を値とする辞書
+        """
+        if top_n is None:
+            top_n = settings.eval_top_n
+        
+        results = {}
+        targets = {}
+        for novel_id in novel_ids:
+            novel = self.session.query(Novel).get(novel_id)
+            if not novel or has_existing_evaluation(self.session, novel_id):
+                continue
+            episodes = get_novel_episodes(self.session, novel_id, limit=3)
+            if not episodes:
+                logger.error(f"No episodes found for novel {novel_id}")
+                continue
+            reused = self._reuse_near_duplicate(novel, episodes)
+            if reused is not None:
+                results[novel_id] = reused
+                continue
+            targets[novel_id] = (novel, episodes)
+        
+        samples: Dict[str, List[Dict[str, Any]]] = {}
+        attempts = {novel_id: 0 for novel_id in targets}
+        pending = list(targets)
+        # ORMのオブジェクトはワーカースレッドから参照しないよう、リクエストの内容を先に作る
+        requests = {
+            novel_id: {'title': novel.title, 'author': novel.author, 'episodes': self._episode_data(episodes)}
+            for novel_id, (novel, episodes) in targets.items()
+        }
+        
+        def request_sample(novel_id: str) -> Optional[Dict[str, Any]]:
+            return self.llm_client.evaluate_novel(**requests[novel_id], sample=attempts[novel_id])
+        
+        while pending:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as executor:
+                evaluations = list(executor.map(request_sample, pending))
+            for novel_id, evaluation in zip(pending, evaluations):
+                attempts[novel_id] += 1
+                if evaluation is not None:
+                    samples.setdefault(novel_id, []).append(evaluation)
+            
+            aggregates = {novel_id: aggregate_samples(evaluations) for novel_id, evaluations in samples.items()}
+            pending = [
+                novel_id for novel_id in select_uncertain(aggregates, top_n)
+                if attempts[novel_id] < settings.eval_max_samples
+            ]
+            if pending:
+                logger.info(f"Requesting another sample for {len(pending)} uncertain novels")
+        
+        for novel_id, evaluations in samples.items():
+            novel, episodes = targets[novel_id]
+            aggregate = aggregate_samples(evaluations)
+            self._save_result(novel_id, episodes, aggregate)
+            logger.info(
+                f"Novel {novel.title} evaluated with score {aggregate['overall_score']:.2f} "
+                f"(±{aggregate['ci_halfwidth']:.2f}, {aggregate['sample_count']} samples)"
+            )
+            results[novel_id] = aggregate
+        
+        if targets:
+            requests = sum(attempts.values())
+            logger.info(
+                f"Adaptive sampling: {len(samples)}/{len(targets)} novels evaluated with {requests} requests "
+                f"({requests / len(targets):.2f} per novel, max {settings.eval_max_samples})"
+            )
+        return results
+    
+    def evaluate_novels_batch(self, novel_ids: List[str], max_workers: int = 1) -> Dict[str, Dict[str, Any]]:
         """
         複数の小説をバッチで評価する
         
         Args:
             novel_ids: 評価対象の小説IDリスト
+            max_workers: 2以上の場合は evaluate_novels_concurrently で並列に評価する
             
         Returns:
             小説IDをキー、評価結果を値とする辞書
         """
+        if max_workers > 1:
+            return evaluate_novels_concurrently(novel_ids, max_workers=max_workers)
+        
         results = {}
         
         for novel_id in novel_ids:
@@ -100,4 +331,78 @@ class NovelEvaluator:
             if result:
                 results[novel_id] = result
         
-        return results
\ No newline at end of file
+        return results
+
+
+def _pack_by_tokens(items: List[Tuple[Any, Any, EpisodeSection]], budget: int, max_items: int) -> List[List]:
+    """エピソード部分のトークン数で作品をリクエストに詰める（First Fit Decreasing）"""
+    bins: List[List] = []
+    used: List[int] = []
+    for item in sorted(items, key=lambda item: item[2].tokens, reverse=True):
+        tokens = item[2].tokens
+        for i, group in enumerate(bins):
+            if len(group) < max_items and used[i] + tokens <= budget:
+                group.append(item)
+                used[i] += tokens
+                break
+        else:
+            bins.append([item])
+            used.append(tokens)
+    return bins
+
+
+def evaluate_novels_concurrently(
+    novel_ids: Iterable[str],
+    max_workers: Optional[int] = None,
+    session_factory: Callable[[], Session] = SessionLocal
+) -> Dict[str, Dict[str, Any]]:
+    """
+    複数の小説をワーカースレッドで並列に評価する
+
+    各ワーカーは専用のDBセッションとNovelEvaluatorを持ち、評価結果は
+    evaluate_novel から save_evaluation で保存される。LLMへの送信数・RPM・TPMは
+    全ワーカーで共有するレート制限（LLMRateLimiter）で抑えるため、
+    ワーカー数を増やしてもプロバイダの上限を超えない
+
+    Args:
+        novel_ids: 評価対象の小説IDリスト
+        max_workers: ワーカー数（省略時はsettings.llm_max_in_flight）
+        session_factory: ワーカーごとのDBセッションを作る関数（ベンチマークで別のDBを使う場合に指定）
+
+    Returns:
+        小説IDをキー、評価結果を値とする辞書
+    """
+    if max_workers is None:
+        max_workers = settings.llm_max_in_flight
+
+    pending: Queue = Queue()
+    for novel_id in novel_ids:
+        pending.put(novel_id)
+    if pending.empty():
+        return {}
+
+    results: Dict[str, Dict[str, Any]] = {}
+    results_lock = threading.Lock()
+
+    def worker():
+        session = session_factory()
+        evaluator = NovelEvaluator(session)
+        try:
+            while True:
+                try:
+                    novel_id = pending.get_nowait()
+                except Empty:
+                    return
+                result = evaluator.evaluate_novel(novel_id)
+                if result:
+                    with results_lock:
+                        results[novel_id] = result
+        finally:
+            session.close()
+
+    workers = max(1, min(max_workers, pending.qsize()))
+    logger.info(f"Evaluating {pending.qsize()} novels with {workers} workers")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(worker) for _ in range(workers)]:
+            future.result()
+    return results
\ No newline at end of file
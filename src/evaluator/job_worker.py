@@ -0,0 +1,99 @@
+import logging
+import os
+import socket
+import threading
+from typing import Dict, Optional
+
+from src.config import settings
+from src.db.database import SessionLocal
+from src.db.repository import (
+    claim_evaluation_jobs, complete_evaluation_job, extend_evaluation_job_lease, fail_evaluation_job,
+    has_existing_evaluation
+)
+from .evaluator import NovelEvaluator
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    """ワーカーの識別子（"ホスト名:プロセスID"）"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_job_worker(
+    worker_id: Optional[str] = None,
+    threads: int = 1,
+    batch_size: Optional[int] = None,
+    lease_seconds: Optional[float] = None,
+    max_attempts: Optional[int] = None
+) -> Dict[str, int]:
+    """
+    evaluation_jobs テーブルから評価ジョブを取得して評価する
+
+    各スレッドは専用のDBセッションを持ち、claim_evaluation_jobs（FOR UPDATE SKIP LOCKED）で
+    ジョブをまとめてリースしてから NovelEvaluator.evaluate_novel で1件ずつ評価する。
+    各ジョブの評価の直前にリース期限を延ばし、延ばせなかった（期限切れの間に他のワーカーが
+    取り直した）ジョブは評価しないため、同じ作品のAPI呼び出しを二重に行わない。
+    途中で停止したワーカーのジョブはリース期限が切れた後に他のワーカーが取り直す。
+    取得できるジョブがなくなった時点で終了する
+
+    Args:
+        worker_id: ワーカーの識別子（省略時は"ホスト名:プロセスID"、スレッドごとに番号を付ける）
+        threads: 評価スレッド数
+        batch_size: 1回に取得するジョブ数（省略時はsettings.eval_job_batch_size）
+        lease_seconds: リース期間（省略時はsettings.eval_job_lease_seconds）
+        max_attempts: 最大試行回数（省略時はsettings.eval_job_max_attempts）
+
+    Returns:
+        {'claimed', 'done', 'failed', 'lost'} の件数（lost は他のワーカーに取り直されたジョブ）
+    """
+    worker_id = worker_id or default_worker_id()
+    batch_size = batch_size or settings.eval_job_batch_size
+    lease_seconds = lease_seconds or settings.eval_job_lease_seconds
+    max_attempts = max_attempts or settings.eval_job_max_attempts
+
+    counts = {'claimed': 0, 'done': 0, 'failed': 0, 'lost': 0}
+    counts_lock = threading.Lock()
+
+    def increment(name: str, value: int = 1) -> None:
+        with counts_lock:
+            counts[name] += value
+
+    def worker(name: str) -> None:
+        session = SessionLocal()
+        evaluator = NovelEvaluator(session)
+        try:
+            while True:
+                jobs = claim_evaluation_jobs(session, name, batch_size, lease_seconds, max_attempts)
+                if not jobs:
+                    return
+                increment('claimed', len(jobs))
+                for job_id, novel_id in jobs:
+                    if not extend_evaluation_job_lease(session, job_id, name, lease_seconds):
+                        logger.warning(f"Lease on evaluation job {job_id} was lost, skipping novel {novel_id}")
+                        increment('lost')
+                        continue
+                    result = evaluator.evaluate_novel(novel_id)
+                    # 他の経路で評価済みだった場合も完了として扱う
+                    if result or has_existing_evaluation(session, novel_id):
+                        complete_evaluation_job(session, job_id, name)
+                        increment('done')
+                    else:
+                        fail_evaluation_job(session, job_id, name, "Evaluation failed", max_attempts)
+                        increment('failed')
+        finally:
+            session.close()
+
+    names = [worker_id if threads <= 1 else f"{worker_id}:{i}" for i in range(max(1, threads))]
+    logger.info(f"Starting evaluation job worker {worker_id} with {len(names)} threads")
+    workers = [threading.Thread(target=worker, args=(name,), name=f"job-{i}") for i, name in enumerate(names)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    logger.info(
+        f"Evaluation job worker {worker_id}: {counts['claimed']} claimed, "
+        f"{counts['done']} done, {counts['failed']} failed, {counts['lost']} lost to other workers"
+    )
+    return counts
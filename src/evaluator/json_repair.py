@@ -0,0 +1,110 @@
+"""
+LLMの応答に含まれるJSONのローカル修復
+
+JSONモードを使えない場合やモデルが指示に従わなかった場合に、よくある崩れ
+（前後の説明文、コードブロック、末尾のカンマ、全角の数字・記号）を直してから解析する。
+文字列リテラルの中身（feedbackの日本語など）は変更しない
+"""
+
+import json
+import re
+from typing import Any, Optional
+
+# 文字列リテラルの外側で半角に直す全角文字
+_FULLWIDTH = str.maketrans('０１２３４５６７８９．－＋：，｛｝［］＂', '0123456789.-+:,{}[]"')
+# 文字列リテラルの区切りとして扱う引用符（開き → 閉じ）
+_QUOTES = {'"': '"', '＂': '＂', '“': '”'}
+
+_FENCED_RE = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.DOTALL)
+_NUMBER_RE = re.compile(r'-?\d+(?:\.\d+)?')
+
+
+def extract_json_candidate(text: str) -> Optional[str]:
+    """
+    応答からJSON部分を取り出す
+
+    コードブロックがあればその中身を、なければ最初の開き括弧から最後の閉じ括弧までを返す
+    """
+    match = _FENCED_RE.search(text)
+    if match and match.group(1).lstrip()[:1] in ('{', '[', '｛', '［'):
+        text = match.group(1)
+    starts = [i for i in (text.find(char) for char in '{[｛［') if i >= 0]
+    ends = [text.rfind(char) for char in '}]｝］']
+    if not starts or max(ends) < min(starts):
+        return None
+    return text[min(starts):max(ends) + 1]
+
+
+def repair_json_text(text: str) -> str:
+    """
+    文字列リテラルの外側にある全角の数字・記号を半角に直し、閉じ括弧の直前のカンマを取り除く
+    """
+    out = []
+    closing = None
+    escape = False
+    length = len(text)
+    for i, char in enumerate(text):
+        if closing is not None:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == closing:
+                closing = None
+                char = '"'
+            elif char == '"':
+                # 全角の引用符で始まった文字列内の半角引用符はエスケープする
+                char = '\\"'
+            out.append(char)
+            continue
+        if char in _QUOTES:
+            closing = _QUOTES[char]
+            out.append('"')
+            continue
+        char = char.translate(_FULLWIDTH)
+        if char == ',':
+            j = i + 1
+            while j < length and text[j].isspace():
+                j += 1
+            if j < length and text[j].translate(_FULLWIDTH) in '}]':
+                continue
+        out.append(char)
+    return ''.join(out)
+
+
+def loads_lenient(text: str) -> Any:
+    """
+    応答からJSONを取り出して解析し、失敗した場合は修復してから解析し直す
+
+    Returns:
+        解析結果（修復しても解析できない場合はNone）
+    """
+    candidate = extract_json_candidate(text)
+    if candidate is None:
+        return None
+    try:
+        return json.loads(candidate, strict=False)
+    except ValueError:
+        pass
+    try:
+        return json.loads(repair_json_text(candidate), strict=False)
+    except ValueError:
+        return None
+
+
+def coerce_score(value: Any) -> float:
+    """
+    スコアを数値に変換（"7.5点" や全角数字の文字列も受け付ける）
+
+    Raises:
+        ValueError: 数値を読み取れない場合
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Not a score: {value!r}")
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = _NUMBER_RE.search(value.translate(_FULLWIDTH))
+        if match:
+            return float(match.group())
+    raise ValueError(f"Not a score: {value!r}")
@@ -0,0 +1,74 @@
+import json
+from typing import Any, Callable, Optional
+
+
+class JsonObjectScanner:
+    """
+    ストリーミングで届くテキストから最初の完全なJSONオブジェクトを検出する
+
+    feed() で受け取った断片を1文字ずつ走査し、文字列リテラル内の括弧や
+    エスケープを考慮して波括弧の対応を追跡する。対応が閉じた時点でJSONとして解析し、
+    解析に失敗した場合（前置きの文章に含まれる括弧など）はその次の位置から探し直す
+    """
+
+    def __init__(self, accept: Optional[Callable[[Any], bool]] = None):
+        """
+        Args:
+            accept: 解析できたオブジェクトを結果として採用するかどうかの判定（省略時はdictなら採用）
+        """
+        self.accept = accept or (lambda value: isinstance(value, dict))
+        self.buffer = ''
+        self.result: Optional[str] = None
+        self.value: Any = None
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> Optional[str]:
+        """テキストの断片を追加し、JSONオブジェクトが完成していればその文字列を返す"""
+        if self.result is not None:
+            return self.result
+        self.buffer += text
+        buffer = self.buffer
+        while self._pos < len(buffer):
+            char = buffer[self._pos]
+            self._pos += 1
+            if self._start < 0:
+                if char == '{':
+                    self._start = self._pos - 1
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = buffer[self._start:self._pos]
+                    if self._try_accept(candidate):
+                        return self.result
+                    # 解析できなければ開き括弧の次から探し直す
+                    self._pos = self._start + 1
+                    self._start = -1
+        return None
+
+    def _try_accept(self, candidate: str) -> bool:
+        try:
+            value = json.loads(candidate)
+        except ValueError:
+            return False
+        if not self.accept(value):
+            return False
+        self.result = candidate
+        self.value = value
+        return True
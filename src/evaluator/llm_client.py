@@ -1,193 +1,543 @@
 import requests
 import json
 import logging
-import re
-from typing import Dict, Any, Optional, List
+import random
+import time
+from typing import Dict, Any, Optional, List, Tuple
 from src.config import settings
+from src.evaluator.rate_limiter import LLMRateLimiter, get_shared_rate_limiter
+from src.evaluator.prompt_builder import build_episode_section, estimate_tokens
+from src.evaluator.response_cache import LLMResponseCache, cache_key, get_shared_response_cache
+from src.evaluator.json_stream import JsonObjectScanner
+from src.evaluator.json_repair import coerce_score, loads_lenient
+from src.evaluator.usage import UsageStats, cached_prompt_tokens, get_shared_usage_stats
+from src.evaluator.call_log import LLMCallLog, get_shared_call_log
+from src.scraper.fetcher import RETRY_STATUSES, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
+# 評価結果のJSONに必要なフィールド
+EVALUATION_FIELDS = ["overall_score", "story_score", "writing_score", "character_score", "feedback"]
+
+# 評価の観点（単独評価とまとめて評価で共通）
+_RUBRIC = """示されたエピソードを読んで、小説の質を10点満点で評価してください。
+評価は絶対的な基準で行い、相対評価ではなく絶対評価としてください。
+
+以下の観点から評価し、各項目のスコアを付けてください：
+
+1. ストーリー性 (2.5点満点): 物語の展開、構成、オリジナリティ
+2. 文章力 (2.5点満点): 表現力、読みやすさ、言葉の選択
+3. キャラクター (2.5点満点): 登場人物の魅力、深み、成長
+4. 総合評価 (2.5点満点): 全体的な作品の質
+"""
+
+_SCORE_NOTE = """上記は例です。実際の評価では、数値は0.0から10.0の間の実数(小数点以下1桁)を使用し、feedbackには具体的な評価コメントを記入してください。
+評価の理由はfeedbackにまとめ、JSON以外の文章は出力しないでください。
+評価は厳格かつ公平に行い、プロの文学評論家として真摯な評価を提供してください。
+"""
+
+# 評価の指示・基準・回答形式（全作品で共通）
+# プロバイダのプレフィックスキャッシュが効くよう、リクエストの先頭に置き内容を変えない
+EVALUATION_INSTRUCTIONS = f"""あなたはプロの文学評論家です。ユーザーが示す小説を評価してください。
+
+{_RUBRIC}
+必ず以下のJSON形式で回答してください：
+```json
+{{
+"story_score": 1.5,
+"writing_score": 1.2,
+"character_score": 0.8,
+"overall_score": 1.5,
+"feedback": "詳細な評価コメント100字未満"
+}}
+```
+
+{_SCORE_NOTE}"""
+
+# 複数の作品をまとめて評価する場合の指示（作品ごとの結果を作品IDで対応付ける）
+PACKED_EVALUATION_INSTRUCTIONS = f"""あなたはプロの文学評論家です。ユーザーが示す複数の小説を1作品ずつ独立に評価してください。
+各作品は「作品ID: 」の行から始まります。作品同士を比較せず、それぞれ個別に評価してください。
+
+{_RUBRIC}
+必ず示された全作品について、以下のJSON形式で回答してください（resultsに作品ごとの評価を並べ、novel_idには作品IDをそのまま記入）：
+```json
+{{
+"results": [
+{{
+"novel_id": "1177354054000000000",
+"story_score": 1.5,
+"writing_score": 1.2,
+"character_score": 0.8,
+"overall_score": 1.5,
+"feedback": "詳細な評価コメント100字未満"
+}}
+]
+}}
+```
+
+{_SCORE_NOTE}"""
+
 class LLMClient:
-    def __init__(self):
+    def __init__(
+        self,
+        rate_limiter: Optional[LLMRateLimiter] = None,
+        response_cache: Optional[LLMResponseCache] = None,
+        usage_stats: Optional[UsageStats] = None,
+        call_log: Optional[LLMCallLog] = None
+    ):
+        """
+        Args:
+            rate_limiter: RPM・TPM・同時送信数の制限（省略時はプロセス内で共有する制限を使用）
+            response_cache: 応答キャッシュ（省略時は設定が有効ならプロセス内で共有するキャッシュを使用）
+            usage_stats: トークン使用量の集計（省略時はプロセス内で共有する集計を使用）
+            call_log: API呼び出しごとの計測記録（省略時はプロセス内で共有する記録を使用）
+        """
         self.api_key = settings.llm_api_key
         self.endpoint = settings.llm_endpoint
         self.model = settings.llm_model
+        self.rate_limiter = rate_limiter or get_shared_rate_limiter()
+        self.response_cache = response_cache or get_shared_response_cache()
+        self.usage_stats = usage_stats or get_shared_usage_stats()
+        self.call_log = call_log or get_shared_call_log()
         
         if not self.api_key:
             logger.warning("LLM API key not set. Evaluation will not work.")
     
-    def evaluate_novel(self, title: str, author: str, episodes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def evaluate_novel(
+        self,
+        title: str,
+        author: str,
+        episodes: List[Dict[str, Any]],
+        sample: int = 0
+    ) -> Optional[Dict[str, Any]]:
         """
         小説の内容をLLMで評価し、スコアとフィードバックを返す
+
+        同じ作品を複数回評価する場合は、sampleに何回目か（0始まり）を渡す
+        （応答キャッシュは回ごとに別に保存される）
+
+        応答のJSONを修復しても解析できなかった場合は、キャッシュを使わずに
+        settings.llm_parse_retries 回まで再リクエストする。
+        APIエラーや解析の失敗で評価できなかった場合はNone（次回の実行で評価し直せるよう、
+        呼び出し側ではスコア0の評価結果として保存しない）
         """
         if not self.api_key:
-            return {
-                "overall_score": 0.0,
-                "story_score": 0.0,
-                "writing_score": 0.0,
-                "character_score": 0.0,
-                "feedback": "API key not configured"
-            }
-        
-        # エピソードの内容を取得
-        episode_texts = []
-        for episode in episodes:
-            episode_texts.append(f"タイトル: {episode['title']}\n\n{episode['content']}")
+            logger.error("LLM API key not configured")
+            return None
         
         # プロンプトの構築
-        prompt = self._build_evaluation_prompt(title, author, episode_texts)
+        prompt = self._build_novel_prompt(title, author, episodes)
         
         try:
-            # LLM APIを呼び出し
-            response = self._call_llm_api(prompt)
-            
-            # レスポンスを解析
-            return self._parse_evaluation_response(response)
+            for attempt in range(max(0, settings.llm_parse_retries) + 1):
+                # LLM APIを呼び出し（再リクエストでは解析できなかった応答をキャッシュから読まない）
+                response = self._call_llm_api(prompt, use_cache=attempt == 0, sample=sample)
+                
+                # レスポンスを解析
+                evaluation = self._parse_evaluation_response(response)
+                if evaluation is not None:
+                    return evaluation
+                logger.warning(f"Could not parse evaluation for {title} (attempt {attempt + 1})")
+            return None
             
         except Exception as e:
             logger.error(f"Error evaluating novel: {e}")
-            return {
-                "overall_score": 0.0,
-                "story_score": 0.0,
-                "writing_score": 0.0,
-                "character_score": 0.0,
-                "feedback": f"評価中にエラーが発生しました: {str(e)}"
-            }
+            return None
     
-    def _build_evaluation_prompt(self, title: str, author: str, episode_texts: List[str]) -> str:
-        """
-        評価用のプロンプトを構築
-        """
-        # エピソードテキストの長さを制限（7700文字まで）と短すぎる場合の警告
-        truncated_episode_texts = []
-        for text in episode_texts:
-            # 長すぎる場合は切り捨て
-            if len(text) > 7700:
-                truncated_text = text[:7700] + "...(以下省略)"
-                truncated_episode_texts.append(truncated_text)
-            # 短すぎる場合は警告を出す
-            elif len(text) <= 100:
-                logger.warning(f"エピソードのテキストが短すぎます（{len(text)}文字）: {text[:50]}...")
-                truncated_episode_texts.append(text + "\n[警告: このエピソードは非常に短いため、十分な評価ができない可能性があります]")
-            else:
-                truncated_episode_texts.append(text)
-
+    def evaluate_packed(self, novels: List[Tuple[str, str, str]]) -> Dict[str, Dict[str, Any]]:
+        """
+        短い作品をまとめて1回のリクエストで評価する
 
-        prompt = f"""あなたはプロの文学評論家です。以下の小説を評価してください。
+        Args:
+            novels: (小説ID, タイトル, build_episode_section で作成したエピソード部分) のリスト
 
-        タイトル: {title}
+        Returns:
+            小説IDをキー、評価結果を値とする辞書。応答に含まれなかった作品や
+            形式が不正だった作品は含まれないため、呼び出し側で個別に評価し直す
+        """
+        if not self.api_key or not novels:
+            return {}
+        
+        prompt = "\n\n".join(
+            f"作品ID: {novel_id}\nタイトル: {title}\n\n{section}\n\n{'-' * 50}"
+            for novel_id, title, section in novels
+        )
+        logger.info(
+            f"Packed prompt for {len(novels)} novels: "
+            f"~{estimate_tokens(PACKED_EVALUATION_INSTRUCTIONS + prompt, self.model)} input tokens"
+        )
+        try:
+            response = self._call_llm_api(
+                prompt,
+                system=PACKED_EVALUATION_INSTRUCTIONS,
+                early_stop=False,
+                max_tokens=settings.llm_max_tokens * len(novels)
+            )
+        except Exception as e:
+            logger.error(f"Error evaluating packed novels: {e}")
+            return {}
+        return self._parse_packed_response(response, [novel_id for novel_id, _, _ in novels])
+    
+    def _parse_packed_response(self, response: str, novel_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """まとめて評価した応答のJSONから、依頼した作品IDの評価結果を取り出す"""
+        items = loads_lenient(response)
+        if items is None:
+            logger.error("Error parsing packed LLM response")
+            logger.debug(f"Raw response: {response}")
+            return {}
+        if isinstance(items, dict):
+            # {"results": [...]} の形式（他のキー名で包まれている場合も受け付ける）
+            items = items.get("results") or next((value for value in items.values() if isinstance(value, list)), [])
+        
+        expected = set(novel_ids)
+        evaluations = {}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict) or str(item.get("novel_id")) not in expected:
+                continue
+            if any(field not in item for field in EVALUATION_FIELDS):
+                continue
+            try:
+                evaluation = {field: item[field] for field in EVALUATION_FIELDS}
+                for field in EVALUATION_FIELDS:
+                    if field != "feedback":
+                        evaluation[field] = coerce_score(evaluation[field])
+            except ValueError:
+                continue
+            evaluations[str(item["novel_id"])] = evaluation
+        
+        missing = expected - set(evaluations)
+        if missing:
+            logger.warning(f"Packed response is missing {len(missing)} of {len(expected)} novels: {sorted(missing)}")
+        return evaluations
+    
+    def _build_novel_prompt(self, title: str, author: str, episodes: List[Dict[str, Any]]) -> str:
+        """
+        エピソードデータから評価用のプロンプトを構築
 
-        以下のエピソードを読んで、小説の質を10点満点で評価してください。
-        評価は絶対的な基準で行い、相対評価ではなく絶対評価としてください。
+        本文は注記・空白を圧縮した上で、settings.llm_prompt_token_budget の
+        トークン数に収まるよう先頭から複数話を連結する
+        """
+        section = build_episode_section(episodes, model=self.model)
+        prompt = self._build_evaluation_prompt(title, author, section.text)
+        logger.info(
+            f"Prompt for {title}: ~{estimate_tokens(EVALUATION_INSTRUCTIONS + prompt, self.model)} input tokens "
+            f"({section.episodes}/{len(episodes)} episodes{', truncated' if section.truncated else ''})"
+        )
+        return prompt
+    
+    def _build_evaluation_prompt(self, title: str, author: str, episode_section: str) -> str:
+        """
+        評価用のプロンプト（作品ごとに変わる部分）を構築
 
-        {'-' * 50}
+        評価基準と回答形式は全作品で共通のシステムメッセージ（EVALUATION_INSTRUCTIONS）に置き、
+        ここでは作品ごとの内容だけを返す
+        """
+        return f"""タイトル: {title}
 
-        {episode_texts[0]}
+{'-' * 50}
 
-        {'-' * 50}
+{episode_section}
 
-        以下の観点から評価し、各項目のスコアと理由を詳しく説明してください：
+{'-' * 50}
+"""
+    
+    def _build_payload(
+        self,
+        prompt: str,
+        system: str = EVALUATION_INSTRUCTIONS,
+        max_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        チャット補完APIのリクエスト本文を構築
 
-        1. ストーリー性 (2.5点満点): 物語の展開、構成、オリジナリティ
-        2. 文章力 (2.5点満点): 表現力、読みやすさ、言葉の選択
-        3. キャラクター (2.5点満点): 登場人物の魅力、深み、成長
-        4. 総合評価 (2.5点満点): 全体的な作品の質
+        共通の評価基準をシステムメッセージ、作品ごとの内容をユーザーメッセージとし、
+        全リクエストの先頭部分がバイト単位で一致するようにする。
+        回答はJSONだけなので、max_tokensは評価結果のJSONに必要な分
+        （settings.llm_max_tokens）に抑え、settings.llm_json_mode が有効なら
+        JSONモード（response_format）を指定する
+        """
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "max_tokens": max_tokens or settings.llm_max_tokens
+        }
+        if settings.llm_json_mode:
+            payload["response_format"] = {"type": "json_object"}
+        return payload
+    
+    def build_batch_request(
+        self,
+        custom_id: str,
+        title: str,
+        author: str,
+        episodes: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        バッチAPI（OpenAI互換）の入力JSONLの1行分のリクエストを構築
 
-        必ず以下のJSON形式で回答してください：
-        ```json
-        {{
-        "story_score": 1.5,
-        "writing_score": 1.2,
-        "character_score": 0.8,
-        "overall_score": 1.5,
-        "feedback": "詳細な評価コメント100字未満"
-        }}
-        ```
+        本文は同期実行時と同じプロンプト・パラメータを使用する
+        """
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": self._build_payload(self._build_novel_prompt(title, author, episodes))
+        }
+    
+    def parse_batch_result(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        バッチAPIの結果JSONLの1行から評価結果を取り出す
 
-        上記は例です。実際の評価では、数値は0.0から10.0の間の実数(小数点以下1桁)を使用し、feedbackには具体的な評価コメントを記入してください。
-        評価は厳格かつ公平に行い、プロの文学評論家として真摯な評価を提供してください。
+        リクエストが失敗していた場合や、応答のJSONを修復しても解析できなかった場合はNone
         """
-        return prompt
+        error = record.get("error")
+        response = record.get("response") or {}
+        if error or response.get("status_code") != 200:
+            logger.error(f"Batch request {record.get('custom_id')} failed: {error or response.get('status_code')}")
+            return None
+        try:
+            content = response["body"]["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError) as e:
+            logger.error(f"Unexpected batch result for {record.get('custom_id')}: {e}")
+            return None
+        return self._parse_evaluation_response(content)
     
-    def _call_llm_api(self, prompt: str) -> str:
+    def _call_llm_api(
+        self,
+        prompt: str,
+        system: str = EVALUATION_INSTRUCTIONS,
+        early_stop: bool = True,
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True,
+        sample: int = 0
+    ) -> str:
         """
         LLM APIを呼び出し、レスポンスを取得
+
+        同じモデル・メッセージ・パラメータへの応答がキャッシュにあればAPIを呼ばずに返す
+        （use_cacheがFalseの場合は読まずにAPIを呼び、応答で上書きする）。
+        送信前にRPM・TPM・同時送信数の枠を確保し、429・5xx・タイムアウトは
+        指数バックオフ（Retry-Afterがあればその秒数）でリトライする。
+        settings.llm_stream が有効な場合はストリーミングで受信し、評価のJSONが
+        揃った時点でJSON部分だけを返す（usage は最後の断片から受け取る）。
+        API呼び出しごとの所要時間・トークン数・ステータス・リトライ回数は call_log に記録する
         """
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
         }
         
-        payload = {
-            "model": self.model,
-            "messages": [
-                {"role": "system", "content": "You are a professional literary critic who evaluates novels."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.3,
-            "max_tokens": 8192
-
-        }
+        payload = self._build_payload(prompt, system, max_tokens)
         
-        response = requests.post(
-            self.endpoint,
-            headers=headers,
-            data=json.dumps(payload),
-            timeout=60
-        )
+        key = cache_key(payload, sample) if self.response_cache else None
+        if key:
+            if settings.llm_cache_bypass or not use_cache:
+                self.response_cache.record('misses')
+            else:
+                cached = self.response_cache.get(key)
+                if cached is not None:
+                    return cached
         
-        if response.status_code != 200:
-            logger.error(f"API error: {response.status_code} - {response.text}")
-            raise Exception(f"API error: {response.status_code}")
+        stream = settings.llm_stream
+        if stream:
+            payload["stream"] = True
+            # ストリーミングでは usage を最後の断片で返すよう指定する
+            payload["stream_options"] = {"include_usage": True}
         
-        result = response.json()
-        return result["choices"][0]["message"]["content"]
+        max_retries = max(1, settings.llm_max_retries)
+        estimated_tokens = sum(estimate_tokens(message["content"], self.model) for message in payload["messages"])
+        data = json.dumps(payload)
+        started = time.monotonic()
+        
+        for attempt in range(max_retries):
+            response = None
+            error = None
+            content = None
+            usage = None
+            ttft = None
+            with self.rate_limiter.request(estimated_tokens):
+                sent_at = time.monotonic()
+                try:
+                    response = requests.post(
+                        self.endpoint,
+                        headers=headers,
+                        data=data,
+                        timeout=(settings.llm_connect_timeout, settings.llm_read_timeout),
+                        stream=stream
+                    )
+                    if stream and response.status_code == 200:
+                        content, usage, first_token_at = self._read_stream(response, early_stop)
+                        ttft = first_token_at - sent_at if first_token_at is not None else None
+                except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                    error = e
+                    response = None
+            
+            if response is not None and response.status_code == 200:
+                break
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                logger.error(f"API error: {response.status_code} - {response.text}")
+                self._record_call(started, response, error, attempt, estimated_tokens, stream)
+                raise Exception(f"API error: {response.status_code}")
+            
+            retry_after = parse_retry_after(response) if response is not None else None
+            wait_time = retry_after if retry_after is not None else (2 ** attempt) + random.random()
+            if response is not None and response.status_code == 429:
+                # レート制限はプロセス全体で共有しているため、他のワーカーの送信も止める
+                self.rate_limiter.pause(wait_time)
+            logger.warning(
+                f"LLM request attempt {attempt + 1}/{max_retries} failed: "
+                f"{response.status_code if response is not None else error}"
+            )
+            if attempt == max_retries - 1:
+                self._record_call(started, response, error, attempt, estimated_tokens, stream)
+                raise Exception(f"API error: {response.status_code if response is not None else error}")
+            time.sleep(wait_time)
+        
+        if content is None:
+            result = response.json()
+            usage = result.get("usage") or {}
+            content = result["choices"][0]["message"]["content"]
+        elif usage is None:
+            # JSONの後に文章が続き、usage を受け取る前に接続を閉じた場合
+            logger.info("LLM stream closed before usage was received")
+            usage = {}
+        # 見積もりで予約したトークン数を実際の使用量で補正
+        if usage.get("total_tokens"):
+            self.rate_limiter.record_usage(usage["total_tokens"] - estimated_tokens)
+        self.usage_stats.add(usage)
+        if usage.get("prompt_tokens") is not None:
+            logger.info(
+                f"LLM usage: {usage['prompt_tokens']} input tokens (estimated {estimated_tokens}, "
+                f"{cached_prompt_tokens(usage)} cached), {usage.get('completion_tokens', 0)} output tokens"
+            )
+        self._record_call(started, response, error, attempt, estimated_tokens, stream, usage or None, ttft)
+        if key:
+            self.response_cache.put(key, self.model, content)
+        return content
+    
+    def _record_call(
+        self,
+        started: float,
+        response: Optional[requests.Response],
+        error: Optional[Exception],
+        attempt: int,
+        estimated_tokens: int,
+        stream: bool,
+        usage: Optional[Dict[str, Any]] = None,
+        ttft: Optional[float] = None
+    ) -> None:
+        """
+        API呼び出し1回分（リトライを含む）の所要時間・TTFB・トークン数・ステータスを記録
+
+        ストリーミングの場合は最初のトークンを受け取るまでの時間（ttft）をTTFBとして記録する
+        """
+        if ttft is None and response is not None:
+            # requestsのelapsedは送信から応答ヘッダーを受け取るまでの時間
+            ttft = response.elapsed.total_seconds()
+        self.call_log.record(
+            model=self.model,
+            status=str(response.status_code) if response is not None else type(error).__name__,
+            wall_time=time.monotonic() - started,
+            ttfb=ttft,
+            retries=attempt,
+            estimated_tokens=estimated_tokens,
+            usage=usage,
+            cached_tokens=cached_prompt_tokens(usage) if usage else 0,
+            stream=stream
+        )
+    
+    def _read_stream(
+        self,
+        response: requests.Response,
+        early_stop: bool = True
+    ) -> Tuple[str, Optional[Dict[str, Any]], Optional[float]]:
+        """
+        ストリーミング（server-sent events）の応答を読み、評価のJSONを取り出す
+
+        受信した断片を JsonObjectScanner に渡し、必要なフィールドを持つオブジェクトが
+        揃った後は usage を含む最後の断片まで読む。JSONの後に文章が続いた場合は
+        その時点で接続を閉じる（文章の生成を待たない、usage は受け取れない）。
+        最後までJSONが揃わなかった場合、またはearly_stopがFalseの場合は受信したテキスト全体を返す
+
+        Returns:
+            (応答のテキスト, usage（受け取れなかった場合はNone）, 最初のトークンを受け取った時刻（time.monotonic）)
+        """
+        start = time.monotonic()
+        first_token_at = None
+        usage = None
+        scanner = JsonObjectScanner(
+            accept=lambda value: isinstance(value, dict) and all(field in value for field in EVALUATION_FIELDS)
+        )
+        parts = []
+        # SSEはcharsetが指定されないことが多いため明示する
+        response.encoding = response.encoding or "utf-8"
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                if event.get("usage"):
+                    usage = event["usage"]
+                choices = event.get("choices") or []
+                delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                if not delta:
+                    continue
+                if early_stop and scanner.result is not None:
+                    if delta.strip():
+                        # JSONの後に続く文章は読まない
+                        break
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.monotonic()
+                parts.append(delta)
+                if early_stop:
+                    scanner.feed(delta)
+        finally:
+            response.close()
+        
+        elapsed = time.monotonic() - start
+        ttft = f"{first_token_at - start:.2f}s" if first_token_at else "-"
+        logger.info(
+            f"LLM stream: time to first token {ttft}, time to result {elapsed:.2f}s, "
+            f"{sum(len(part) for part in parts)} chars received"
+            + ("" if scanner.result or not early_stop else " (no complete JSON, read to end)")
+        )
+        return scanner.result or "".join(parts), usage, first_token_at
     
-    def _parse_evaluation_response(self, response: str) -> Dict[str, Any]:
+    def _parse_evaluation_response(self, response: str) -> Optional[Dict[str, Any]]:
         """
         LLMのレスポンスからJSON部分を抽出して解析
+
+        前後の文章・末尾のカンマ・全角の数字などは json_repair で修復する。
+        修復しても解析できない場合や必須フィールドが欠けている場合、
+        スコアを数値として読み取れない場合はNone
         """
         try:
-            # 正規表現を使用してJSONブロックを抽出
-            json_match = re.search(r'```(?:json)?\s*({.*?})\s*```', response, re.DOTALL)
-            
-            if json_match:
-                json_str = json_match.group(1).strip()
-            else:
-                # JSONブロックが見つからない場合、レスポンス全体をJSONとして解析してみる
-                json_str = response.strip()
-            
-            # JSONを解析
-            evaluation = json.loads(json_str)
+            evaluation = loads_lenient(response)
+            if not isinstance(evaluation, dict):
+                raise ValueError("No JSON object found")
             
             # 必要なフィールドが含まれているか確認
-            required_fields = ["overall_score", "story_score", "writing_score", "character_score", "feedback"]
-            for field in required_fields:
+            for field in EVALUATION_FIELDS:
                 if field not in evaluation:
                     raise ValueError(f"Missing required field: {field}")
             
             # 数値フィールドを確認し、文字列の場合は数値に変換
-            numeric_fields = ["overall_score", "story_score", "writing_score", "character_score"]
-            for field in numeric_fields:
-                if isinstance(evaluation[field], str):
-                    try:
-                        evaluation[field] = float(evaluation[field])
-                    except ValueError:
-                        # 数値に変換できない場合はデフォルト値を使用
-                        logger.warning(f"Could not convert {field} to float: {evaluation[field]}")
-                        evaluation[field] = 5.0
+            # （読み取れないスコアは補わず、再リクエストや次回の再評価に回す）
+            for field in EVALUATION_FIELDS:
+                if field != "feedback":
+                    evaluation[field] = coerce_score(evaluation[field])
             
             return evaluation
             
-        except Exception as e:
+        except ValueError as e:
             logger.error(f"Error parsing LLM response: {e}")
             logger.debug(f"Raw response: {response}")
-            
-            # エラー時はデフォルト値を返す
-            return {
-                "overall_score": 0.0,
-                "story_score": 0.0,
-                "writing_score": 0.0,
-                "character_score": 0.0,
-                "feedback": f"評価結果の解析に失敗しました: {str(e)}"
-            }
\ No newline at end of file
+            return None
@@ -0,0 +1,146 @@
+"""
+評価プロンプトに埋め込む本文の圧縮とトークン数の見積もり
+
+本文から評価に寄与しない青空文庫形式の注記や空白を取り除き、
+トークン数の予算内に収まるよう文の区切りで切り詰める
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from src.config import settings
+from src.scraper.text_normalizer import AO_RBI, AO_RBL, AO_RBR
+
+logger = logging.getLogger(__name__)
+
+# モデル名の接頭辞ごとの1文字あたりのトークン数の概算（非ASCII文字, ASCII文字）
+# 日本語の本文で各社のトークナイザーを実測した値を丸めたもので、予算管理に使う見積もり
+_TOKEN_RATES: List[Tuple[str, float, float]] = [
+    ('deepseek', 0.75, 0.3),
+    ('gpt-4o', 0.8, 0.25),
+    ('gpt-', 1.1, 0.25),
+]
+_DEFAULT_TOKEN_RATE = (1.0, 0.3)
+
+# ルビ（｜親文字《よみ》）と［＃…］形式の注記
+# カクヨムのルビは<ruby>から必ず｜付きに変換されるため、｜のない《…》は作者が書いた本文として残す
+_RUBY_RE = re.compile(re.escape(AO_RBI) + r'([^' + AO_RBI + AO_RBL + AO_RBR + r'\n]*)' + re.escape(AO_RBL) + r'[^' + AO_RBL + AO_RBR + r'\n]*' + re.escape(AO_RBR))
+_ANNOTATION_RE = re.compile(r'［＃[^］\n]*］')
+# 行頭・行末の空白（全角空白を含む）と空行
+_LINE_SPACE_RE = re.compile(r'^[ \t　]+|[ \t　]+$', re.MULTILINE)
+_BLANK_LINES_RE = re.compile(r'\n{2,}')
+
+# 切り詰める際の区切りとする文字（文末・閉じ括弧・改行）
+_SENTENCE_ENDS = '。！？!?」』）\n'
+TRUNCATION_MARK = '…(以下省略)'
+
+
+def _token_rates(model: Optional[str]) -> Tuple[float, float]:
+    model = (model or settings.llm_model).lower()
+    for prefix, non_ascii, ascii_rate in _TOKEN_RATES:
+        if model.startswith(prefix):
+            return non_ascii, ascii_rate
+    return _DEFAULT_TOKEN_RATE
+
+
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """モデルのトークナイザーに合わせたトークン数の見積もり"""
+    non_ascii_rate, ascii_rate = _token_rates(model)
+    ascii_chars = len(text.encode('ascii', 'ignore'))
+    return int((len(text) - ascii_chars) * non_ascii_rate + ascii_chars * ascii_rate) + 1
+
+
+def compact_episode_text(text: str) -> str:
+    """
+    評価用に本文を圧縮
+
+    ルビは親文字だけを残し、傍点・改ページ・挿絵などの注記を取り除く。
+    改行コードを揃え、行頭の字下げと空行を除去する
+    """
+    text = _RUBY_RE.sub(r'\1', text)
+    text = _ANNOTATION_RE.sub('', text)
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = _LINE_SPACE_RE.sub('', text)
+    return _BLANK_LINES_RE.sub('\n', text).strip()
+
+
+def truncate_to_budget(text: str, max_tokens: int, model: Optional[str] = None) -> Tuple[str, bool]:
+    """
+    トークン数の予算に収まるよう、予算内で最後の文の区切りで切り詰める
+
+    Returns:
+        (テキスト, 切り詰めたかどうか)
+    """
+    if estimate_tokens(text, model) <= max_tokens:
+        return text, False
+
+    non_ascii_rate, ascii_rate = _token_rates(model)
+    budget = max_tokens - estimate_tokens(TRUNCATION_MARK, model)
+    used = 0.0
+    end = 0
+    for end, char in enumerate(text):
+        used += ascii_rate if char.isascii() else non_ascii_rate
+        if used > budget:
+            break
+    cut = max(text.rfind(char, 0, end) for char in _SENTENCE_ENDS) + 1
+    if cut <= end // 2:
+        # 区切りが見つからない（極端に長い文）場合は文字数で切る
+        cut = end
+    return text[:cut].rstrip() + TRUNCATION_MARK, True
+
+
+class EpisodeSection(NamedTuple):
+    """プロンプトに埋め込むエピソード部分"""
+    text: str
+    tokens: int
+    episodes: int
+    truncated: bool
+
+
+def build_episode_section(
+    episodes: List[Dict[str, Any]],
+    max_tokens: Optional[int] = None,
+    model: Optional[str] = None,
+    min_tokens: int = 200
+) -> EpisodeSection:
+    """
+    複数のエピソードを掲載順に予算内で連結
+
+    各エピソードは圧縮してから追加し、予算を超えるエピソードは文の区切りで切り詰めて
+    以降のエピソードは含めない（残りの予算がmin_tokens未満なら追加しない）
+
+    Args:
+        episodes: {'title', 'content'} の辞書のリスト
+        max_tokens: エピソード部分のトークン数の上限（省略時はsettings.llm_prompt_token_budget）
+        model: トークン数の見積もりに使うモデル名（省略時はsettings.llm_model）
+    """
+    if max_tokens is None:
+        max_tokens = settings.llm_prompt_token_budget
+
+    parts = []
+    used = 0
+    truncated = False
+    for episode in episodes:
+        remaining = max_tokens - used
+        if parts and remaining < min_tokens:
+            truncated = True
+            break
+        content = compact_episode_text(episode['content'] or '')
+        if len(content) <= 100:
+            logger.warning(f"エピソードのテキストが短すぎます（{len(content)}文字）: {content[:50]}...")
+            content += "\n[警告: このエピソードは非常に短いため、十分な評価ができない可能性があります]"
+        text = f"タイトル: {episode['title']}\n\n{content}"
+        text, was_truncated = truncate_to_budget(text, remaining, model)
+        parts.append(text)
+        used += estimate_tokens(text, model)
+        if was_truncated:
+            truncated = True
+            break
+
+    return EpisodeSection(
+        text=f"\n\n{'-' * 20}\n\n".join(parts),
+        tokens=used,
+        episodes=len(parts),
+        truncated=truncated
+    )
@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Iterator, Optional, Tuple
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMRateLimiter:
+    """
+    LLM APIのレート制限（スレッドセーフ）
+
+    - 同時に送信中のリクエスト数を max_in_flight に制限する
+    - 直近60秒間のリクエスト数（RPM）とトークン数（TPM）が上限を超えないよう送信を待たせる
+    - 429を受けた場合は pause() で全ワーカーの送信を一定時間止める
+
+    トークン数は送信前に見積もりで予約し、レスポンスの usage を受け取ってから
+    record_usage() で実際の値との差を反映する。上限が0の項目は制限しない
+    """
+
+    window = 60.0
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_in_flight: Optional[int] = None
+    ):
+        self.requests_per_minute = requests_per_minute if requests_per_minute is not None else settings.llm_requests_per_minute
+        self.tokens_per_minute = tokens_per_minute if tokens_per_minute is not None else settings.llm_tokens_per_minute
+        self.max_in_flight = max(1, max_in_flight if max_in_flight is not None else settings.llm_max_in_flight)
+        self._in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        self._lock = threading.Lock()
+        self._requests: Deque[float] = deque()
+        self._tokens: Deque[Tuple[float, int]] = deque()
+        self._token_total = 0
+        self._paused_until = 0.0
+
+    def _purge(self, now: float) -> None:
+        while self._requests and self._requests[0] <= now - self.window:
+            self._requests.popleft()
+        while self._tokens and self._tokens[0][0] <= now - self.window:
+            self._token_total -= self._tokens.popleft()[1]
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        """送信できるまでの待機秒数（0以下なら今すぐ送信できる）"""
+        wait = self._paused_until - now
+        if self.requests_per_minute and len(self._requests) >= self.requests_per_minute:
+            wait = max(wait, self._requests[0] + self.window - now)
+        if self.tokens_per_minute and self._tokens and self._token_total + tokens > self.tokens_per_minute:
+            # 古い予約から順に期限切れになった時点で収まるかを調べる
+            total = self._token_total
+            for timestamp, used in self._tokens:
+                total -= used
+                if total + tokens <= self.tokens_per_minute:
+                    wait = max(wait, timestamp + self.window - now)
+                    break
+            else:
+                wait = max(wait, self._tokens[-1][0] + self.window - now)
+        return wait
+
+    def acquire(self, tokens: int = 0) -> None:
+        """RPM・TPMの枠が空くまで待機し、リクエスト1件とトークン数を予約"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._purge(now)
+                wait = self._wait_time(tokens, now)
+                if wait <= 0:
+                    self._requests.append(now)
+                    self._tokens.append((now, tokens))
+                    self._token_total += tokens
+                    return
+            time.sleep(min(wait, self.window))
+
+    def record_usage(self, tokens: int) -> None:
+        """予約したトークン数と実際の使用量との差を反映（負の値で予約を戻す）"""
+        if not tokens:
+            return
+        with self._lock:
+            self._tokens.append((time.monotonic(), tokens))
+            self._token_total += tokens
+
+    def pause(self, seconds: float) -> None:
+        """429を受けた場合などに全ワーカーの送信を指定秒数止める"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        logger.warning(f"LLM requests paused for {seconds:.1f} seconds")
+
+    @contextmanager
+    def request(self, tokens: int = 0) -> Iterator[None]:
+        """同時送信数の枠を確保し、RPM・TPMの枠を予約してから処理を実行"""
+        with self._in_flight:
+            self.acquire(tokens)
+            yield
+
+
+_shared_rate_limiter: Optional[LLMRateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_rate_limiter() -> LLMRateLimiter:
+    """プロセス内の全LLMClientで共有するレート制限（ワーカーごとに枠を持たないようにする）"""
+    global _shared_rate_limiter
+    with _shared_lock:
+        if _shared_rate_limiter is None:
+            _shared_rate_limiter = LLMRateLimiter()
+        return _shared_rate_limiter
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(payload: Dict[str, Any], sample: int = 0) -> str:
+    """
+    モデル・メッセージ・temperature・max_tokens・response_formatから応答キャッシュのキーを作成
+
+    同じプロンプトで複数回評価する場合は、sampleに何回目か（0始まり）を渡して別のキーにする
+    """
+    material = {
+        'model': payload.get('model'),
+        'messages': payload.get('messages'),
+        'temperature': payload.get('temperature'),
+        'max_tokens': payload.get('max_tokens'),
+        'response_format': payload.get('response_format'),
+    }
+    if sample:
+        material['sample'] = sample
+    return hashlib.sha256(json.dumps(material, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    LLMの応答を保存するディスクキャッシュ（SQLite、スレッドセーフ）
+
+    同じプロンプトとパラメータに対する応答を保存し、再実行時はAPIを呼ばずに返す。
+    max_age秒より古いエントリは使わずに削除し、合計サイズが上限を超えた場合は
+    最終アクセスが古いものから削除する（LRU）
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None, max_age: Optional[float] = None):
+        self.path = path or settings.llm_cache_path
+        self.max_bytes = max_bytes if max_bytes is not None else settings.llm_cache_max_bytes
+        self.max_age = max_age if max_age is not None else settings.llm_cache_max_age
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """保存済みの応答を取得（期限切れの場合は削除してNone）"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.max_age and now - row[1] > self.max_age:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.stats['evictions'] += 1
+                row = None
+            if row is None:
+                self._conn.commit()
+                self.stats['misses'] += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.stats['hits'] += 1
+        return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        """応答を保存"""
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_cache (key, model, response, size, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (key, model, response, size, now, now)
+            )
+            self._conn.commit()
+            self.stats['stores'] += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        """期限切れのエントリと、合計サイズの上限を超えた分の古いエントリを削除"""
+        if self.max_age:
+            cursor = self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.max_age,))
+            self.stats['evictions'] += cursor.rowcount
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total > self.max_bytes:
+            rows = self._conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access").fetchall()
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                total -= size
+                self.stats['evictions'] += 1
+        self._conn.commit()
+
+    def record(self, name: str) -> None:
+        """集計カウンタを加算"""
+        with self._lock:
+            self.stats[name] += 1
+
+    def summary(self) -> str:
+        """ログ出力用の集計（ミスはAPIを呼び出した回数）"""
+        return (
+            f"LLM response cache: {self.stats['hits']} cached, {self.stats['misses']} API calls, "
+            f"{self.stats['evictions']} evictions"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_shared_cache: Optional[LLMResponseCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_response_cache() -> Optional[LLMResponseCache]:
+    """プロセス内の全LLMClientで共有する応答キャッシュ（無効の場合はNone）"""
+    global _shared_cache
+    if not settings.llm_cache_enabled:
+        return None
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = LLMResponseCache()
+        return _shared_cache
@@ -0,0 +1,91 @@
+"""
+複数回の評価結果の集計と、追加で評価すべき作品の選択
+
+1回目の評価で上位N件の境界付近にある作品や、評価の回ごとにサブスコアが食い違う作品だけを
+再評価し、総合評価スコアの信頼区間が十分に狭くなった時点で打ち切る
+"""
+
+import math
+import statistics
+from typing import Any, Dict, List, Optional
+
+from src.config import settings
+
+SCORE_FIELDS = ["overall_score", "story_score", "writing_score", "character_score"]
+SUB_SCORE_FIELDS = ["story_score", "writing_score", "character_score"]
+
+# 95%信頼区間の係数
+_Z = 1.96
+# 信頼区間に使う分散で、事前の想定（prior_std）を何回分の評価とみなすか
+_PRIOR_WEIGHT = 1.0
+
+
+def aggregate_samples(samples: List[Dict[str, Any]], prior_std: Optional[float] = None) -> Dict[str, Any]:
+    """
+    同じ作品の複数回の評価結果を集計
+
+    各スコアは平均、feedbackは総合評価スコアが平均に最も近い回のものを使う。
+    信頼区間の半幅は、標本分散をprior_std（省略時はsettings.eval_prior_std）の2乗に
+    向けて縮めた分散から求める。2回とも同じスコアだった場合などに、少ない回数で
+    ばらつきが0と判断して打ち切らないようにするため（1回だけの場合はprior_stdそのもの）
+
+    Returns:
+        評価結果の各フィールドに加え、sample_count・score_variance（1回の場合はNone）・
+        ci_halfwidth・sample_disagreement（サブスコアごとの回ごとの標準偏差の最大値、
+        1回の場合は0）を含む辞書
+    """
+    if prior_std is None:
+        prior_std = settings.eval_prior_std
+    count = len(samples)
+    aggregated: Dict[str, Any] = {
+        field: statistics.fmean(sample[field] for sample in samples) for field in SCORE_FIELDS
+    }
+    mean = aggregated["overall_score"]
+    aggregated["feedback"] = min(samples, key=lambda sample: abs(sample["overall_score"] - mean))["feedback"]
+    variance = statistics.variance(sample["overall_score"] for sample in samples) if count > 1 else None
+    aggregated["score_variance"] = variance
+    pooled_variance = (_PRIOR_WEIGHT * prior_std ** 2 + (count - 1) * (variance or 0.0)) / (_PRIOR_WEIGHT + count - 1)
+    aggregated["ci_halfwidth"] = _Z * math.sqrt(pooled_variance / count)
+    aggregated["sample_count"] = count
+    # 観点どうしの差（ストーリーと文章力の差など）は作品の特徴なので、回ごとのばらつきだけを見る
+    aggregated["sample_disagreement"] = max(
+        statistics.stdev(sample[field] for sample in samples) for field in SUB_SCORE_FIELDS
+    ) if count > 1 else 0.0
+    return aggregated
+
+
+def top_n_cutoff(aggregates: Dict[str, Dict[str, Any]], top_n: int) -> Optional[float]:
+    """上位top_n件とそれ以外の境界となる総合評価スコア（作品数がtop_n以下ならNone）"""
+    if top_n <= 0 or len(aggregates) <= top_n:
+        return None
+    scores = sorted((aggregate["overall_score"] for aggregate in aggregates.values()), reverse=True)
+    return (scores[top_n - 1] + scores[top_n]) / 2
+
+
+def select_uncertain(
+    aggregates: Dict[str, Dict[str, Any]],
+    top_n: int,
+    ci_target: Optional[float] = None,
+    disagreement: Optional[float] = None
+) -> List[str]:
+    """
+    追加で評価すべき作品のIDを選ぶ
+
+    信頼区間の半幅がci_targetを超え、かつ信頼区間が上位top_n件の境界にかかっているか、
+    いずれかのサブスコアの回ごとの標準偏差がdisagreementを超えている作品を選ぶ
+    """
+    if ci_target is None:
+        ci_target = settings.eval_ci_target
+    if disagreement is None:
+        disagreement = settings.eval_disagreement
+    cutoff = top_n_cutoff(aggregates, top_n)
+
+    selected = []
+    for novel_id, aggregate in aggregates.items():
+        halfwidth = aggregate["ci_halfwidth"]
+        if halfwidth <= ci_target:
+            continue
+        near_cutoff = cutoff is not None and abs(aggregate["overall_score"] - cutoff) < halfwidth
+        if near_cutoff or aggregate["sample_disagreement"] > disagreement:
+            selected.append(novel_id)
+    return selected
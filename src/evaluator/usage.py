@@ -0,0 +1,75 @@
+import threading
+from typing import Any, Dict, Optional
+
+
+def cached_prompt_tokens(usage: Dict[str, Any]) -> int:
+    """
+    usageからプレフィックスキャッシュに一致した入力トークン数を取得
+
+    DeepSeekは prompt_cache_hit_tokens、OpenAIは prompt_tokens_details.cached_tokens で返す
+    """
+    if usage.get("prompt_cache_hit_tokens") is not None:
+        return usage["prompt_cache_hit_tokens"]
+    details = usage.get("prompt_tokens_details") or {}
+    return details.get("cached_tokens") or 0
+
+
+class UsageStats:
+    """実行中のトークン使用量の集計（スレッドセーフ）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {
+            'requests': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'cache_hit_tokens': 0,
+            'cache_miss_tokens': 0,
+            'reused': 0,
+        }
+
+    def add(self, usage: Dict[str, Any]) -> None:
+        """レスポンスの usage を加算"""
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        hit = cached_prompt_tokens(usage)
+        miss = usage.get("prompt_cache_miss_tokens")
+        if miss is None:
+            miss = prompt_tokens - hit
+        with self._lock:
+            self.counts['requests'] += 1
+            self.counts['prompt_tokens'] += prompt_tokens
+            self.counts['completion_tokens'] += usage.get("completion_tokens") or 0
+            self.counts['cache_hit_tokens'] += hit
+            self.counts['cache_miss_tokens'] += miss
+
+    def add_reused(self) -> None:
+        """近似重複の作品の評価を再利用し、LLMを呼ばなかった回数を加算"""
+        with self._lock:
+            self.counts['reused'] += 1
+
+    def hit_ratio(self) -> float:
+        """入力トークンのうちプレフィックスキャッシュに一致した割合"""
+        total = self.counts['cache_hit_tokens'] + self.counts['cache_miss_tokens']
+        return self.counts['cache_hit_tokens'] / total if total else 0.0
+
+    def summary(self) -> str:
+        """ログ出力用の集計"""
+        return (
+            f"LLM usage: {self.counts['requests']} requests, {self.counts['prompt_tokens']} input tokens "
+            f"({self.counts['cache_hit_tokens']} prefix-cache hit, {self.counts['cache_miss_tokens']} miss, "
+            f"{self.hit_ratio():.0%} hit ratio), {self.counts['completion_tokens']} output tokens, "
+            f"{self.counts['reused']} calls saved by reusing near-duplicate evaluations"
+        )
+
+
+_shared_stats: Optional[UsageStats] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_usage_stats() -> UsageStats:
+    """プロセス内の全LLMClientで共有する使用量の集計"""
+    global _shared_stats
+    with _shared_lock:
+        if _shared_stats is None:
+            _shared_stats = UsageStats()
+        return _shared_stats
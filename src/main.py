@@ -1,15 +1,29 @@
 import logging
 import argparse
 import sys
+from typing import List, Optional
 from sqlalchemy.orm import Session
 import os
 import logging
 
 
+from src.config import settings
 from src.db.database import SessionLocal
 from src.scraper.kakuyomu import KakuyomuScraper
-from src.evaluator.evaluator import NovelEvaluator
-from src.db.repository import get_novels_for_evaluation, save_novel_data, get_evaluation_results, export_evaluation_results_to_csv
+from src.scraper.crawler import RankingCrawler, build_rankings
+from src.evaluator.evaluator import NovelEvaluator, evaluate_novels_concurrently
+from src.evaluator.response_cache import get_shared_response_cache
+from src.evaluator.usage import get_shared_usage_stats
+from src.evaluator.call_log import get_shared_call_log
+from src.evaluator.batch import write_batch_requests, ingest_batch_results
+from src.evaluator.job_worker import run_job_worker
+from src.pipeline import run_pipeline
+from src.reparse import reparse_episodes
+from src.db.repository import (
+    get_novels_for_evaluation, save_scraped_novel, get_known_episode_ids, save_ranking_entries,
+    get_evaluation_results, export_evaluation_results_to_csv,
+    enqueue_evaluation_jobs, get_evaluation_job_counts, index_missing_episode_signatures
+)
 
 # ロギング設定
 log_dir = "logs"
@@ -29,37 +43,80 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-def scrape_novels(session: Session, limit: int = 100):
+def scrape_novels(session: Session, limit: int = 100, workers: int = 1, incremental: bool = False):
     """
     カクヨムからランキング上位の小説を取得してDBに保存
+
+    workersが2以上の場合はエピソードを並列に取得する。
+    incrementalの場合、保存済みのエピソードは本文を取得せずランキング順位だけを更新する
     """
     logger.info(f"Starting to scrape top {limit} novels from Kakuyomu")
     
     scraper = KakuyomuScraper()
     novels = scraper.get_daily_ranking(limit=limit)
+    known_episode_ids = get_known_episode_ids(session, [novel['id'] for novel in novels]) if incremental else None
     
-    for novel in novels:
-        logger.info(f"Processing novel: {novel['title']} by {novel['author']}")
-        
-        # 小説の最初の1話を取得
-        episode = scraper.get_first_episode(novel['id'])
-        
-        # DBに保存
-        save_novel_data(
-            session=session,
-            novel_id=novel['id'],
-            title=novel['title'],
-            author=novel['author'],
-            ranking_position=novel['ranking_position'],
-            novel_url=novel['novel_url'],
-            episodes=[episode] if episode else None
-        )
+    if workers > 1:
+        # 並列取得モード：取得できた順にDBへ保存（DB操作はこのスレッドのみで行う）
+        novels_by_id = {novel['id']: novel for novel in novels}
+        for novel_id, episodes in scraper.fetch_episodes(
+            novels_by_id.keys(), max_workers=workers, known_episode_ids=known_episode_ids
+        ):
+            novel = novels_by_id[novel_id]
+            logger.info(f"Processing novel: {novel['title']} by {novel['author']}")
+            save_scraped_novel(session, novel, episodes)
+    else:
+        for novel in novels:
+            logger.info(f"Processing novel: {novel['title']} by {novel['author']}")
+            
+            # 小説の先頭のエピソード（既定では1話）を取得
+            episodes = scraper.get_episodes(novel['id'], known_episode_ids=known_episode_ids)
+            save_scraped_novel(session, novel, episodes)
     
     logger.info(f"Completed scraping {len(novels)} novels")
+    if scraper.http_cache:
+        logger.info(scraper.http_cache.summary())
+    scraper.close()
+
+def crawl_rankings(
+    session: Session,
+    rankings: Optional[List[str]] = None,
+    limit: int = 100,
+    workers: Optional[int] = None,
+    incremental: bool = False
+):
+    """
+    複数のランキングを巡回し、重複を除いた作品ごとにエピソードを取得してDBに保存
 
-def evaluate_novels(session: Session, limit: int = 100):
+    各作品のランキング掲載情報（ランキング名と順位）も保存する
+    """
+    if not rankings:
+        rankings = build_rankings()
+    logger.info(f"Starting to crawl {len(rankings)} rankings (top {limit} each)")
+    
+    crawler = RankingCrawler()
+    frontier = crawler.collect(rankings, limit=limit, max_workers=workers)
+    known_episode_ids = get_known_episode_ids(session, frontier.keys()) if incremental else None
+    
+    # 作品ページの取得は作品ごとに1回だけ（DB操作はこのスレッドのみで行う）
+    for novel, episodes in crawler.fetch_episodes(max_workers=workers, known_episode_ids=known_episode_ids):
+        logger.info(f"Processing novel: {novel['title']} by {novel['author']}")
+        if save_scraped_novel(session, novel, episodes):
+            save_ranking_entries(session, novel['id'], crawler.memberships[novel['id']])
+    
+    logger.info(f"Completed crawling {len(frontier)} unique novels")
+    if crawler.scraper.http_cache:
+        logger.info(crawler.scraper.http_cache.summary())
+    crawler.scraper.close()
+
+def evaluate_novels(session: Session, limit: int = 100, workers: int = 1, pack: bool = False, adaptive: bool = False):
     """
     DBに保存された小説を評価
+
+    workersが2以上の場合はワーカーごとにDBセッションを持つスレッドで並列に評価する。
+    packの場合は短い作品をまとめたリクエストで評価する。
+    adaptiveの場合は評価が不確かな作品だけを複数回評価して平均する
+    （pack・adaptiveでもworkers本までのリクエストを並行して送信する）
     """
     logger.info(f"Starting to evaluate novels")
     
@@ -70,18 +127,58 @@ def evaluate_novels(session: Session, limit: int = 100):
         logger.warning("No novels found for evaluation")
         return
     
-    evaluator = NovelEvaluator(session)
-    
-    for novel in novels:
-        logger.info(f"Evaluating novel: {novel.title} by {novel.author}")
-        result = evaluator.evaluate_novel(novel.id)
-        
-        if result:
-            logger.info(f"Evaluation complete: Overall score {result['overall_score']}")
+    if pack or adaptive or workers > 1:
+        novel_ids = [novel.id for novel in novels]
+        if adaptive:
+            results = NovelEvaluator(session).evaluate_novels_adaptive(novel_ids, max_workers=workers)
+        elif pack:
+            results = NovelEvaluator(session).evaluate_novels_packed(novel_ids, max_workers=workers)
         else:
-            logger.error(f"Failed to evaluate novel {novel.title}")
+            results = evaluate_novels_concurrently(novel_ids, max_workers=workers)
+        for novel in novels:
+            if novel.id in results:
+                logger.info(f"Evaluation complete: {novel.title} overall score {results[novel.id]['overall_score']}")
+            else:
+                logger.error(f"Failed to evaluate novel {novel.title}")
+    else:
+        evaluator = NovelEvaluator(session)
+        
+        for novel in novels:
+            logger.info(f"Evaluating novel: {novel.title} by {novel.author}")
+            result = evaluator.evaluate_novel(novel.id)
+            
+            if result:
+                logger.info(f"Evaluation complete: Overall score {result['overall_score']}")
+            else:
+                logger.error(f"Failed to evaluate novel {novel.title}")
     
     logger.info(f"Completed evaluating {len(novels)} novels")
+    log_llm_summaries()
+
+def log_llm_summaries():
+    """応答キャッシュ・トークン使用量・API呼び出しの集計をログに出力"""
+    response_cache = get_shared_response_cache()
+    if response_cache:
+        logger.info(response_cache.summary())
+    logger.info(get_shared_usage_stats().summary())
+    logger.info(get_shared_call_log().summary())
+
+def process_evaluation_jobs(session: Session, limit: int = 100, enqueue: bool = False, work: bool = False, threads: int = 1):
+    """
+    評価ジョブの登録と処理
+
+    enqueueの場合は未評価の小説をランキング順に最大limit件までevaluation_jobsに登録し、
+    workの場合はジョブがなくなるまで評価する（複数のプロセス・マシンで同時に実行できる）
+    """
+    if enqueue:
+        count = enqueue_evaluation_jobs(session, limit=limit)
+        logger.info(f"Enqueued {count} evaluation jobs")
+    if work:
+        run_job_worker(threads=threads)
+        log_llm_summaries()
+    counts = get_evaluation_job_counts(session)
+    logger.info("Evaluation jobs: " + ", ".join(f"{status}={count}" for status, count in sorted(counts.items())))
+    
 
 def display_results(session: Session, limit: int = 10):
     """
@@ -120,24 +217,110 @@ def main():
     parser.add_argument("--evaluate", action="store_true", help="小説を評価")
     parser.add_argument("--results", action="store_true", help="評価結果を表示")
     parser.add_argument("--limit", type=int, default=100, help="処理する小説数")
+    parser.add_argument("--workers", type=int, default=1, help="スクレイピングの並列ワーカー数（2以上で並列取得）")
+    parser.add_argument("--incremental", action="store_true", help="保存済みの1話目は本文を再取得しない")
+    parser.add_argument("--crawl", action="store_true", help="複数のランキングを巡回して小説データを取得")
+    parser.add_argument("--rankings", nargs="*", default=None, help="巡回するランキング（例: all/daily fantasy/weekly）")
+    parser.add_argument("--record-http", metavar="PATH", help="スクレイピング時の通信をアーカイブに記録")
+    parser.add_argument("--replay-http", metavar="PATH", help="記録済みのアーカイブから通信を再生（オフライン実行）")
+    parser.add_argument("--pipeline", action="store_true", help="取得・保存・評価をパイプラインで並行実行")
+    parser.add_argument("--eval-workers", type=int, default=None, help="評価の並列ワーカー数（パイプライン実行時の評価ワーカー数）")
+    parser.add_argument("--bypass-llm-cache", action="store_true", help="LLMの応答キャッシュを使わずに再評価（応答は保存する）")
+    parser.add_argument("--pack", action="store_true", help="短い作品をまとめたリクエストで評価")
+    parser.add_argument("--adaptive", action="store_true", help="評価が不確かな作品だけを複数回評価して平均する")
+    parser.add_argument("--llm-stream", action="store_true", help="LLMの応答をストリーミングで受信し、JSONが揃った時点で打ち切る")
+    parser.add_argument("--batch-export", metavar="PATH", help="未評価の小説の評価リクエストをバッチAPI用のJSONLに書き出す")
+    parser.add_argument("--batch-ingest", metavar="PATH", help="バッチAPIの結果JSONLから評価結果を取り込む")
+    parser.add_argument("--store-raw", action="store_true", help="取得したページの生データを保存（再解析用）")
+    parser.add_argument("--reparse", action="store_true", help="保存済みの生データから全エピソードの本文を作り直す")
+    parser.add_argument("--index-episodes", action="store_true", help="署名が未作成（または計算方法が古い）の保存済みエピソードに近似重複検出用の署名を作成")
+    parser.add_argument("--enqueue-jobs", action="store_true", help="未評価の小説を評価ジョブとして登録")
+    parser.add_argument("--job-worker", action="store_true", help="評価ジョブがなくなるまで評価（複数プロセス・マシンで並行実行可）")
     
     args = parser.parse_args()
+    if args.pack and args.adaptive:
+        parser.error("--pack と --adaptive は同時に指定できません（複数回の評価はまとめたリクエストに対応していません）")
+    if (args.pack or args.adaptive) and (args.pipeline or args.job_worker):
+        parser.error("--pack と --adaptive は --evaluate でのみ使用できます（--pipeline・--job-worker では1作品ずつ評価します）")
     
     # デフォルトの動作（引数なし）
-    if not (args.scrape or args.evaluate or args.results):
+    batch_mode = args.batch_export or args.batch_ingest
+    job_mode = args.enqueue_jobs or args.job_worker
+    if not (args.scrape or args.crawl or args.evaluate or args.results or args.reparse or batch_mode or job_mode
+            or args.index_episodes):
         args.scrape = True
         args.evaluate = True
         args.results = True
     
+    # 通信の記録・再生
+    if args.record_http:
+        settings.http_archive_mode = "record"
+        settings.http_archive_path = args.record_http
+    elif args.replay_http:
+        settings.http_archive_mode = "replay"
+        settings.http_archive_path = args.replay_http
+    if args.bypass_llm_cache:
+        settings.llm_cache_bypass = True
+    if args.llm_stream:
+        settings.llm_stream = True
+    if args.store_raw:
+        settings.raw_store_enabled = True
+    
     # DBセッション作成
     session = SessionLocal()
     
     try:
-        if args.scrape:
-            scrape_novels(session, limit=args.limit)
+        if args.reparse:
+            # 再取得せずに保存済みのページから本文を作り直す（--workersはプロセス数）
+            reparse_episodes(session, workers=args.workers if args.workers > 1 else None)
+        
+        if args.index_episodes:
+            # 署名の導入前に保存したエピソードの署名を作成（近似重複の評価の再利用に必要）
+            count = index_missing_episode_signatures(session)
+            logger.info(f"Indexed {count} episode signatures")
         
-        if args.evaluate:
-            evaluate_novels(session, limit=args.limit)
+        if args.batch_ingest:
+            ingest_batch_results(session, args.batch_ingest)
+        if args.batch_export:
+            write_batch_requests(session, args.batch_export, limit=args.limit)
+        
+        if job_mode:
+            process_evaluation_jobs(
+                session,
+                limit=args.limit,
+                enqueue=args.enqueue_jobs,
+                work=args.job_worker,
+                threads=args.eval_workers or 1
+            )
+        
+        if args.pipeline:
+            # スクレイピングと評価をまとめて実行
+            run_pipeline(
+                limit=args.limit,
+                scrape_workers=args.workers if args.workers > 1 else None,
+                evaluate_workers=args.eval_workers,
+                incremental=args.incremental
+            )
+        else:
+            if args.crawl:
+                crawl_rankings(
+                    session,
+                    rankings=args.rankings,
+                    limit=args.limit,
+                    workers=args.workers if args.workers > 1 else None,
+                    incremental=args.incremental
+                )
+            elif args.scrape:
+                scrape_novels(session, limit=args.limit, workers=args.workers, incremental=args.incremental)
+            
+            if args.evaluate:
+                evaluate_novels(
+                    session,
+                    limit=args.limit,
+                    workers=args.eval_workers or 1,
+                    pack=args.pack,
+                    adaptive=args.adaptive
+                )
         
         if args.results:
             display_results(session, limit=args.limit)
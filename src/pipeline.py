@@ -0,0 +1,196 @@
+import logging
+import threading
+import time
+from queue import Queue
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config import settings
+from src.db.database import SessionLocal
+from src.db.minhash import minhash_signature
+from src.db.repository import save_scraped_novel, get_known_episode_ids
+from src.evaluator.evaluator import NovelEvaluator
+from src.evaluator.response_cache import get_shared_response_cache
+from src.evaluator.usage import get_shared_usage_stats
+from src.evaluator.call_log import get_shared_call_log
+from src.scraper.kakuyomu import KakuyomuScraper
+
+logger = logging.getLogger(__name__)
+
+# ワーカーに終了を伝えるための番兵
+_STOP = object()
+
+
+class PipelineStats:
+    """パイプライン実行の集計（スレッドセーフ）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.first_result_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.counts = {'scraped': 0, 'saved': 0, 'evaluated': 0, 'failed': 0}
+
+    def increment(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] += 1
+            if name == 'evaluated' and self.first_result_at is None:
+                self.first_result_at = time.monotonic()
+
+    def summary(self) -> str:
+        """ログ出力用の集計"""
+        total = (self.finished_at or time.monotonic()) - self.started_at
+        first = f"{self.first_result_at - self.started_at:.1f}s" if self.first_result_at else "-"
+        return (
+            f"Pipeline: {self.counts['scraped']} scraped, {self.counts['saved']} saved, "
+            f"{self.counts['evaluated']} evaluated, {self.counts['failed']} failed; "
+            f"first result after {first}, total {total:.1f}s"
+        )
+
+
+def _start_workers(name: str, count: int, target: Callable[[], None]) -> List[threading.Thread]:
+    threads = []
+    for i in range(max(1, count)):
+        thread = threading.Thread(target=target, name=f"{name}-{i}", daemon=True)
+        thread.start()
+        threads.append(thread)
+    return threads
+
+
+def _stop_workers(queue: Queue, threads: List[threading.Thread]) -> None:
+    """全ワーカーに番兵を送り、終了を待つ"""
+    for _ in threads:
+        queue.put(_STOP)
+    for thread in threads:
+        thread.join()
+
+
+def run_pipeline(
+    limit: int = 100,
+    scrape_workers: Optional[int] = None,
+    evaluate_workers: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    incremental: bool = False
+) -> Dict[str, Any]:
+    """
+    スクレイピング → DB保存 → 評価 をパイプラインで実行
+
+    各ステージは上限付きキューでつながっており、エピソードを取得した小説から
+    順に保存・評価へ流れる。キューが一杯になると前段が待機するため
+    メモリ使用量は一定に保たれ、全体の所要時間は最も遅いステージ程度になる。
+    DBセッションは保存ステージと評価ワーカーごとに個別に作成する
+
+    Args:
+        limit: 処理する小説数
+        scrape_workers: エピソード取得のワーカー数（省略時はsettings.scrape_max_workers）
+        evaluate_workers: 評価のワーカー数（省略時はsettings.evaluate_workers）
+        queue_size: ステージ間キューの上限（省略時はsettings.pipeline_queue_size）
+        incremental: 保存済みの1話目は本文を取得せずランキング順位だけを更新する
+
+    Returns:
+        小説IDをキー、評価結果を値とする辞書
+    """
+    if scrape_workers is None:
+        scrape_workers = settings.scrape_max_workers
+    if evaluate_workers is None:
+        evaluate_workers = settings.evaluate_workers
+    if queue_size is None:
+        queue_size = settings.pipeline_queue_size
+
+    logger.info(
+        f"Starting pipeline for top {limit} novels "
+        f"(scrape workers: {scrape_workers}, evaluate workers: {evaluate_workers}, queue size: {queue_size})"
+    )
+
+    stats = PipelineStats()
+    results: Dict[str, Dict[str, Any]] = {}
+    results_lock = threading.Lock()
+
+    fetch_queue: Queue = Queue(maxsize=queue_size)
+    store_queue: Queue = Queue(maxsize=queue_size)
+    evaluate_queue: Queue = Queue(maxsize=queue_size)
+
+    scraper = KakuyomuScraper()
+    known_episode_ids = None
+
+    def scrape_worker():
+        while True:
+            novel = fetch_queue.get()
+            if novel is _STOP:
+                return
+            try:
+                episodes = scraper.get_episodes(novel['id'], known_episode_ids=known_episode_ids)
+                # 近似重複検出用の署名は保存ステージ（1スレッド）ではなく取得ワーカーで計算する
+                for episode in episodes:
+                    if episode.get('content'):
+                        episode['signature'] = minhash_signature(episode['content'])
+                stats.increment('scraped')
+            except Exception as e:
+                logger.error(f"Error scraping novel {novel['id']}: {e}")
+                episodes = []
+            store_queue.put((novel, episodes))
+
+    def store_worker():
+        # DBへの書き込みはこのスレッドだけで行う
+        session = SessionLocal()
+        try:
+            while True:
+                item = store_queue.get()
+                if item is _STOP:
+                    return
+                novel, episodes = item
+                if save_scraped_novel(session, novel, episodes):
+                    stats.increment('saved')
+                    evaluate_queue.put(novel['id'])
+                else:
+                    stats.increment('failed')
+        finally:
+            session.close()
+
+    def evaluate_worker():
+        session = SessionLocal()
+        evaluator = NovelEvaluator(session)
+        try:
+            while True:
+                novel_id = evaluate_queue.get()
+                if novel_id is _STOP:
+                    return
+                result = evaluator.evaluate_novel(novel_id)
+                if result:
+                    stats.increment('evaluated')
+                    with results_lock:
+                        results[novel_id] = result
+        finally:
+            session.close()
+
+    novels = scraper.get_daily_ranking(limit=limit)
+    if incremental:
+        session = SessionLocal()
+        try:
+            known_episode_ids = get_known_episode_ids(session, [novel['id'] for novel in novels])
+        finally:
+            session.close()
+
+    scrape_threads = _start_workers("scrape", scrape_workers, scrape_worker)
+    store_threads = _start_workers("store", 1, store_worker)
+    evaluate_threads = _start_workers("evaluate", evaluate_workers, evaluate_worker)
+
+    try:
+        for novel in novels:
+            fetch_queue.put(novel)
+    finally:
+        # 前段から順に終了させ、キューに残った項目を処理し切る
+        _stop_workers(fetch_queue, scrape_threads)
+        _stop_workers(store_queue, store_threads)
+        _stop_workers(evaluate_queue, evaluate_threads)
+
+    stats.finished_at = time.monotonic()
+    logger.info(stats.summary())
+    if scraper.http_cache:
+        logger.info(scraper.http_cache.summary())
+    response_cache = get_shared_response_cache()
+    if response_cache:
+        logger.info(response_cache.summary())
+    logger.info(get_shared_usage_stats().summary())
+    logger.info(get_shared_call_log().summary())
+    scraper.close()
+    return results
@@ -0,0 +1,109 @@
+import logging
+import lzma
+import os
+import zlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.config import settings
+from src.db.minhash import minhash_signature
+from src.db.repository import get_all_episode_ids, update_episode_contents
+from src.scraper.cache import HttpCache
+from src.scraper.kakuyomu import parse_episode_text
+from src.scraper.raw_store import RawPageStore, read_blob
+
+logger = logging.getLogger(__name__)
+
+
+def episode_url(episode_id: str, base_url: Optional[str] = None) -> str:
+    """エピソードID（"作品ID-エピソードID"）からエピソードページのURLを作成"""
+    novel_id, _, episode = episode_id.partition('-')
+    return f"{base_url or settings.kakuyomu_base_url}/works/{novel_id}/episodes/{episode}"
+
+
+def _reparse_page(task: Tuple[str, str, str, Optional[str]]) -> Tuple[str, Optional[str], Optional[List[int]]]:
+    """保存済みのページを展開して本文と近似重複検出用の署名を作成（プロセスプールのワーカーで実行）"""
+    episode_id, path, codec, encoding = task
+    try:
+        body = read_blob(path, codec).decode(encoding or 'utf-8', errors='replace')
+        text = parse_episode_text(body)
+        return episode_id, text, minhash_signature(text) if text else None
+    except (OSError, ValueError, EOFError, lzma.LZMAError, zlib.error) as e:
+        # 壊れたblobはそのページだけを飛ばし、再解析全体は止めない
+        logger.error(f"Error reparsing {episode_id} from {path}: {e}")
+        return episode_id, None, None
+
+
+def reparse_episodes(
+    session: Session,
+    workers: Optional[int] = None,
+    batch_size: int = 500,
+    store: Optional[RawPageStore] = None
+) -> Dict[str, int]:
+    """
+    生データのストアに保存したページから全エピソードの本文を作り直す
+
+    ページの展開と整形、署名の計算はプロセスプールで並列に行い、DBへの書き込みは
+    このプロセスから batch_size 件ずつまとめて行う。ストアにないエピソードは変更しない。
+    次回のスクレイピングで古い整形結果が書き戻されないよう、HTTPキャッシュの解析結果も破棄する
+
+    Args:
+        session: DBセッション
+        workers: プロセス数（省略時はsettings.reparse_workers、0ならCPU数）
+        batch_size: まとめて処理・更新するエピソード数
+        store: 生データのストア（省略時は設定の場所を開く）
+
+    Returns:
+        {'episodes', 'missing', 'failed', 'updated'} の件数
+    """
+    if workers is None:
+        workers = settings.reparse_workers or os.cpu_count() or 1
+    own_store = store is None
+    store = store or RawPageStore()
+    counts = {'episodes': 0, 'missing': 0, 'failed': 0, 'updated': 0}
+    start = time.monotonic()
+
+    try:
+        episode_ids = get_all_episode_ids(session)
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+            for offset in range(0, len(episode_ids), batch_size):
+                tasks: List[Tuple[str, str, str, Optional[str]]] = []
+                for episode_id in episode_ids[offset:offset + batch_size]:
+                    counts['episodes'] += 1
+                    entry = store.latest(episode_url(episode_id))
+                    if entry is None:
+                        counts['missing'] += 1
+                        continue
+                    tasks.append((episode_id, entry['path'], entry['codec'], entry['encoding']))
+
+                contents = {}
+                signatures = {}
+                for episode_id, text, signature in executor.map(_reparse_page, tasks, chunksize=16):
+                    if text:
+                        contents[episode_id] = text
+                        signatures[episode_id] = signature
+                    else:
+                        counts['failed'] += 1
+                if contents:
+                    counts['updated'] += update_episode_contents(session, contents, signatures)
+                logger.info(f"Reparsed {counts['episodes']}/{len(episode_ids)} episodes")
+    finally:
+        if own_store:
+            store.close()
+
+    if os.path.exists(settings.http_cache_path):
+        http_cache = HttpCache()
+        try:
+            cleared = http_cache.clear_parsed()
+        finally:
+            http_cache.close()
+        logger.info(f"Cleared {cleared} parsed episodes from HTTP cache")
+
+    logger.info(
+        f"Reparse finished in {time.monotonic() - start:.1f}s: {counts['episodes']} episodes, "
+        f"{counts['updated']} updated, {counts['missing']} not in store, {counts['failed']} failed"
+    )
+    return counts
@@ -0,0 +1,157 @@
+import base64
+import gzip
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config import settings
+from src.scraper.utils import build_response
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_body(body: bytes) -> Dict[str, str]:
+    """本文はUTF-8として読めればそのまま、読めなければbase64で保存する"""
+    try:
+        return {'body': body.decode('utf-8'), 'body_encoding': 'utf-8'}
+    except UnicodeDecodeError:
+        return {'body': base64.b64encode(body).decode('ascii'), 'body_encoding': 'base64'}
+
+
+def _decode_body(record: Dict[str, Any]) -> bytes:
+    if record.get('body_encoding') == 'base64':
+        return base64.b64decode(record['body'])
+    return record['body'].encode('utf-8')
+
+
+class HttpArchiveWriter:
+    """
+    リクエストとレスポンスをgzip圧縮したJSONLに追記する（スレッドセーフ）
+
+    1行が1回のGETに対応し、URL・ステータス・ヘッダー・本文・所要時間を保存する
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, 'at', encoding='utf-8')
+        self.count = 0
+
+    def write(self, request: requests.PreparedRequest, response: requests.Response, elapsed: float) -> None:
+        record = {
+            'method': request.method,
+            'url': request.url,
+            'status': response.status_code,
+            'headers': dict(response.headers),
+            'elapsed': round(elapsed, 4),
+            'recorded_at': time.time(),
+        }
+        record.update(_encode_body(response.content))
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + '\n')
+            self.count += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class HttpArchive:
+    """
+    記録済みのアーカイブを読み込み、URLからレスポンスを引けるようにする
+
+    同じURLが複数回記録されている場合は最後の記録を使用する
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records: Dict[str, Dict[str, Any]] = {}
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self.records[record['url']] = record
+        logger.info(f"Loaded {len(self.records)} responses from HTTP archive {path}")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        return self.records.get(url)
+
+
+class RecordingAdapter(HTTPAdapter):
+    """実際のサーバーへのリクエストとレスポンスをアーカイブに記録するアダプタ"""
+
+    def __init__(self, writer: HttpArchiveWriter, **kwargs):
+        super().__init__(**kwargs)
+        self.writer = writer
+
+    def send(self, request, **kwargs):
+        start = time.monotonic()
+        response = super().send(request, **kwargs)
+        # 記録のため本文を読み切る（スクレイパーはストリーミングを使用しない）
+        response.content
+        self.writer.write(request, response, time.monotonic() - start)
+        return response
+
+    def close(self):
+        super().close()
+        self.writer.close()
+
+
+class ReplayAdapter(HTTPAdapter):
+    """
+    アーカイブからレスポンスを返すアダプタ（ネットワークには接続しない）
+
+    latencyを指定すると各レスポンスをその秒数（±jitter）だけ遅らせ、
+    latency=Noneの場合は記録時の所要時間を再現する。記録にないURLは404を返す
+    """
+
+    def __init__(self, archive: HttpArchive, latency: Optional[float] = 0.0, jitter: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+        self.latency = latency
+        self.jitter = jitter
+        self.misses = 0
+
+    def send(self, request, **kwargs):
+        record = self.archive.get(request.url)
+        if record is None:
+            self.misses += 1
+            logger.warning(f"URL not found in HTTP archive: {request.url}")
+            return build_response(request, 404, {}, b'', connection=self)
+
+        delay = record.get('elapsed', 0.0) if self.latency is None else self.latency
+        if self.jitter:
+            delay += random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        return build_response(request, record['status'], record['headers'], _decode_body(record), connection=self)
+
+
+def create_archive_adapter(pool_maxsize: int) -> Optional[HTTPAdapter]:
+    """
+    settings.http_archive_mode に応じた記録・再生用アダプタを作成
+
+    "record" の場合は記録用、"replay" の場合は再生用のアダプタを返し、それ以外はNone
+    """
+    mode = settings.http_archive_mode
+    if mode == 'record':
+        logger.info(f"Recording HTTP traffic to {settings.http_archive_path}")
+        return RecordingAdapter(HttpArchiveWriter(settings.http_archive_path), pool_maxsize=pool_maxsize)
+    if mode == 'replay':
+        return ReplayAdapter(
+            HttpArchive(settings.http_archive_path),
+            latency=settings.http_replay_latency if settings.http_replay_latency >= 0 else None,
+            pool_maxsize=pool_maxsize
+        )
+    return None
@@ -0,0 +1,259 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config import settings
+from src.scraper.utils import build_response
+
+logger = logging.getLogger(__name__)
+
+
+def classify_url(url: str) -> str:
+    """キャッシュTTLを決めるためのURL種別を返す（ranking / episode / work / other）"""
+    if '/rankings/' in url:
+        return 'ranking'
+    if '/episodes/' in url:
+        return 'episode'
+    if '/works/' in url:
+        return 'work'
+    return 'other'
+
+
+class HttpCache:
+    """
+    条件付きGET用のディスクキャッシュ（SQLite）
+
+    レスポンス本文をETag / Last-Modifiedと共に保存し、
+    合計サイズが上限を超えた場合は最終アクセスが古いものから削除する（LRU）
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        ttls: Optional[Dict[str, float]] = None
+    ):
+        self.path = path or settings.http_cache_path
+        self.max_bytes = max_bytes if max_bytes is not None else settings.http_cache_max_bytes
+        self.ttls = ttls if ttls is not None else {
+            'ranking': settings.http_cache_ttl_ranking,
+            'work': settings.http_cache_ttl_work,
+            'episode': settings.http_cache_ttl_episode,
+            'other': 0.0,
+        }
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                parsed TEXT,
+                parser_version TEXT,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(http_cache)")}
+        if 'parser_version' not in columns:
+            # 解析処理のバージョンを持たない古いキャッシュの解析結果は使わない
+            self._conn.execute("ALTER TABLE http_cache ADD COLUMN parser_version TEXT")
+            self._conn.execute("UPDATE http_cache SET parsed = NULL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_http_cache_last_access ON http_cache (last_access)")
+        self._conn.commit()
+
+    def ttl_for(self, url: str) -> float:
+        """URL種別ごとのTTL（秒）。TTL内はサーバーに問い合わせずキャッシュを返す"""
+        return self.ttls.get(classify_url(url), 0.0)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """キャッシュエントリを取得（最終アクセス時刻を更新）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body, etag, last_modified, stored_at FROM http_cache WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE http_cache SET last_access = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+        return {
+            'status': row[0],
+            'headers': json.loads(row[1]),
+            'body': row[2],
+            'etag': row[3],
+            'last_modified': row[4],
+            'stored_at': row[5],
+        }
+
+    def is_fresh(self, url: str, entry: Dict[str, Any]) -> bool:
+        """TTL内のエントリかどうか"""
+        return time.time() - entry['stored_at'] < self.ttl_for(url)
+
+    def has_fresh(self, url: str) -> bool:
+        """TTL内のエントリがあるかどうか（本文は読まず、最終アクセス時刻も更新しない）"""
+        ttl = self.ttl_for(url)
+        if ttl <= 0:
+            return False
+        with self._lock:
+            row = self._conn.execute("SELECT stored_at FROM http_cache WHERE url = ?", (url,)).fetchone()
+        return row is not None and time.time() - row[0] < ttl
+
+    def store(self, url: str, response: requests.Response) -> None:
+        """200レスポンスを保存（検証子がない場合もTTL用に保存する）"""
+        body = response.content
+        headers = dict(response.headers)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO http_cache
+                    (url, status, headers, body, etag, last_modified, parsed, parser_version, size, stored_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, NULL, NULL, ?, ?, ?)
+                """,
+                (
+                    url, response.status_code, json.dumps(headers), body,
+                    response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                    len(body), now, now
+                )
+            )
+            self._conn.commit()
+            self.stats['stores'] += 1
+            self._evict()
+
+    def touch(self, url: str) -> None:
+        """304で再検証できたエントリの保存時刻を更新"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE http_cache SET stored_at = ?, last_access = ? WHERE url = ?",
+                (now, now, url)
+            )
+            self._conn.commit()
+
+    def get_parsed(self, url: str, parser_version: str) -> Optional[str]:
+        """
+        本文から生成した解析結果を取得
+
+        本文が更新されると破棄され、解析処理のバージョンが異なる結果は返さない
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT parsed, parser_version FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None or row[1] != parser_version:
+            return None
+        return row[0]
+
+    def set_parsed(self, url: str, parsed: str, parser_version: str) -> None:
+        """本文から生成した解析結果を解析処理のバージョンと共に保存"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE http_cache SET parsed = ?, parser_version = ? WHERE url = ?",
+                (parsed, parser_version, url)
+            )
+            self._conn.commit()
+
+    def clear_parsed(self) -> int:
+        """すべての解析結果を破棄（本文の再解析後に古い結果を使わないようにする）"""
+        with self._lock:
+            cursor = self._conn.execute("UPDATE http_cache SET parsed = NULL, parser_version = NULL WHERE parsed IS NOT NULL")
+            self._conn.commit()
+            return cursor.rowcount
+
+    def _evict(self) -> None:
+        """合計サイズが上限を超えている間、最終アクセスが古いエントリを削除"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT url, size FROM http_cache ORDER BY last_access").fetchall()
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+            total -= size
+            self.stats['evictions'] += 1
+        self._conn.commit()
+
+    def record(self, name: str) -> None:
+        """集計カウンタを加算"""
+        with self._lock:
+            self.stats[name] += 1
+
+    def summary(self) -> str:
+        """ログ出力用のヒット・ミス集計"""
+        return (
+            f"HTTP cache: {self.stats['hits']} hits, {self.stats['revalidated']} revalidated (304), "
+            f"{self.stats['misses']} misses, {self.stats['evictions']} evictions"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachingAdapter(HTTPAdapter):
+    """
+    HttpCacheを使って条件付きGETを行うrequests用アダプタ
+
+    TTL内のエントリはリクエストを送らずに返し、TTL切れのエントリは
+    If-None-Match / If-Modified-Since を付けて再検証する。
+    キャッシュから返したレスポンスには from_cache = True が設定される
+    """
+
+    def __init__(self, cache: HttpCache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET':
+            return super().send(request, **kwargs)
+
+        url = request.url
+        entry = self.cache.get(url)
+        if entry and self.cache.is_fresh(url, entry):
+            self.cache.record('hits')
+            return self._build_cached_response(request, entry)
+
+        if entry:
+            if entry['etag']:
+                request.headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request.headers['If-Modified-Since'] = entry['last_modified']
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and entry:
+            response.close()
+            self.cache.touch(url)
+            self.cache.record('revalidated')
+            return self._build_cached_response(request, entry)
+
+        self.cache.record('misses')
+        if response.status_code == 200:
+            self.cache.store(url, response)
+        response.from_cache = False
+        return response
+
+    def _build_cached_response(self, request, entry: Dict[str, Any]) -> requests.Response:
+        response = build_response(request, entry['status'], entry['headers'], entry['body'], connection=self)
+        response.from_cache = True
+        return response
@@ -0,0 +1,111 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from src.config import settings
+from src.scraper.kakuyomu import KakuyomuScraper
+
+logger = logging.getLogger(__name__)
+
+# カクヨムのランキングのジャンルと集計期間
+RANKING_GENRES = [
+    "all", "fantasy", "action", "sf", "love_story", "romance", "drama",
+    "horror", "mystery", "nonfiction", "history", "criticism", "others", "fan_fiction",
+]
+RANKING_PERIODS = ["daily", "weekly", "monthly"]
+
+
+def build_rankings(genres: Optional[Iterable[str]] = None, periods: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    ジャンルと期間の組み合わせから "ジャンル/期間" 形式のランキング名を作成
+
+    省略時は settings.crawl_genres / settings.crawl_periods（カンマ区切り、"*" は全て）を使用する
+    """
+    if genres is None:
+        genres = _split_setting(settings.crawl_genres, RANKING_GENRES)
+    if periods is None:
+        periods = _split_setting(settings.crawl_periods, RANKING_PERIODS)
+    return [f"{genre}/{period}" for genre in genres for period in periods]
+
+
+def _split_setting(value: str, all_values: List[str]) -> List[str]:
+    if value.strip() == "*":
+        return list(all_values)
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class RankingCrawler:
+    """
+    複数のランキングを巡回し、重複を除いた作品ごとに1回だけ作品ページを取得するクローラー
+
+    各ランキングで見つかった作品は作品IDをキーとするフロンティアにまとめられ、
+    ランキングごとの掲載順位は memberships に記録される
+    """
+
+    def __init__(self, scraper: Optional[KakuyomuScraper] = None):
+        self.scraper = scraper or KakuyomuScraper()
+        # 作品ID → 作品情報（ranking_positionは掲載順位の最上位）
+        self.frontier: Dict[str, Dict] = {}
+        # 作品ID → [{'ranking': "ジャンル/期間", 'position': 順位}, ...]
+        self.memberships: Dict[str, List[Dict]] = {}
+
+    def collect(self, rankings: Iterable[str], limit: int = 100, max_workers: Optional[int] = None) -> Dict[str, Dict]:
+        """
+        ランキングページを並列に取得し、作品をフロンティアに統合
+
+        Args:
+            rankings: "ジャンル/期間" 形式のランキング名のリスト
+            limit: ランキングごとの取得件数
+            max_workers: ワーカースレッド数（省略時はsettings.scrape_max_workers）
+
+        Returns:
+            作品IDをキーとするフロンティア
+        """
+        rankings = list(rankings)
+        if max_workers is None:
+            max_workers = settings.scrape_max_workers
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            pages = list(executor.map(lambda ranking: self.scraper.get_ranking(ranking, limit), rankings))
+
+        entries = 0
+        for ranking, novels in zip(rankings, pages):
+            for novel in novels:
+                entries += 1
+                self._add(ranking, novel)
+
+        logger.info(
+            f"Collected {len(self.frontier)} unique works from {entries} entries in {len(rankings)} rankings"
+        )
+        return self.frontier
+
+    def _add(self, ranking: str, novel: Dict) -> None:
+        position = novel['ranking_position']
+        work = self.frontier.get(novel['id'])
+        if work is None:
+            self.frontier[novel['id']] = dict(novel)
+        else:
+            # 著者やジャンルが取れていない場合は他のランキングの情報で補う
+            for key in ('author', 'genre'):
+                if work.get(key) in (None, "不明") and novel.get(key):
+                    work[key] = novel[key]
+            work['ranking_position'] = min(work['ranking_position'], position)
+        self.memberships.setdefault(novel['id'], []).append({'ranking': ranking, 'position': position})
+
+    def fetch_episodes(
+        self,
+        max_workers: Optional[int] = None,
+        known_episode_ids: Optional[Set[str]] = None
+    ) -> Iterator[Tuple[Dict, List[Dict]]]:
+        """
+        フロンティアの作品ごとに作品ページを1回だけ取得し、先頭のエピソードを取得
+
+        取得は KakuyomuScraper.fetch_episodes の並列取得（レート制限付き）で行う
+
+        Returns:
+            (作品情報, エピソードデータのリスト) のイテレータ
+        """
+        for novel_id, episodes in self.scraper.fetch_episodes(
+            self.frontier.keys(), max_workers=max_workers, known_episode_ids=known_episode_ids
+        ):
+            yield self.frontier[novel_id], episodes
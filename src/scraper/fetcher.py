@@ -0,0 +1,222 @@
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from src.config import settings
+from src.scraper.cache import HttpCache
+from src.scraper.utils import RateLimiter, HostConcurrencyLimiter
+
+logger = logging.getLogger(__name__)
+
+# サーバーの過負荷・一時的な障害を示し、リトライの対象とするステータス
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(response: requests.Response) -> Optional[float]:
+    """
+    Retry-Afterヘッダー（秒数またはHTTP日付）から待機秒数を取得
+
+    ヘッダーがない、または解釈できない場合はNone
+    """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class CircuitBreaker:
+    """
+    ホストごとのサーキットブレーカー（スレッドセーフ）
+
+    連続失敗が failure_threshold 回に達すると cooldown 秒間そのホストへの送信を止める。
+    再開後も失敗が続く場合は停止時間を倍にし（最大 max_cooldown 秒）、成功すれば元に戻す
+    """
+
+    def __init__(
+        self,
+        failure_threshold: Optional[int] = None,
+        cooldown: Optional[float] = None,
+        max_cooldown: float = 600.0
+    ):
+        self.failure_threshold = max(1, failure_threshold if failure_threshold is not None else settings.circuit_breaker_threshold)
+        self.base_cooldown = cooldown if cooldown is not None else settings.circuit_breaker_cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = self.base_cooldown
+        self.failures = 0
+        self.open_until = 0.0
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """ブレーカーが開いている間は待機"""
+        while True:
+            with self._lock:
+                remaining = self.open_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def pause(self, seconds: float) -> None:
+        """指定秒数だけ送信を止める（Retry-After用）"""
+        with self._lock:
+            self.open_until = max(self.open_until, time.monotonic() + seconds)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+
+    def record_failure(self) -> bool:
+        """失敗を記録し、ブレーカーが開いた場合はTrueを返す"""
+        with self._lock:
+            self.failures += 1
+            if self.failures < self.failure_threshold:
+                return False
+            self.failures = 0
+            self.trips += 1
+            self.open_until = max(self.open_until, time.monotonic() + self.cooldown)
+            cooldown = self.cooldown
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+        logger.warning(f"Circuit breaker opened for {cooldown:.0f} seconds")
+        return True
+
+
+class AdaptiveFetcher:
+    """
+    スクレイパー共通の取得処理
+
+    - 接続・読み込みタイムアウトを設定してGETする
+    - 429・5xx・接続エラー・タイムアウトは指数バックオフ（Retry-Afterがあればその秒数）でリトライ
+    - ホストごとの同時接続数と全体の送信間隔をAIMDで調整し、サイトが許容する速度に収束させる
+    - 連続して失敗したホストはサーキットブレーカーで一定時間停止する
+    - HTTPキャッシュのTTL内のページはネットワークに接続しないため、上記の制限を通さずに返す
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        rate_limiter: Optional[RateLimiter] = None,
+        host_limiter: Optional[HostConcurrencyLimiter] = None,
+        max_retries: Optional[int] = None,
+        timeout: Optional[Tuple[float, float]] = None,
+        cache: Optional[HttpCache] = None
+    ):
+        """
+        Args:
+            cache: セッションのCachingAdapterが使うHTTPキャッシュ（TTL内のページの判定に使用）
+        """
+        self.session = session
+        self.cache = cache
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.host_limiter = host_limiter or HostConcurrencyLimiter()
+        self.max_retries = max(1, max_retries if max_retries is not None else settings.max_retries)
+        self.timeout = timeout or (settings.scrape_connect_timeout, settings.scrape_read_timeout)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'cached': 0, 'retries': 0, 'throttled': 0, 'errors': 0}
+
+    def _breaker(self, url: str) -> CircuitBreaker:
+        host = urlparse(url).netloc
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker()
+                self._breakers[host] = breaker
+            return breaker
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def get(self, url: str, max_retries: Optional[int] = None) -> requests.Response:
+        """
+        URLを取得し、成功したレスポンスを返す
+
+        Args:
+            url: 取得するURL
+            max_retries: 最大試行回数（省略時は self.max_retries）
+
+        Raises:
+            requests.HTTPError: リトライ対象外のエラーステータス、またはリトライ後も失敗した場合
+            requests.RequestException: リトライ後も接続できなかった場合
+        """
+        max_retries = max(1, max_retries) if max_retries is not None else self.max_retries
+        if self.cache is not None and self.cache.has_fresh(url):
+            # キャッシュから返すページは送信間隔と接続枠を使わずに取得する
+            response = self.session.get(url, timeout=self.timeout)
+            if getattr(response, 'from_cache', False):
+                self._count('cached')
+                return response
+            # 確認した直後にTTLが切れて実際に送信された場合は、通常の取得としてやり直す
+
+        breaker = self._breaker(url)
+        last_error: Optional[requests.RequestException] = None
+
+        for attempt in range(max_retries):
+            breaker.wait()
+            response = None
+            with self.host_limiter.limit(url):
+                self.rate_limiter.acquire()
+                self._count('requests')
+                start = time.monotonic()
+                try:
+                    response = self.session.get(url, timeout=self.timeout)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    last_error = e
+                latency = time.monotonic() - start
+
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                self.host_limiter.on_success(url, latency)
+                self.rate_limiter.reward()
+                breaker.record_success()
+                # 404などリトライしても結果が変わらないエラーはそのまま送出
+                response.raise_for_status()
+                return response
+
+            # 過負荷・障害のシグナルを受けたので同時接続数と送信間隔を絞る
+            self.host_limiter.on_congestion(url)
+            self.rate_limiter.penalize()
+            breaker.record_failure()
+
+            retry_after = None
+            if response is not None:
+                self._count('throttled' if response.status_code == 429 else 'errors')
+                retry_after = parse_retry_after(response)
+                last_error = requests.HTTPError(
+                    f"{response.status_code} {response.reason} for url: {url}", response=response
+                )
+            else:
+                self._count('errors')
+
+            logger.warning(f"Attempt {attempt + 1}/{max_retries} failed for {url}: {last_error}")
+            if attempt == max_retries - 1:
+                break
+
+            self._count('retries')
+            if retry_after is not None:
+                # 他のスレッドも同じホストへの送信を止めるようブレーカー経由で待機
+                breaker.pause(min(retry_after, settings.scrape_max_retry_after))
+            else:
+                wait_time = (2 ** attempt) + random.random()
+                logger.info(f"Retrying in {wait_time:.2f} seconds...")
+                time.sleep(wait_time)
+
+        logger.error(f"Failed to fetch {url} after {max_retries} attempts")
+        raise last_error
@@ -1,90 +1,248 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple, Set
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 import re
+import json
+import sqlite3
 from datetime import datetime
-import html
 import logging
 from src.config import settings
+from src.scraper.utils import RateLimiter, HostConcurrencyLimiter
+from src.scraper.fetcher import AdaptiveFetcher
+from src.scraper.cache import HttpCache, CachingAdapter
+from src.scraper.archive import create_archive_adapter
+from src.scraper.raw_store import RawPageStore
+from src.scraper.text_normalizer import normalize_text
+from src.scraper.ranking_parser import parse_ranking_page
 
 logger = logging.getLogger(__name__)
 
-# 青空文庫形式のタグ（整形用）
-AO_RBI = '｜'            # ルビのかかり始め
-AO_RBL = '《'            # ルビ始め
-AO_RBR = '》'            # ルビ終わり
-AO_PB2 = '［＃改ページ］'  # ページ送り
-AO_EMB = '［＃丸傍点］'    # 傍点開始
-AO_EME = '［＃丸傍点終わり］' # 傍点終わり
-AO_PIB = '［＃リンクの図（'  # 画像埋め込み
-AO_PIE = '）入る］'        # 画像埋め込み終わり
+# 本文の段落（<p id="p...">...</p>）
+EPISODE_PARAGRAPH_RE = re.compile(r'<p id="p.*?</p>')
+
+def extract_episode_paragraphs(body: str) -> str:
+    """
+    エピソードページから本文の段落HTMLを抽出し、各段落の末尾に改行を付けて連結
+
+    ページ全体を1回走査するだけなので段落数に対して線形時間で処理できる
+    """
+    return ''.join([m.group(0) + '\r\n' for m in EPISODE_PARAGRAPH_RE.finditer(body)])
+
+# 本文の抽出・整形処理のバージョン（変更した場合は上げ、HTTPキャッシュに保存した整形結果を使わないようにする）
+EPISODE_PARSER_VERSION = "1"
+
+def parse_episode_text(body: str) -> Optional[str]:
+    """エピソードページのHTMLから整形済みの本文を作成（本文がなければNone）"""
+    text = extract_episode_paragraphs(body)
+    return normalize_text(text) if text else None
+
+# 作品ページに埋め込まれたNext.jsのデータ
+NEXT_DATA_RE = re.compile(r'<script id="__NEXT_DATA__" type="application/json">(.*?)</script>', re.DOTALL)
+EPISODE_JSON_RE = re.compile(r'"__typename":"Episode","id":"(.*?)","title":"(.*?)",')
+
+def parse_episode_toc(body: str, novel_id: Optional[str] = None) -> List[Dict]:
+    """
+    作品ページに埋め込まれたJSONから目次（エピソード一覧）を掲載順に取得
+
+    Apolloのキャッシュにある作品の目次（章 → エピソード）を辿り、
+    見つからない場合はEpisodeのエントリを出現順に使用する
+
+    Returns:
+        {'id', 'title', 'published_at'} の辞書のリスト
+    """
+    match = NEXT_DATA_RE.search(body)
+    if match:
+        try:
+            data = json.loads(match.group(1))
+            state = data.get('props', {}).get('pageProps', {}).get('__APOLLO_STATE__', {})
+            episodes = _toc_from_apollo_state(state, novel_id)
+            if episodes:
+                return episodes
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"Could not parse embedded JSON: {e}")
+
+    # JSONを解析できない場合はEpisodeのエントリを1回の走査で抽出
+    return [
+        {'id': m.group(1), 'title': m.group(2), 'published_at': None}
+        for m in EPISODE_JSON_RE.finditer(body)
+    ]
+
+def _toc_from_apollo_state(state: Dict, novel_id: Optional[str]) -> List[Dict]:
+    def resolve(ref):
+        return state.get(ref.get('__ref'), {}) if isinstance(ref, dict) else {}
+
+    def to_episode(entry):
+        return {'id': entry['id'], 'title': entry.get('title') or "", 'published_at': entry.get('publishedAt')}
+
+    episodes = []
+    seen = set()
+    works = [
+        entry for entry in state.values()
+        if isinstance(entry, dict) and entry.get('__typename') == 'Work'
+        and (novel_id is None or entry.get('id') == novel_id)
+    ]
+    for work in works[:1]:
+        for chapter_ref in work.get('tableOfContents') or []:
+            chapter = resolve(chapter_ref)
+            for episode_ref in chapter.get('episodeUnions') or chapter.get('episodes') or []:
+                entry = resolve(episode_ref)
+                if entry.get('__typename') == 'Episode' and entry.get('id') not in seen:
+                    seen.add(entry['id'])
+                    episodes.append(to_episode(entry))
+    if episodes:
+        return episodes
+
+    return [
+        to_episode(entry) for entry in state.values()
+        if isinstance(entry, dict) and entry.get('__typename') == 'Episode' and entry.get('id')
+    ]
 
 class KakuyomuScraper:
-    def __init__(self):
+    def __init__(self, adapter: Optional[HTTPAdapter] = None):
+        """
+        Args:
+            adapter: セッションにマウントするアダプタ（省略時は設定に応じて
+                記録・再生用、HTTPキャッシュ付き、通常のアダプタのいずれかを使用）
+        """
         self.base_url = settings.kakuyomu_base_url
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        # 並列取得時にコネクションを使い回せるようプールサイズを調整
+        pool_maxsize = max(settings.scrape_max_workers, 10)
+        self.http_cache = None
+        if adapter is None:
+            # 記録・再生時はHTTPキャッシュを経由しない
+            adapter = create_archive_adapter(pool_maxsize)
+        if adapter is None:
+            if settings.http_cache_enabled:
+                # 条件付きGETで未更新ページの再ダウンロードを省略
+                self.http_cache = HttpCache()
+                adapter = CachingAdapter(self.http_cache, pool_maxsize=pool_maxsize)
+            else:
+                adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.rate_limiter = RateLimiter()
+        self.host_limiter = HostConcurrencyLimiter()
+        self.fetcher = AdaptiveFetcher(self.session, self.rate_limiter, self.host_limiter, cache=self.http_cache)
+        # 取得したページの生データを保存（後から再取得せずに再解析できるようにする）
+        self.raw_store = RawPageStore() if settings.raw_store_enabled else None
+
+    def close(self):
+        """セッションを閉じる（記録中のアーカイブもここで書き出される）"""
+        self.session.close()
+        if self.raw_store:
+            self.raw_store.close()
+
+    def _fetch(self, url: str) -> requests.Response:
+        """
+        URLを取得（ランキング・作品・エピソードの取得はすべてここを通る）
+
+        タイムアウト、リトライ、レート制限、AIMDによる同時接続数の調整、
+        サーキットブレーカーは AdaptiveFetcher が適用する（HTTPキャッシュのTTL内のページには適用しない）
+        """
+        response = self.fetcher.get(url)
+        if self.raw_store:
+            try:
+                self.raw_store.put(url, response.content, response.encoding)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Could not store raw page {url}: {e}")
+        return response
 
     def get_daily_ranking(self, limit: int = 10) -> List[Dict]:
         """カクヨムの日刊ランキングから小説情報を取得（上位10作品）"""
-        url = f"{self.base_url}/rankings/all/daily"
+        return self.get_ranking("all/daily", limit)
+
+    def get_ranking(self, ranking: str, limit: int = 10) -> List[Dict]:
+        """
+        指定したランキングから小説情報を取得
+
+        Args:
+            ranking: "ジャンル/期間" 形式のランキング名（例: "fantasy/weekly"）
+            limit: 取得する作品数の上限
+        """
+        url = f"{self.base_url}/rankings/{ranking}"
         novels = []
         
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            # html5libパーサーを使用
-            soup = BeautifulSoup(response.text, 'html5lib')
-            
-            # 修正したセレクタでタイトル要素を取得
-            title_elements = soup.select(".widget-workCard-titleLabel.bookWalker-work-title")
-            
-            for i, title_element in enumerate(title_elements[:limit], 1):
-                try:
-                    # タイトルテキストを取得
-                    title = title_element.text.strip()
-                    
-                    # URLを取得
-                    href = title_element.get('href')
-                    novel_url = f"{self.base_url}{href}"
-                    
-                    # 作品IDを取得
-                    novel_id = href.split('/')[-1]
-                    
-                    # 著者名を取得（親要素から辿る）
-                    work_card = title_element.find_parent('.widget-workCard')
-                    author_element = work_card.select_one('.widget-workCard-authorLabel') if work_card else None
-                    author = author_element.text.strip() if author_element else "不明"
-                    
-                    novels.append({
-                        'id': novel_id,
-                        'title': title,
-                        'author': author,
-                        'ranking_position': i,
-                        'novel_url': novel_url
-                    })
-                except Exception as e:
-                    logger.error(f"Error parsing novel at position {i}: {e}")
-                    logger.error(f"Error details: {str(e)}")
-                
-            logger.info(f"Retrieved {len(novels)} novels from daily ranking")
+            response = self._fetch(url)
+            novels = self.parse_ranking(response.text, limit)
+            logger.info(f"Retrieved {len(novels)} novels from ranking {ranking}")
                 
         except Exception as e:
-            logger.error(f"Error fetching daily ranking: {e}")
+            logger.error(f"Error fetching ranking {ranking}: {e}")
+        
+        return novels
+
+    def parse_ranking(self, html_text: str, limit: int = 10) -> List[Dict]:
+        """
+        ランキングページのHTMLから小説情報を抽出
+
+        settings.ranking_parser が "stream" の場合は作品カードだけを追跡する
+        ストリーミングパーサーを、"soup" の場合はBeautifulSoup（html5lib）を使用する
+        """
+        if settings.ranking_parser == "soup":
+            return self._parse_ranking_with_soup(html_text, limit)
+        return parse_ranking_page(html_text, self.base_url, limit)
+
+    def _parse_ranking_with_soup(self, html_text: str, limit: int) -> List[Dict]:
+        """BeautifulSoup（html5lib）でランキングページ全体を解析して小説情報を抽出"""
+        novels = []
+        soup = BeautifulSoup(html_text, 'html5lib')
+        
+        # 修正したセレクタでタイトル要素を取得
+        title_elements = soup.select(".widget-workCard-titleLabel.bookWalker-work-title")
+        
+        for i, title_element in enumerate(title_elements[:limit], 1):
+            try:
+                # タイトルテキストを取得
+                title = title_element.text.strip()
+                
+                # URLを取得
+                href = title_element.get('href')
+                novel_url = f"{self.base_url}{href}"
+                
+                # 作品IDを取得
+                novel_id = href.split('/')[-1]
+                
+                # 著者名・ジャンルを取得（作品カードから辿る）
+                work_card = title_element.find_parent(class_='widget-workCard')
+                author_element = work_card.select_one('.widget-workCard-authorLabel') if work_card else None
+                author = author_element.text.strip() if author_element else "不明"
+                genre_element = work_card.select_one('.widget-workCard-genre') if work_card else None
+                genre = genre_element.text.strip() if genre_element else None
+                
+                novels.append({
+                    'id': novel_id,
+                    'title': title,
+                    'author': author,
+                    'genre': genre,
+                    'ranking_position': i,
+                    'novel_url': novel_url
+                })
+            except Exception as e:
+                logger.error(f"Error parsing novel at position {i}: {e}")
+                logger.error(f"Error details: {str(e)}")
         
         return novels
 
-    def get_first_episode(self, novel_id: str) -> Optional[Dict]:
-        """小説の最初の1話を取得"""
+    def get_first_episode(self, novel_id: str, known_episode_ids: Optional[Set[str]] = None) -> Optional[Dict]:
+        """
+        小説の最初の1話を取得
+
+        known_episode_idsに含まれるエピソード（保存済み）の場合は本文を取得せず、
+        'unchanged': True を付けたエピソード情報だけを返す
+        """
         try:
             # 小説の目次ページを取得
             novel_url = f"{self.base_url}/works/{novel_id}"
-            response = self.session.get(novel_url)
-            response.raise_for_status()
+            response = self._fetch(novel_url)
             
             # エピソード1のURLを取得
             body = response.text
@@ -104,6 +262,16 @@ class KakuyomuScraper:
             title_match = re.search(r'"title":"(.*?)"', tmp)
             title = title_match.group(1) if title_match else "第1話"
             
+            # 保存済みのエピソードであれば本文の取得を省略
+            if known_episode_ids and f"{novel_id}-{episode_id}" in known_episode_ids:
+                logger.info(f"First episode of novel {novel_id} is unchanged, skipping download")
+                return {
+                    'id': f"{novel_id}-{episode_id}",
+                    'title': title,
+                    'episode_number': 1,
+                    'unchanged': True
+                }
+            
             # エピソードの内容を取得
             content = self._get_episode_content(episode_url)
             
@@ -113,6 +281,7 @@ class KakuyomuScraper:
                     'id': f"{novel_id}-{episode_id}",
                     'title': title,
                     'content': content,
+                    'episode_number': 1,
                     'posted_at': datetime.now()
                 }
             else:
@@ -123,11 +292,103 @@ class KakuyomuScraper:
             logger.error(f"Error fetching first episode for novel {novel_id}: {e}")
             return None
 
+    def get_episodes(
+        self,
+        novel_id: str,
+        max_episodes: Optional[int] = None,
+        max_chars: Optional[int] = None,
+        known_episode_ids: Optional[Set[str]] = None
+    ) -> List[Dict]:
+        """
+        小説の先頭から複数話を取得
+
+        作品ページの目次を1回で解析し、先頭のエピソードを並列に取得する。
+        本文の合計文字数がmax_charsに達した時点で以降の取得を打ち切るため、
+        余分に取得するのは最大でも並列数分のエピソードに限られる
+
+        Args:
+            novel_id: 小説ID
+            max_episodes: 取得する話数（省略時はsettings.scrape_episodes_per_novel）
+            max_chars: 1作品あたりの本文の文字数上限（省略時はsettings.scrape_episode_char_budget）
+            known_episode_ids: 保存済みのエピソードID（本文の取得を省略する）
+
+        Returns:
+            掲載順のエピソードデータのリスト
+        """
+        if max_episodes is None:
+            max_episodes = settings.scrape_episodes_per_novel
+        if max_chars is None:
+            max_chars = settings.scrape_episode_char_budget
+
+        if max_episodes <= 1:
+            # 1話だけの場合は従来の取得方法を使用
+            episode = self.get_first_episode(novel_id, known_episode_ids)
+            return [episode] if episode else []
+
+        try:
+            novel_url = f"{self.base_url}/works/{novel_id}"
+            response = self._fetch(novel_url)
+            toc = list(enumerate(parse_episode_toc(response.text, novel_id)[:max_episodes], 1))
+        except Exception as e:
+            logger.error(f"Error fetching table of contents for novel {novel_id}: {e}")
+            return []
+
+        if not toc:
+            logger.error(f"No episode found for novel {novel_id}")
+            return []
+
+        def fetch(numbered_entry: Tuple[int, Dict]) -> Optional[Dict]:
+            episode_number, entry = numbered_entry
+            episode_id = f"{novel_id}-{entry['id']}"
+            if known_episode_ids and episode_id in known_episode_ids:
+                return {'id': episode_id, 'title': entry['title'], 'episode_number': episode_number, 'unchanged': True}
+            content = self._get_episode_content(f"{novel_url}/episodes/{entry['id']}")
+            if not content:
+                return None
+            return {
+                'id': episode_id,
+                'title': entry['title'],
+                'content': content,
+                'episode_number': episode_number,
+                'posted_at': datetime.now()
+            }
+
+        episodes = []
+        total_chars = 0
+        budget_exhausted = False
+        wave_size = max(1, settings.scrape_episode_workers)
+        with ThreadPoolExecutor(max_workers=wave_size) as executor:
+            # 並列数ずつ取得し、文字数の上限に達したら次の組は取得しない
+            for start in range(0, len(toc), wave_size):
+                if budget_exhausted:
+                    break
+                for episode in executor.map(fetch, toc[start:start + wave_size]):
+                    if episode is None:
+                        continue
+                    chars = len(episode.get('content', ''))
+                    if episodes and total_chars + chars > max_chars:
+                        budget_exhausted = True
+                        break
+                    total_chars += chars
+                    episodes.append(episode)
+                    if total_chars >= max_chars:
+                        budget_exhausted = True
+                        break
+
+        logger.info(f"Retrieved {len(episodes)} episodes ({total_chars} chars) for novel {novel_id}")
+        return episodes
+
     def _get_episode_content(self, episode_url: str) -> Optional[str]:
         """エピソードの本文を取得"""
         try:
-            response = self.session.get(episode_url)
-            response.raise_for_status()
+            response = self._fetch(episode_url)
+            
+            # 未更新のページは前回の整形結果を再利用（解析処理が変わった場合は作り直す）
+            if self.http_cache and getattr(response, 'from_cache', False):
+                cached_text = self.http_cache.get_parsed(episode_url, EPISODE_PARSER_VERSION)
+                if cached_text:
+                    return cached_text
+            
             body = response.text
             
             # 話タイトル
@@ -138,17 +399,12 @@ class KakuyomuScraper:
                 title = re.sub('</p>', '', title)
                 logger.info(f"Episode title: {title}")
             
-            # 本文を取得
-            text = ""
-            tbody = re.search(r'<p id="p.*?</p>', body)
-            while tbody:
-                text = text + tbody.group(0) + '\r\n'
-                body = body[tbody.end(0):]
-                tbody = re.search(r'<p id="p.*?</p>', body)
+            # 本文を抽出して整形
+            text = parse_episode_text(body)
             
             if text:
-                # 本文を整形
-                text = self._format_text(text)
+                if self.http_cache:
+                    self.http_cache.set_parsed(episode_url, text, EPISODE_PARSER_VERSION)
                 return text
             else:
                 logger.error(f"No content found in {episode_url}")
@@ -159,54 +415,62 @@ class KakuyomuScraper:
             return None
     
     def _format_text(self, text: str) -> str:
-        """本文テキストを整形"""
-        # 改行タグを改行コードに変換
-        text = re.sub('<br />', '\r\n', text)
-        
-        # ルビタグを青空文庫形式に変換
-        text = text.replace('<rp>(</rp>', '')
-        text = text.replace('<rp>)</rp>', '')
-        text = text.replace('<rp>（</rp>', '')
-        text = text.replace('<rp>）</rp>', '')
-        text = text.replace('<rb>', '')
-        text = text.replace('</rb>', '')
-        text = text.replace('<ruby>', AO_RBI)
-        text = text.replace('<rt>', AO_RBL)
-        text = text.replace('</rt></ruby>', AO_RBR)
-        
-        # 傍点タグを変換
-        text = text.replace('<em class="emphasisDots"><span>', AO_EMB)
-        text = text.replace('<span>', AO_EMB)
-        text = text.replace('</span></em>', AO_EME)
-        text = text.replace('</span>', AO_EME)
-        
-        # 画像リンクを変換
-        text = text.replace('<a href="', AO_PIB)
-        text = text.replace(' alt="挿絵" name="img">【挿絵表示】</a>', AO_PIE)
-        
-        # HTMLタグを除去
-        text = re.sub('<.*?>', '', text)
-        text = re.sub(' ', '', text)
-        
-        # HTML特殊文字を処理
-        text = text.replace('&lt', '<')
-        text = text.replace('&gt', '>')
-        text = text.replace('&quot', '')
-        text = text.replace('&nbsp', ' ')
-        text = text.replace('&yen', '\\')
-        text = text.replace('&brvbar', '|')
-        text = text.replace('&copy', '©')
-        text = text.replace('&amp', '&')
-        
-        # &#????にエンコードされた文字をデコードする
-        en = re.search(r'&#.*?;', text)
-        while en:
-            ch = en.group(0)
-            de = html.unescape(ch)
-            text = text.replace(ch, de)
-            en = re.search(r'&#.*?;', text)
-        
-        return text
+        """本文テキストを整形（青空文庫形式に変換）"""
+        return normalize_text(text)
+
+    def fetch_first_episodes(
+        self,
+        novel_ids: Iterable[str],
+        max_workers: Optional[int] = None,
+        known_episode_ids: Optional[Set[str]] = None
+    ) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        複数の小説の最初の1話を並列に取得し、取得できた順に返す
+
+        全体の秒間リクエスト数とホストごとの同時接続数は_fetchで制限されるため、
+        所要時間は逐次取得の待ち時間ではなく制限値に比例する
+
+        Args:
+            novel_ids: 小説IDのリスト
+            max_workers: ワーカースレッド数（省略時はsettings.scrape_max_workers）
+            known_episode_ids: 保存済みのエピソードID（本文の取得を省略する）
+
+        Returns:
+            (小説ID, エピソードデータ) のイテレータ。取得失敗時のエピソードはNone
+        """
+        if max_workers is None:
+            max_workers = settings.scrape_max_workers
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {
+                executor.submit(self.get_first_episode, novel_id, known_episode_ids): novel_id
+                for novel_id in novel_ids
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def fetch_episodes(
+        self,
+        novel_ids: Iterable[str],
+        max_workers: Optional[int] = None,
+        known_episode_ids: Optional[Set[str]] = None
+    ) -> Iterator[Tuple[str, List[Dict]]]:
+        """
+        複数の小説の先頭から複数話を並列に取得し、取得できた順に返す（get_episodesの並列版）
+
+        Returns:
+            (小説ID, エピソードデータのリスト) のイテレータ
+        """
+        if max_workers is None:
+            max_workers = settings.scrape_max_workers
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {
+                executor.submit(self.get_episodes, novel_id, known_episode_ids=known_episode_ids): novel_id
+                for novel_id in novel_ids
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
 
     def process_novels_for_evaluation(self, limit: int = 10):
         """ランキング上位の小説を取得して評価用に処理（上位10作品、各1話）"""
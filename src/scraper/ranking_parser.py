@@ -0,0 +1,129 @@
+"""
+カクヨムのランキングページから作品カードだけを取り出すストリーミングパーサー
+
+ページ全体のDOMを構築せず、作品カード（.widget-workCard）内の
+タイトル・著者・ジャンルのリンクだけを追跡する
+"""
+
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+# 作品カードとその中で読み取る要素のクラス名
+CARD_CLASS = 'widget-workCard'
+TITLE_CLASSES = {'widget-workCard-titleLabel', 'bookWalker-work-title'}
+AUTHOR_CLASS = 'widget-workCard-authorLabel'
+GENRE_CLASS = 'widget-workCard-genre'
+
+
+class RankingPageParser(HTMLParser):
+    """
+    ランキングページの作品カードを抽出するHTMLParser
+
+    feed() 後の cards に、ページ上の順で
+    {'title', 'href', 'author', 'genre'} の辞書が格納される
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.cards: List[Dict[str, Optional[str]]] = []
+        self._card: Optional[Dict[str, Optional[str]]] = None
+        # テキストを収集中のフィールドとその要素（同名タグの入れ子も数える）
+        self._field: Optional[str] = None
+        self._field_tag: Optional[str] = None
+        self._field_depth = 0
+        self._buffer: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if self._field:
+            if tag == self._field_tag:
+                self._field_depth += 1
+            return
+
+        class_attr = None
+        href = None
+        for name, value in attrs:
+            if name == 'class':
+                class_attr = value
+            elif name == 'href':
+                href = value
+        if not class_attr:
+            return
+        classes = set(class_attr.split())
+
+        if CARD_CLASS in classes:
+            self._flush_card()
+            self._card = self._new_card()
+        elif TITLE_CLASSES <= classes:
+            if self._card is None or self._card['title'] is not None:
+                # カード外のタイトルも従来のセレクタと同様に1作品として扱う
+                self._flush_card()
+                self._card = self._new_card()
+            self._card['href'] = href
+            self._start_field('title', tag)
+        elif self._card is not None and AUTHOR_CLASS in classes and self._card['author'] is None:
+            self._start_field('author', tag)
+        elif self._card is not None and GENRE_CLASS in classes and self._card['genre'] is None:
+            self._start_field('genre', tag)
+
+    def handle_endtag(self, tag):
+        if not self._field or tag != self._field_tag:
+            return
+        if self._field_depth > 0:
+            self._field_depth -= 1
+            return
+        self._card[self._field] = ''.join(self._buffer).strip()
+        self._field = None
+        self._field_tag = None
+        self._buffer = []
+
+    def handle_data(self, data):
+        if self._field:
+            self._buffer.append(data)
+
+    def close(self):
+        super().close()
+        self._flush_card()
+
+    def _start_field(self, field: str, tag: str):
+        self._field = field
+        self._field_tag = tag
+        self._field_depth = 0
+        self._buffer = []
+
+    def _new_card(self) -> Dict[str, Optional[str]]:
+        return {'title': None, 'href': None, 'author': None, 'genre': None}
+
+    def _flush_card(self):
+        if self._card is not None and self._card['title'] is not None and self._card['href']:
+            self.cards.append(self._card)
+        self._card = None
+
+
+def parse_ranking_page(html_text: str, base_url: str, limit: Optional[int] = None) -> List[Dict]:
+    """
+    ランキングページのHTMLから作品情報を抽出
+
+    Args:
+        html_text: ランキングページのHTML
+        base_url: 作品URLの組み立てに使うベースURL
+        limit: 取得する作品数の上限
+
+    Returns:
+        id / title / author / genre / ranking_position / novel_url を持つ辞書のリスト
+    """
+    parser = RankingPageParser()
+    parser.feed(html_text)
+    parser.close()
+
+    novels = []
+    for i, card in enumerate(parser.cards[:limit], 1):
+        href = card['href']
+        novels.append({
+            'id': href.rstrip('/').split('/')[-1],
+            'title': card['title'],
+            'author': card['author'] or "不明",
+            'genre': card['genre'],
+            'ranking_position': i,
+            'novel_url': f"{base_url}{href}" if href.startswith('/') else href
+        })
+    return novels
@@ -0,0 +1,147 @@
+import gzip
+import hashlib
+import logging
+import lzma
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, Optional
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 圧縮方式 → ファイルの拡張子
+CODEC_EXTENSIONS = {'gzip': '.gz', 'lzma': '.xz'}
+
+
+def compress(body: bytes, codec: str) -> bytes:
+    if codec == 'lzma':
+        return lzma.compress(body, preset=6)
+    return gzip.compress(body, compresslevel=6)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == 'lzma':
+        return lzma.decompress(data)
+    return gzip.decompress(data)
+
+
+def read_blob(path: str, codec: str) -> bytes:
+    """保存済みのblobを読み込んで展開（プロセスプールのワーカーからも使用する）"""
+    with open(path, 'rb') as f:
+        return decompress(f.read(), codec)
+
+
+class RawPageStore:
+    """
+    取得したページの生データを保存するコンテンツアドレス型のストア
+
+    本文はSHA-256をキーとして objects/<先頭2文字>/<ハッシュ>.gz（または .xz）に
+    圧縮して1回だけ保存し、URLと取得日ごとにどの本文を取得したかをSQLiteの索引に記録する。
+    同じ内容のページを何度取得しても保存されるblobは1つになる
+    """
+
+    def __init__(self, root: Optional[str] = None, codec: Optional[str] = None):
+        self.root = root or settings.raw_store_path
+        self.codec = codec or settings.raw_store_codec
+        if self.codec not in CODEC_EXTENSIONS:
+            raise ValueError(f"Unsupported codec: {self.codec}")
+        self.stats = {'pages': 0, 'blobs': 0, 'bytes': 0}
+
+        os.makedirs(os.path.join(self.root, 'objects'), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.root, 'index.sqlite3'), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS raw_pages (
+                url TEXT NOT NULL,
+                fetched_on TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                codec TEXT NOT NULL,
+                encoding TEXT,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (url, fetched_on)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def blob_path(self, digest: str, codec: Optional[str] = None) -> str:
+        return os.path.join(self.root, 'objects', digest[:2], digest + CODEC_EXTENSIONS[codec or self.codec])
+
+    def _find_blob(self, digest: str) -> Optional[str]:
+        """どちらかの圧縮方式で保存済みであればその圧縮方式を返す"""
+        for codec in (self.codec, *CODEC_EXTENSIONS):
+            if os.path.exists(self.blob_path(digest, codec)):
+                return codec
+        return None
+
+    def put(self, url: str, body: bytes, encoding: Optional[str] = None, fetched_at: Optional[float] = None) -> str:
+        """
+        ページの本文を保存し、索引に記録する
+
+        Returns:
+            本文のSHA-256
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        fetched_at = fetched_at or time.time()
+        codec = self._find_blob(digest)
+        if codec is None:
+            codec = self.codec
+            path = self.blob_path(digest, codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 書き込み途中のファイルを読まれないよう一時ファイルから置き換える
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(compress(body, codec))
+            os.replace(tmp_path, path)
+            with self._lock:
+                self.stats['blobs'] += 1
+                self.stats['bytes'] += os.path.getsize(path)
+
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO raw_pages (url, fetched_on, digest, codec, encoding, size, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (url, date.fromtimestamp(fetched_at).isoformat(), digest, codec, encoding, len(body), fetched_at)
+            )
+            self._conn.commit()
+            self.stats['pages'] += 1
+        return digest
+
+    def latest(self, url: str) -> Optional[Dict[str, Any]]:
+        """URLについて最後に取得した本文の索引情報（blobのパスを含む）"""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT digest, codec, encoding, fetched_on FROM raw_pages
+                WHERE url = ? ORDER BY fetched_at DESC LIMIT 1
+                """,
+                (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'digest': row[0],
+            'codec': row[1],
+            'encoding': row[2],
+            'fetched_on': row[3],
+            'path': self.blob_path(row[0], row[1]),
+        }
+
+    def get(self, url: str) -> Optional[bytes]:
+        """URLについて最後に取得した本文を取得"""
+        entry = self.latest(url)
+        if entry is None:
+            return None
+        return read_blob(entry['path'], entry['codec'])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
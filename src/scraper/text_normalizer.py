@@ -0,0 +1,98 @@
+"""
+カクヨムの本文HTMLを青空文庫形式のテキストに変換する正規化処理
+
+スクレイパー以外（再解析やプロンプト生成など）からも利用できるよう、
+外部ライブラリに依存しない独立したモジュールとしている
+"""
+
+import html
+import re
+from functools import lru_cache
+from typing import List, Tuple
+
+# 青空文庫形式のタグ（整形用）
+AO_RBI = '｜'            # ルビのかかり始め
+AO_RBL = '《'            # ルビ始め
+AO_RBR = '》'            # ルビ終わり
+AO_PB2 = '［＃改ページ］'  # ページ送り
+AO_EMB = '［＃丸傍点］'    # 傍点開始
+AO_EME = '［＃丸傍点終わり］' # 傍点終わり
+AO_PIB = '［＃リンクの図（'  # 画像埋め込み
+AO_PIE = '）入る］'        # 画像埋め込み終わり
+
+# 順に適用する置換（従来の KakuyomuScraper._format_text と同じ順序）
+_REPLACEMENTS: List[Tuple[str, str]] = [
+    # 改行タグを改行コードに変換
+    ('<br />', '\r\n'),
+    # ルビタグを青空文庫形式に変換
+    ('<rp>(</rp>', ''),
+    ('<rp>)</rp>', ''),
+    ('<rp>（</rp>', ''),
+    ('<rp>）</rp>', ''),
+    ('<rb>', ''),
+    ('</rb>', ''),
+    ('<ruby>', AO_RBI),
+    ('<rt>', AO_RBL),
+    ('</rt></ruby>', AO_RBR),
+    # 傍点タグを変換
+    ('<em class="emphasisDots"><span>', AO_EMB),
+    ('<span>', AO_EMB),
+    ('</span></em>', AO_EME),
+    ('</span>', AO_EME),
+    # 画像リンクを変換
+    ('<a href="', AO_PIB),
+    (' alt="挿絵" name="img">【挿絵表示】</a>', AO_PIE),
+]
+
+# HTML特殊文字（従来通り末尾のセミコロンは残す）
+_ENTITY_REPLACEMENTS: List[Tuple[str, str]] = [
+    ('&lt', '<'),
+    ('&gt', '>'),
+    ('&quot', ''),
+    ('&nbsp', ' '),
+    ('&yen', '\\'),
+    ('&brvbar', '|'),
+    ('&copy', '©'),
+    ('&amp', '&'),
+]
+
+_TAG_RE = re.compile('<.*?>')
+_CHAR_REF_RE = re.compile(r'&#.*?;')
+
+
+@lru_cache(maxsize=4096)
+def _decode_char_reference(reference: str) -> str:
+    return html.unescape(reference)
+
+
+def _decode_match(match: 're.Match[str]') -> str:
+    return _decode_char_reference(match.group())
+
+
+def normalize_text(text: str) -> str:
+    """
+    本文HTMLを青空文庫形式のテキストに変換
+
+    ルビ・傍点・挿絵・改行タグの変換、その他のタグと半角空白の除去、
+    文字参照のデコードを行う（従来の KakuyomuScraper._format_text と同じ結果）。
+    &#...; は1回の走査でまとめてデコードし、従来のように参照1つごとに
+    本文全体を置換し直すことはしない（デコードできない参照もそのまま残す）
+    """
+    for old, new in _REPLACEMENTS:
+        if old in text:
+            text = text.replace(old, new)
+    if '<' in text:
+        text = _TAG_RE.sub('', text)
+    text = text.replace(' ', '')
+    if '&' not in text:
+        return text
+    for old, new in _ENTITY_REPLACEMENTS:
+        if old in text:
+            text = text.replace(old, new)
+    # デコードした結果が新たな文字参照になる場合（&amp;#...; など）は、変化がなくなるまで繰り返す
+    while '&#' in text:
+        decoded = _CHAR_REF_RE.sub(_decode_match, text)
+        if decoded == text:
+            break
+        text = decoded
+    return text
@@ -2,39 +2,62 @@ import requests
 import time
 import random
 import logging
-from typing import Optional
+import threading
+from contextlib import contextmanager
+from http import HTTPStatus
+from typing import Any, Dict, Iterator, Optional
+from urllib.parse import urlparse
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
 from src.config import settings
 
 logger = logging.getLogger(__name__)
 
+_default_fetcher = None
+_default_fetcher_lock = threading.Lock()
+
 def fetch_with_retry(url: str, max_retries: int = None) -> Optional[requests.Response]:
     """
     指定されたURLからデータを取得し、失敗した場合はリトライする
+
+    スクレイパーと同じ AdaptiveFetcher（タイムアウト・Retry-After・AIMD・サーキットブレーカー）を
+    プロセス内で共有して使用する
     """
-    if max_retries is None:
-        max_retries = settings.max_retries
-        
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-    
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            return response
-        except requests.RequestException as e:
-            logger.warning(f"Attempt {attempt + 1}/{max_retries} failed: {e}")
-            if attempt < max_retries - 1:
-                # 指数バックオフでリトライ間隔を増やす
-                wait_time = (2 ** attempt) + random.random()
-                logger.info(f"Retrying in {wait_time:.2f} seconds...")
-                time.sleep(wait_time)
-            else:
-                logger.error(f"Failed to fetch {url} after {max_retries} attempts")
-                raise
-    
-    return None
+    global _default_fetcher
+    from src.scraper.fetcher import AdaptiveFetcher
+
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            session = requests.Session()
+            session.headers.update({
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+            })
+            _default_fetcher = AdaptiveFetcher(session)
+        fetcher = _default_fetcher
+
+    return fetcher.get(url, max_retries=max_retries)
+
+def build_response(
+    request: requests.PreparedRequest,
+    status: int,
+    headers: Dict[str, Any],
+    body: bytes,
+    connection: Any = None
+) -> requests.Response:
+    """保存済みのデータからrequestsのレスポンスを組み立てる（キャッシュ・リプレイ用）"""
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response._content = body
+    response.url = request.url
+    response.request = request
+    try:
+        response.reason = HTTPStatus(status).phrase
+    except ValueError:
+        response.reason = ''
+    response.connection = connection
+    return response
 
 def random_delay(min_seconds: float = 1.0, max_seconds: float = 3.0) -> None:
     """
@@ -42,3 +65,165 @@ def random_delay(min_seconds: float = 1.0, max_seconds: float = 3.0) -> None:
     """
     delay = min_seconds + random.random() * (max_seconds - min_seconds)
     time.sleep(delay)
+
+
+class RateLimiter:
+    """
+    全体の秒間リクエスト数を制限する（スレッドセーフ）
+
+    各リクエストの開始時刻を最低 interval 秒ずつ空ける。429や5xxを受けた場合は
+    penalize() で間隔を倍に広げ、成功が続くと reward() で秒間リクエスト数を少しずつ増やす。
+    秒間リクエスト数を明示的に設定した場合はそれを超えない。scrape_interval から算出した場合に
+    適応的に調整するときは、算出値を初期値として max_requests_per_second まで増やし、
+    サイトが許容する速度に収束させる
+    """
+
+    # 広げる間隔の上限（秒）と、reward() 1回あたりに増やす秒間リクエスト数
+    max_interval = 30.0
+    rate_step = 0.05
+
+    def __init__(
+        self,
+        requests_per_second: Optional[float] = None,
+        max_requests_per_second: Optional[float] = None,
+        adaptive: Optional[bool] = None
+    ):
+        """
+        Args:
+            requests_per_second: 秒間リクエスト数の上限（省略時はsettings.scrape_max_requests_per_second、
+                0ならscrape_intervalから算出した値を初期値とする。scrape_intervalも0なら無制限）
+            max_requests_per_second: scrape_intervalから算出した場合に適応的に増やす秒間リクエスト数の上限
+                （省略時はsettings.scrape_adaptive_max_requests_per_second、0なら初期値を超えない）
+            adaptive: 成功に応じて初期値を超えて増やすかどうか（省略時はsettings.scrape_adaptive_concurrency）
+        """
+        if requests_per_second is None:
+            requests_per_second = settings.scrape_max_requests_per_second
+        # 明示的に設定した秒間リクエスト数は、適応的な調整でも超えない上限とする
+        derived = not requests_per_second
+        if derived and settings.scrape_interval > 0:
+            # 上限が未設定の場合はscrape_intervalを1リクエストあたりの間隔とみなす
+            requests_per_second = 1.0 / settings.scrape_interval
+        if max_requests_per_second is None:
+            max_requests_per_second = settings.scrape_adaptive_max_requests_per_second
+        if adaptive is None:
+            adaptive = settings.scrape_adaptive_concurrency
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self.base_interval = self.interval
+        # reward() で縮める間隔の下限
+        self.min_interval = self.base_interval
+        if adaptive and derived and self.base_interval and max_requests_per_second:
+            self.min_interval = min(self.base_interval, 1.0 / max_requests_per_second)
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def acquire(self) -> None:
+        """次のリクエストを送信してよい時刻まで待機"""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+    def penalize(self) -> None:
+        """サーバーが過負荷を示した場合に送信間隔を倍にする（乗算的減少）"""
+        with self._lock:
+            self.interval = min(max(self.interval * 2, 0.1), self.max_interval)
+
+    def reward(self) -> None:
+        """成功時に秒間リクエスト数を rate_step だけ増やす（加算的増加、min_interval まで）"""
+        with self._lock:
+            if self.interval <= self.min_interval:
+                return
+            interval = 1.0 / (1.0 / self.interval + self.rate_step)
+            if self.min_interval:
+                self.interval = max(interval, self.min_interval)
+            else:
+                # 上限なし（0）の設定では十分短くなった時点で元に戻す
+                self.interval = 0.0 if interval < 0.01 else interval
+
+
+class _HostState:
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.active = 0
+        self.condition = threading.Condition()
+
+
+class HostConcurrencyLimiter:
+    """
+    ホストごとの同時接続数を制限する（スレッドセーフ）
+
+    同時接続数の上限は加算的増加・乗算的減少（AIMD）で調整する。成功するたびに
+    上限を 1 / 現在の上限 だけ増やし（おおむね1往復につき+1）、429・5xx・タイムアウト
+    または応答時間が latency_target を超えた場合は decrease_factor 倍に減らす
+    """
+
+    def __init__(
+        self,
+        max_per_host: Optional[int] = None,
+        max_limit: Optional[int] = None,
+        latency_target: Optional[float] = None,
+        decrease_factor: Optional[float] = None,
+        adaptive: Optional[bool] = None
+    ):
+        if max_per_host is None:
+            max_per_host = settings.scrape_per_host_concurrency
+        self.max_per_host = max(1, max_per_host)
+        self.max_limit = max(self.max_per_host, max_limit if max_limit is not None else settings.scrape_max_per_host_concurrency)
+        self.latency_target = latency_target if latency_target is not None else settings.scrape_latency_target
+        self.decrease_factor = decrease_factor if decrease_factor is not None else settings.scrape_decrease_factor
+        self.adaptive = settings.scrape_adaptive_concurrency if adaptive is None else adaptive
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _get_state(self, url: str) -> _HostState:
+        host = urlparse(url).netloc
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = _HostState(float(self.max_per_host))
+                self._hosts[host] = state
+            return state
+
+    def current_limit(self, url: str) -> int:
+        """URLのホストに対する現在の同時接続数の上限"""
+        return int(self._get_state(url).limit)
+
+    @contextmanager
+    def limit(self, url: str) -> Iterator[None]:
+        """URLのホストに対する接続枠を確保してから処理を実行"""
+        state = self._get_state(url)
+        with state.condition:
+            while state.active >= int(state.limit):
+                state.condition.wait()
+            state.active += 1
+        try:
+            yield
+        finally:
+            with state.condition:
+                state.active -= 1
+                state.condition.notify_all()
+
+    def on_success(self, url: str, latency: float) -> None:
+        """成功したリクエストの応答時間を反映（目標を超えていれば混雑とみなす）"""
+        if self.latency_target and latency > self.latency_target:
+            self.on_congestion(url)
+            return
+        if not self.adaptive:
+            return
+        state = self._get_state(url)
+        with state.condition:
+            state.limit = min(self.max_limit, state.limit + 1.0 / state.limit)
+            state.condition.notify_all()
+
+    def on_congestion(self, url: str) -> None:
+        """429・5xx・タイムアウトなどで混雑を検知した場合に上限を減らす"""
+        if not self.adaptive:
+            return
+        state = self._get_state(url)
+        with state.condition:
+            previous = int(state.limit)
+            state.limit = max(1.0, state.limit * self.decrease_factor)
+        if int(state.limit) < previous:
+            logger.info(f"Reduced concurrency for {urlparse(url).netloc} to {int(state.limit)}")
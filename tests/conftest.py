@@ -0,0 +1,34 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.config import settings
+from scripts.mock_llm_server import MockLLMServer
+
+
+@pytest.fixture
+def mock_llm_server():
+    """応答時間なしで起動したモックLLMサーバー"""
+    server = MockLLMServer(latency_mean=0.0, ttft=0.0, score_noise=0.0, seed=0).start()
+    try:
+        yield server
+    finally:
+        server.stop()
+
+
+@pytest.fixture
+def llm_settings(monkeypatch, mock_llm_server):
+    """LLMClientがモックサーバーに送信し、応答キャッシュと呼び出しログを使わないようにする"""
+    monkeypatch.setattr(settings, "llm_endpoint", mock_llm_server.url)
+    monkeypatch.setattr(settings, "llm_api_key", "mock")
+    monkeypatch.setattr(settings, "llm_stream", False)
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+    monkeypatch.setattr(settings, "llm_requests_per_minute", 0)
+    monkeypatch.setattr(settings, "llm_tokens_per_minute", 0)
+    monkeypatch.setattr(settings, "llm_call_log_path", "")
+    return settings
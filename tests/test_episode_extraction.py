@@ -0,0 +1,40 @@
+"""保存済みのエピソードページに対する本文抽出の回帰テスト（旧実装と出力がバイト単位で一致すること）"""
+
+from pathlib import Path
+
+import pytest
+
+from scripts.benchmark_text_normalizer import legacy_format_text
+from scripts.check_episode_extraction import legacy_extract_episode_paragraphs
+from src.scraper.kakuyomu import extract_episode_paragraphs, parse_episode_text
+
+PAGES = sorted((Path(__file__).parent / "fixtures" / "episodes").glob("*.html"))
+
+
+@pytest.fixture(params=PAGES, ids=[page.stem for page in PAGES])
+def page(request):
+    return request.param.read_text(encoding="utf-8")
+
+
+def test_fixture_pages_exist():
+    assert len(PAGES) >= 3
+
+
+def test_paragraphs_match_legacy_extraction(page):
+    expected = legacy_extract_episode_paragraphs(page)
+    assert extract_episode_paragraphs(page).encode("utf-8") == expected.encode("utf-8")
+
+
+def test_episode_text_matches_legacy_pipeline(page):
+    paragraphs = legacy_extract_episode_paragraphs(page)
+    expected = legacy_format_text(paragraphs) if paragraphs else None
+    assert parse_episode_text(page) == expected
+
+
+def test_markup_page_is_converted():
+    text = parse_episode_text((Path(__file__).parent / "fixtures" / "episodes" / "markup.html").read_text(encoding="utf-8"))
+    assert "｜薄暗《うすぐら》い路地" in text
+    assert "［＃丸傍点］絶［＃丸傍点終わり］［＃丸傍点］対［＃丸傍点終わり］" in text
+    assert "［＃リンクの図（" in text
+    # 従来通り文字実体参照の末尾のセミコロンは残る
+    assert "<;システム>;" in text
@@ -0,0 +1,50 @@
+import pytest
+
+from src.evaluator.json_repair import coerce_score, extract_json_candidate, loads_lenient, repair_json_text
+
+
+def test_extract_json_from_code_block():
+    text = '評価結果です。\n```json\n{"overall_score": 7.5}\n```\n以上です。'
+    assert extract_json_candidate(text) == '{"overall_score": 7.5}'
+
+
+def test_extract_json_from_surrounding_text():
+    assert extract_json_candidate('結果: {"a": 1} です') == '{"a": 1}'
+    assert extract_json_candidate("JSONはありません") is None
+
+
+def test_repair_trailing_commas():
+    assert repair_json_text('{"a": [1, 2,], "b": 3,}') == '{"a": [1, 2], "b": 3}'
+
+
+def test_repair_fullwidth_outside_strings_only():
+    repaired = repair_json_text('｛"score"： ７．５， "feedback": "全角の７．５はそのまま"｝')
+    assert repaired == '{"score": 7.5, "feedback": "全角の７．５はそのまま"}'
+
+
+def test_repair_curly_quotes():
+    assert loads_lenient('{“feedback”: “彼は"勇者"だ”}') == {'feedback': '彼は"勇者"だ'}
+
+
+@pytest.mark.parametrize("text", [
+    '```json\n{"overall_score": 7.5, "feedback": "よい",}\n```',
+    '評価します。{"overall_score": ７.５, "feedback": "よい"}',
+    '{"overall_score": 7.5, "feedback": "よい"}',
+])
+def test_loads_lenient_repairs_common_mistakes(text):
+    assert loads_lenient(text) == {'overall_score': 7.5, 'feedback': "よい"}
+
+
+def test_loads_lenient_gives_up_on_truncated_json():
+    assert loads_lenient('{"overall_score": 7.5, "feedback": "よ') is None
+
+
+@pytest.mark.parametrize("value, expected", [(7, 7.0), (7.5, 7.5), ("7.5点", 7.5), ("８．０", 8.0), ("-1", -1.0)])
+def test_coerce_score(value, expected):
+    assert coerce_score(value) == expected
+
+
+@pytest.mark.parametrize("value", [True, None, "不明"])
+def test_coerce_score_rejects_non_numbers(value):
+    with pytest.raises(ValueError):
+        coerce_score(value)
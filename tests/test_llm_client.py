@@ -0,0 +1,142 @@
+import json
+
+import requests
+
+from src.evaluator.call_log import LLMCallLog
+from src.evaluator.llm_client import LLMClient
+from src.evaluator.rate_limiter import LLMRateLimiter
+from src.evaluator.usage import UsageStats
+from scripts.mock_llm_server import MockLLMServer
+
+
+def make_client(usage_stats: UsageStats, call_log: LLMCallLog = None) -> LLMClient:
+    return LLMClient(
+        rate_limiter=LLMRateLimiter(),
+        usage_stats=usage_stats,
+        call_log=call_log or LLMCallLog(path="")
+    )
+
+
+def make_episodes(text: str):
+    return [{'title': "第1話", 'content': text}]
+
+
+def test_second_evaluation_hits_prefix_cache(llm_settings, monkeypatch):
+    sent = []
+    post = requests.post
+
+    def recording_post(url, **kwargs):
+        sent.append(kwargs["data"])
+        return post(url, **kwargs)
+
+    monkeypatch.setattr(requests, "post", recording_post)
+    usage_stats = UsageStats()
+    client = make_client(usage_stats)
+
+    first = client.evaluate_novel("作品A", "作者A", make_episodes("朝の光が窓から差し込み、少女は静かに目を覚ました。"))
+    assert first is not None
+    assert usage_stats.counts['requests'] == 1
+    assert usage_stats.counts['cache_hit_tokens'] == 0
+
+    second = client.evaluate_novel("作品B", "作者B", make_episodes("彼は剣を握り直し、崩れかけた城壁を見上げた。"))
+    assert second is not None
+    assert usage_stats.counts['requests'] == 2
+    assert usage_stats.counts['cache_hit_tokens'] > 0
+
+    # システムメッセージまでのリクエスト本文がバイト単位で一致している
+    assert len(sent) == 2
+    prefixes = [data[:data.index('{"role": "user"')] for data in sent]
+    assert prefixes[0] == prefixes[1]
+    systems = [json.loads(data)["messages"][0] for data in sent]
+    assert systems[0]["role"] == "system"
+    assert systems[0]["content"].encode("utf-8") == systems[1]["content"].encode("utf-8")
+
+
+def test_streamed_calls_record_usage_and_time_to_first_token(llm_settings, monkeypatch):
+    server = MockLLMServer(latency_mean=0.3, latency="fixed", ttft=0.2, score_noise=0.0, seed=0).start()
+    try:
+        monkeypatch.setattr(llm_settings, "llm_endpoint", server.url)
+        monkeypatch.setattr(llm_settings, "llm_stream", True)
+        usage_stats = UsageStats()
+        call_log = LLMCallLog(path="")
+        client = make_client(usage_stats, call_log)
+
+        assert client.evaluate_novel("作品A", "作者A", make_episodes("朝の光が窓から差し込んだ。")) is not None
+        assert client.evaluate_novel("作品B", "作者B", make_episodes("風が止み、森の奥から声が聞こえた。")) is not None
+    finally:
+        server.stop()
+
+    assert usage_stats.counts['requests'] == 2
+    assert usage_stats.counts['prompt_tokens'] > 0
+    assert usage_stats.counts['cache_hit_tokens'] > 0
+    assert len(call_log.calls) == 2
+    for call in call_log.calls:
+        assert call['stream']
+        assert call['prompt_tokens'] > 0
+        assert call['cost'] > 0
+        # 応答ヘッダーではなく最初のトークンを受け取るまでの時間
+        assert call['ttfb'] >= 0.15
+
+
+def packed_item(novel_id, score=7.0):
+    return {
+        'novel_id': novel_id,
+        'story_score': score,
+        'writing_score': score,
+        'character_score': score,
+        'overall_score': score,
+        'feedback': "よい",
+    }
+
+
+def test_packed_response_keeps_only_requested_ids():
+    client = make_client(UsageStats())
+    response = json.dumps({'results': [
+        packed_item("111"),
+        packed_item("999"),
+        packed_item(222, score="６.５点"),
+    ]}, ensure_ascii=False)
+
+    evaluations = client._parse_packed_response(response, ["111", "222", "333"])
+
+    assert set(evaluations) == {"111", "222"}
+    assert evaluations["222"]['overall_score'] == 6.5
+
+
+def test_packed_response_skips_incomplete_items():
+    client = make_client(UsageStats())
+    incomplete = packed_item("222")
+    del incomplete['feedback']
+    invalid = packed_item("333", score="不明")
+    response = json.dumps({'results': [packed_item("111"), incomplete, invalid]}, ensure_ascii=False)
+
+    assert set(client._parse_packed_response(response, ["111", "222", "333"])) == {"111"}
+
+
+def test_packed_response_accepts_bare_list_and_other_keys():
+    client = make_client(UsageStats())
+    bare = json.dumps([packed_item("111")])
+    wrapped = json.dumps({'evaluations': [packed_item("111")]})
+
+    assert set(client._parse_packed_response(bare, ["111"])) == {"111"}
+    assert set(client._parse_packed_response(wrapped, ["111"])) == {"111"}
+    assert client._parse_packed_response("評価できませんでした", ["111"]) == {}
+
+
+def test_evaluation_response_coerces_scores():
+    client = make_client(UsageStats())
+    item = packed_item("111", score="７.５点")
+    del item['novel_id']
+
+    evaluation = client._parse_evaluation_response(json.dumps(item, ensure_ascii=False))
+
+    assert evaluation['overall_score'] == 7.5
+
+
+def test_evaluation_response_with_unreadable_score_is_rejected():
+    client = make_client(UsageStats())
+    item = packed_item("111")
+    del item['novel_id']
+    item['story_score'] = "評価不能"
+
+    assert client._parse_evaluation_response(json.dumps(item, ensure_ascii=False)) is None
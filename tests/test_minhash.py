@@ -0,0 +1,45 @@
+import random
+
+from src.db.minhash import (
+    NUM_PERMUTATIONS, decode_signature, encode_signature, estimate_jaccard, lsh_buckets, minhash_signature
+)
+
+_CHARS = [chr(code) for code in range(0x3042, 0x3093)] + [chr(code) for code in range(0x4e00, 0x4e00 + 500)]
+
+
+def random_text(rng: random.Random, length: int) -> str:
+    return ''.join(rng.choice(_CHARS) for _ in range(length))
+
+
+def test_short_text_has_no_signature():
+    assert minhash_signature("短い本文") is None
+    assert minhash_signature("あ " * 150) is None
+
+
+def test_signature_ignores_whitespace():
+    text = random_text(random.Random(0), 1000)
+    signature = minhash_signature(text)
+    assert len(signature) == NUM_PERMUTATIONS
+    assert minhash_signature("\n　".join(text[i:i + 50] for i in range(0, len(text), 50))) == signature
+
+
+def test_estimate_tracks_similarity():
+    rng = random.Random(1)
+    text = random_text(rng, 5000)
+    near = text[:-100] + random_text(rng, 100)
+    unrelated = random_text(rng, 5000)
+    signature = minhash_signature(text)
+
+    assert estimate_jaccard(signature, minhash_signature(near)) >= 0.85
+    assert estimate_jaccard(signature, minhash_signature(unrelated)) <= 0.1
+    # 近似重複は少なくとも1つの帯が一致する
+    assert set(enumerate(lsh_buckets(signature))) & set(enumerate(lsh_buckets(minhash_signature(near))))
+
+
+def test_encoded_signature_round_trip_and_version():
+    signature = minhash_signature(random_text(random.Random(2), 500))
+    encoded = encode_signature(signature)
+    assert decode_signature(encoded) == signature
+    # 計算方法が異なる（バージョンのない）署名は比較しない
+    assert decode_signature(encoded.split(':', 1)[1]) is None
+    assert decode_signature('') is None
@@ -0,0 +1,22 @@
+from src.evaluator.prompt_builder import compact_episode_text, truncate_to_budget
+
+
+def test_ruby_keeps_base_text():
+    assert compact_episode_text("｜勇者《ゆうしゃ》が剣を抜いた") == "勇者が剣を抜いた"
+
+
+def test_text_in_double_angle_brackets_without_ruby_marker_survives():
+    text = "　光が弾けた。\n《スキル【剣術】を獲得しました》\n「やった！」"
+    assert compact_episode_text(text) == "光が弾けた。\n《スキル【剣術】を獲得しました》\n「やった！」"
+
+
+def test_annotations_and_blank_lines_removed():
+    text = "一行目［＃改ページ］\r\n\r\n\r\n　二行目　"
+    assert compact_episode_text(text) == "一行目\n二行目"
+
+
+def test_truncate_at_sentence_end():
+    text = "あ" * 50 + "。" + "い" * 200
+    truncated, was_truncated = truncate_to_budget(text, 60, model="gpt-4o")
+    assert was_truncated
+    assert truncated == "あ" * 50 + "。…(以下省略)"
@@ -0,0 +1,36 @@
+from src.config import settings
+from src.scraper.utils import RateLimiter
+
+
+def reward_many(limiter, times=500):
+    for _ in range(times):
+        limiter.reward()
+
+
+def test_explicit_rate_is_a_hard_ceiling(monkeypatch):
+    monkeypatch.setattr(settings, 'scrape_max_requests_per_second', 2.0)
+    limiter = RateLimiter(max_requests_per_second=5.0, adaptive=True)
+
+    reward_many(limiter)
+
+    assert limiter.interval == 0.5
+
+
+def test_rate_derived_from_interval_grows_to_adaptive_ceiling(monkeypatch):
+    monkeypatch.setattr(settings, 'scrape_max_requests_per_second', 0.0)
+    monkeypatch.setattr(settings, 'scrape_interval', 1.0)
+    limiter = RateLimiter(max_requests_per_second=5.0, adaptive=True)
+
+    reward_many(limiter)
+
+    assert limiter.interval == 0.2
+
+
+def test_penalized_rate_recovers_to_explicit_rate(monkeypatch):
+    limiter = RateLimiter(requests_per_second=2.0, max_requests_per_second=5.0, adaptive=True)
+    limiter.penalize()
+    assert limiter.interval == 1.0
+
+    reward_many(limiter)
+
+    assert limiter.interval == 0.5
@@ -0,0 +1,111 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.db import repository
+from src.db.database import Base
+from src.db.models import Episode, EpisodeLSHBand, Evaluation
+from src.db.repository import find_near_duplicate_evaluation, save_novel_data, update_episode_contents
+
+_SENTENCES = [
+    "朝の光が窓から差し込み、少女は静かに目を覚ました。",
+    "「今日こそは、あの扉の向こうへ行ってみせる」",
+    "彼は剣を握り直し、崩れかけた城壁を見上げた。",
+    "街の喧騒から離れた丘の上に、古い図書館が建っている。",
+    "誰も知らない約束が、二人の間にだけ残されていた。",
+    "風が止み、森の奥から低いうなり声が聞こえてくる。",
+]
+
+
+@pytest.fixture
+def session():
+    """外部キー制約を有効にしたSQLiteのDBセッション"""
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def enable_foreign_keys(connection, _):
+        connection.execute("PRAGMA foreign_keys=ON")
+
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def make_text(seed: int, sentences: int = 40) -> str:
+    return "\n".join(_SENTENCES[(seed + i * 7 + i // 3) % len(_SENTENCES)] + f"{i}" for i in range(sentences))
+
+
+def save(session, novel_id: str, content: str) -> bool:
+    return save_novel_data(
+        session,
+        novel_id=novel_id,
+        title=f"作品{novel_id}",
+        author="作者",
+        ranking_position=1,
+        novel_url=f"https://kakuyomu.jp/works/{novel_id}",
+        episodes=[{
+            'id': f"{novel_id}-1",
+            'title': "第1話",
+            'content': content,
+            'posted_at': datetime(2024, 1, 1),
+            'episode_number': 1,
+        }]
+    )
+
+
+def test_save_new_episode_indexes_signature(session):
+    assert save(session, "100", make_text(0))
+
+    episode = session.query(Episode).get("100-1")
+    assert episode.minhash
+    assert session.query(EpisodeLSHBand).filter(EpisodeLSHBand.episode_id == "100-1").count() > 0
+
+
+def test_save_then_lookup_near_duplicate(session):
+    text = make_text(0)
+    assert save(session, "100", text)
+    session.add(Evaluation(novel_id="100", episode_id="100-1", overall_score=7.5, llm_feedback="よい"))
+    session.commit()
+
+    # 末尾だけが異なる転載
+    assert save(session, "200", text + "\n（作者より：続きは明日更新します）")
+    episodes = session.query(Episode).filter(Episode.novel_id == "200").all()
+    evaluation = find_near_duplicate_evaluation(session, "200", episodes, threshold=0.8)
+    assert evaluation is not None
+    assert evaluation.novel_id == "100"
+
+    assert save(session, "300", make_text(3))
+    episodes = session.query(Episode).filter(Episode.novel_id == "300").all()
+    assert find_near_duplicate_evaluation(session, "300", episodes, threshold=0.8) is None
+
+
+def test_update_episode_replaces_bands(session):
+    assert save(session, "100", make_text(0))
+    assert save(session, "100", make_text(3))
+    assert update_episode_contents(session, {"100-1": make_text(5)}) == 1
+
+    episode = session.query(Episode).get("100-1")
+    bands = session.query(EpisodeLSHBand).filter(EpisodeLSHBand.episode_id == "100-1").all()
+    assert episode.minhash
+    assert len(bands) == len({band.band for band in bands}) > 0
+
+
+def test_unchanged_episode_is_not_rehashed(session, monkeypatch):
+    text = make_text(0)
+    assert save(session, "100", text)
+
+    calls = []
+    monkeypatch.setattr(repository, 'minhash_signature', lambda content: calls.append(content))
+    assert save(session, "100", text)
+
+    assert calls == []
+
+
+def test_episode_without_content_returns_false(session):
+    assert save(session, "100", None) is False
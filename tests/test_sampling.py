@@ -0,0 +1,92 @@
+import pytest
+
+from src.evaluator.sampling import aggregate_samples, select_uncertain, top_n_cutoff
+
+
+def sample(overall, sub=None, feedback="よい"):
+    sub = overall if sub is None else sub
+    return {
+        'overall_score': overall,
+        'story_score': sub,
+        'writing_score': sub,
+        'character_score': sub,
+        'feedback': feedback,
+    }
+
+
+def test_single_sample_uses_prior():
+    aggregate = aggregate_samples([sample(7.0)], prior_std=0.5)
+    assert aggregate['sample_count'] == 1
+    assert aggregate['score_variance'] is None
+    assert aggregate['ci_halfwidth'] == pytest.approx(1.96 * 0.5)
+
+
+def test_identical_samples_do_not_claim_certainty():
+    aggregate = aggregate_samples([sample(7.0), sample(7.0)], prior_std=0.7)
+    assert aggregate['score_variance'] == 0
+    assert aggregate['ci_halfwidth'] > 0.3
+
+
+def test_interval_narrows_with_more_agreeing_samples():
+    widths = [aggregate_samples([sample(7.0)] * count, prior_std=0.7)['ci_halfwidth'] for count in range(1, 6)]
+    assert widths == sorted(widths, reverse=True)
+    assert widths[-1] < 0.3
+
+
+def test_disagreeing_samples_widen_interval():
+    agreeing = aggregate_samples([sample(7.0), sample(7.0)], prior_std=0.7)
+    disagreeing = aggregate_samples([sample(5.0), sample(9.0)], prior_std=0.7)
+    assert disagreeing['ci_halfwidth'] > agreeing['ci_halfwidth']
+    assert disagreeing['score_variance'] == pytest.approx(8.0)
+
+
+def test_aggregate_means_and_feedback_closest_to_mean():
+    aggregate = aggregate_samples([sample(6.0, feedback="低い"), sample(7.0, feedback="中間"), sample(8.5, feedback="高い")])
+    assert aggregate['overall_score'] == pytest.approx(7.1666, abs=1e-3)
+    assert aggregate['feedback'] == "中間"
+    assert aggregate['sample_disagreement'] == pytest.approx(1.2583, abs=1e-3)
+
+
+def test_top_n_cutoff():
+    aggregates = {str(i): {'overall_score': score} for i, score in enumerate([9.0, 8.0, 6.0, 5.0])}
+    assert top_n_cutoff(aggregates, 2) == pytest.approx(7.0)
+    assert top_n_cutoff(aggregates, 4) is None
+    assert top_n_cutoff(aggregates, 0) is None
+
+
+def test_select_uncertain_picks_novels_near_cutoff():
+    aggregates = {
+        'top': aggregate_samples([sample(9.5)], prior_std=0.3),
+        'near_above': aggregate_samples([sample(7.2)], prior_std=0.3),
+        'near_below': aggregate_samples([sample(6.8)], prior_std=0.3),
+        'bottom': aggregate_samples([sample(3.0)], prior_std=0.3),
+    }
+    assert sorted(select_uncertain(aggregates, top_n=2, ci_target=0.3, disagreement=10.0)) == ['near_above', 'near_below']
+
+
+def test_select_uncertain_skips_confident_novels():
+    aggregates = {
+        'near_above': aggregate_samples([sample(7.2)] * 5, prior_std=0.3),
+        'near_below': aggregate_samples([sample(6.8)] * 5, prior_std=0.3),
+        'top': aggregate_samples([sample(9.5)], prior_std=0.3),
+    }
+    assert select_uncertain(aggregates, top_n=1, ci_target=0.3, disagreement=10.0) == []
+
+
+def uneven(overall, story):
+    return {**sample(overall), 'story_score': story, 'writing_score': 9.0}
+
+
+def test_select_uncertain_picks_disagreement_between_samples():
+    unstable = aggregate_samples([uneven(5.0, 1.0), uneven(5.0, 6.0)], prior_std=0.7)
+    calm = aggregate_samples([sample(5.0), sample(5.0)], prior_std=0.7)
+    assert unstable['sample_disagreement'] == pytest.approx(3.5355, abs=1e-3)
+    assert select_uncertain({'unstable': unstable, 'calm': calm}, top_n=0, ci_target=0.3, disagreement=1.0) == ['unstable']
+
+
+def test_select_uncertain_ignores_stable_uneven_profile():
+    # ストーリーと文章力の評価が毎回大きく異なるが、回ごとの評価は一致している作品
+    single = aggregate_samples([uneven(5.0, 1.0)], prior_std=0.7)
+    repeated = aggregate_samples([uneven(5.0, 1.0)] * 2, prior_std=0.7)
+    assert repeated['sample_disagreement'] == 0
+    assert select_uncertain({'single': single, 'repeated': repeated}, top_n=0, ci_target=0.3, disagreement=1.0) == []
@@ -0,0 +1,21 @@
+import pytest
+
+from src.scraper.text_normalizer import normalize_text
+
+
+@pytest.mark.parametrize("html_text, expected", [
+    ('<ruby><rb>薄暗</rb><rp>（</rp><rt>うすぐら</rt><rp>）</rp></ruby>い', '｜薄暗《うすぐら》い'),
+    ('<em class="emphasisDots"><span>じめじめ</span></em>', '［＃丸傍点］じめじめ［＃丸傍点終わり］'),
+    ('一行目<br />二行目', '一行目\r\n二行目'),
+    ('<p id="p1">吾輩は 猫である。</p>', '吾輩は猫である。'),
+    ('&quot;何でも&quot;', ';何でも;'),
+    ('&#12354;&#x3044;', 'あい'),
+    ('&amp#65;', 'A'),
+])
+def test_normalize_text(html_text, expected):
+    assert normalize_text(html_text) == expected
+
+
+def test_undecodable_reference_is_kept():
+    # 従来の実装ではデコードできない参照で無限ループになっていた
+    assert normalize_text('&#xyz;本文') == '&#xyz;本文'